@@ -1,5 +1,12 @@
 from .remote_attribute import RemoteAttribute
 from .remote_instance import RemoteInstance
 from .remote_object import RemoteObject, RemoteObjectError
+from .remote_file import RemoteFile
 from .rest_client import RestClient
+from .socket_transport import SocketTransport
+from .release_queue import ReleaseQueue, RELEASE_QUEUE
 from .define_remote_class import defineRemoteClass, defineRemoteClasses
+from .remote_module import RemoteModule, connect
+from .pipeline import Pipeline, PipelineStep
+from .server_pool import ServerPool
+from .transaction import Transaction
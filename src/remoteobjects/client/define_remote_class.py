@@ -3,6 +3,7 @@ from .remote_instance import RemoteInstance, RequiredParameter
 from .remote_object import RemoteObject
 from .rest_client import RestClient
 from .. import __VERSION__
+from ..codecs import CodecJSONEncoder, CodecJSONDecoder
 from .define_remote_object_loc import _define_remote_constructor
 
 import json
@@ -17,6 +18,28 @@ def defineRemoteClass(
     attribute_depth_allowance=0,
 ):
     RemoteObject._confirm_server_version(server_uri)
+    globals_dict[f"{class_key}Remote"] = _remote_class(
+        class_key,
+        server_uri,
+        delete_remote_on_del,
+        allowed_upload_extension_regex,
+        attribute_depth_allowance,
+    )
+
+
+def _remote_class(
+    class_key,
+    server_uri,
+    delete_remote_on_del=True,
+    allowed_upload_extension_regex=r".*",
+    attribute_depth_allowance=0,
+):
+    """
+    Return
+    ------
+    (type): the `{class_key}Remote` class, defined from its signature on the
+        server
+    """
     r = RestClient(server_uri)
     init_signature_response = r._get(
         "remoteobjects/registry/signature", params={"class_key": class_key}
@@ -25,7 +48,12 @@ def defineRemoteClass(
         raise RuntimeError(init_signature_response.json())
     init_signature = init_signature_response.json()["methods"]["__init__"]
 
-    definition_loc = ["", f"class {class_key}Remote(RemoteInstance):"]
+    definition_loc = [
+        "",
+        f"class {class_key}Remote(RemoteInstance):",
+        f"\t_class_key = '{class_key}'",
+        f"\t_default_server_uri = '{server_uri}'",
+    ]
     definition_loc += _define_remote_constructor(
         init_signature,
         server_uri,
@@ -42,7 +70,7 @@ def defineRemoteClass(
     except BaseException as err:
         print(f"`{definition_code}`")
         raise err
-    globals_dict[f"{class_key}Remote"] = local_env_dict[f"{class_key}Remote"]
+    return local_env_dict[f"{class_key}Remote"]
 
 
 def defineRemoteClasses(
@@ -11,7 +11,12 @@ def _define_remote_constructor(
     delete_remote_on_del: bool,
     allowed_upload_extension_regex: str,
     attribute_depth_allowance: int = 0,
+    define_methods: bool = True,
 ):
+    """
+    :define_methods bool: whether the constructor defines the methods of the
+        object from its signature, else they are defined on the class
+    """
     kwargs_param_present = False
     if len(init_signature) > 0:
         last_param_key = list(init_signature)[-1]
@@ -38,8 +43,8 @@ def _define_remote_constructor(
             "\t\tallowed_upload_extension_regex = "
             f"r'{allowed_upload_extension_regex}',"
         ),
-        "\t\tjsonEncoder = json.JSONEncoder,",
-        "\t\tjsonDecoder = json.JSONDecoder,",
+        "\t\tjsonEncoder = CodecJSONEncoder,",
+        "\t\tjsonDecoder = CodecJSONDecoder,",
     ]
 
     if kwargs_param_present:
@@ -70,23 +75,31 @@ def _define_remote_constructor(
         "\t\t\tjsonEncoder = jsonEncoder,",
         "\t\t\tjsonDecoder = jsonDecoder",
         "\t\t)",
+    ]
+    if not define_methods and attribute_depth_allowance == 0:
+        return definition_loc
+
+    definition_loc += [
         "\t\tresponse = self._get(",
         "\t\t\t'remoteobjects/registry/signature',",
         "\t\t\tparams = {'object_id': self._remote_object_id},",
         "\t\t)",
         "",
         "\t\tresponse_json = json.loads(response.content, cls=jsonDecoder)",
-        "\t\tfor (name, parameters) in response_json['methods'].items():",
-        "\t\t\tif name != '__init__':",
-        "\t\t\t\tself._add_method_loc(",
-        "\t\t\t\t\tname,",
-        "\t\t\t\t\tself._define_remote_function_loc(",
-        "\t\t\t\t\t\tname,",
-        "\t\t\t\t\t\tparameters, # name:code-string dict",
-        "\t\t\t\t\t\tself._remote_object_id",
-        "\t\t\t\t\t)",
-        "\t\t\t\t)",
     ]
+    if define_methods:
+        definition_loc += [
+            "\t\tfor (name, parameters) in response_json['methods'].items():",
+            "\t\t\tif name != '__init__':",
+            "\t\t\t\tself._add_method_loc(",
+            "\t\t\t\t\tname,",
+            "\t\t\t\t\tself._define_remote_function_loc(",
+            "\t\t\t\t\t\tname,",
+            "\t\t\t\t\t\tparameters, # name:code-string dict",
+            "\t\t\t\t\t\tself._remote_object_id",
+            "\t\t\t\t\t)",
+            "\t\t\t\t)",
+        ]
     if attribute_depth_allowance != 0:
         definition_loc += [
             "\t\tfor (name, _) in response_json['attributes'].items():",
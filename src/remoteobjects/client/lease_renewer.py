@@ -0,0 +1,107 @@
+from .rest_client import RestClient
+import logging
+import threading
+import time
+
+
+class LeaseRenewer(object):
+    """
+    Renew the leases of the remote objects that live proxies hold, with one
+    request per server from a background thread. Once no proxy holds an
+    object, its lease lapses and the server expires it.
+    """
+
+    def __init__(self, renewal_fraction=1 / 3):
+        """
+        :renewal_fraction float: the fraction of the shortest lease TTL
+            between renewals
+        """
+        self.renewal_fraction = renewal_fraction
+        self._lock = threading.RLock()
+        self._held = {}  # {server_uri: {object_id: hold count}}
+        self._lease_ttl = {}  # {server_uri: lease_ttl}
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def hold(self, server_uri, object_id, lease_ttl):
+        with self._lock:
+            server_held = self._held.setdefault(server_uri, {})
+            interval_changed = (
+                len(server_held) == 0 or self._lease_ttl.get(server_uri) != lease_ttl
+            )
+            server_held[object_id] = server_held.get(object_id, 0) + 1
+            self._lease_ttl[server_uri] = lease_ttl
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="remoteobjects_lease", daemon=True
+                )
+                self._thread.start()
+            elif interval_changed:
+                self._wakeup.set()
+
+    def drop(self, server_uri, object_id):
+        with self._lock:
+            server_held = self._held.get(server_uri, {})
+            if object_id not in server_held:
+                return
+            server_held[object_id] -= 1
+            if server_held[object_id] == 0:
+                server_held.pop(object_id)
+
+    def _interval(self):
+        with self._lock:
+            lease_ttls = [
+                self._lease_ttl[server_uri]
+                for (server_uri, server_held) in self._held.items()
+                if len(server_held) > 0
+            ]
+        if len(lease_ttls) == 0:
+            return None  # until an object is held
+        return self.renewal_fraction * min(lease_ttls)
+
+    def _run(self):
+        last_renewal = time.monotonic()
+        while True:
+            interval = self._interval()
+            self._wakeup.wait(
+                None
+                if interval is None
+                else max(0, last_renewal + interval - time.monotonic())
+            )
+            self._wakeup.clear()
+            interval = self._interval()
+            if interval is not None and time.monotonic() >= last_renewal + interval:
+                last_renewal = time.monotonic()
+                self.renew()
+
+    def renew(self):
+        with self._lock:
+            held = {
+                server_uri: list(server_held.keys())
+                for (server_uri, server_held) in self._held.items()
+                if len(server_held) > 0
+            }
+
+        for (server_uri, object_ids) in held.items():
+            try:
+                response = RestClient(server_uri)._put(
+                    "remoteobjects/lease", data={"object_ids": object_ids}
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(response.content)
+                unknown = response.json()["unknown"]
+                if len(unknown) > 0:
+                    logger = logging.getLogger("remoteobjects_client")
+                    logger.warning(
+                        f"Objects {unknown} of `{server_uri}` are no longer "
+                        "registered."
+                    )
+            except BaseException as err:
+                logger = logging.getLogger("remoteobjects_client")
+                logger.warning(
+                    f"Failed to renew leases of {object_ids} of `{server_uri}`: "
+                    f"{repr(err)}"
+                )
+
+
+LEASE_RENEWER = LeaseRenewer()
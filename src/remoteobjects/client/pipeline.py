@@ -0,0 +1,127 @@
+from .remote_object import RemoteObjectError
+from .rest_client import RestClient
+from ..codecs import CodecJSONEncoder, CodecJSONDecoder
+import json
+
+
+class PipelineStep(object):
+    """
+    The (server-side) return of a step of a Pipeline, which can be passed as
+    an argument to later steps.
+    """
+
+    def __init__(self, pipeline, step_id):
+        self._pipeline = pipeline
+        self._step_id = step_id
+
+
+class Pipeline(RestClient):
+    """
+    Accumulate method calls and attribute reads against remote objects of one
+    server, executing them in a single request. Step returns are kept on the
+    server and only the requested outputs are sent back, e.g.:
+
+        pipeline = Pipeline(server_uri)
+        a = pipeline.call(remoteObj, "acquire")
+        b = pipeline.call(remoteObj, "process", data=a)
+        pipeline.call(remoteObj, "store", data=b)
+        b_value, = pipeline.execute(b)
+    """
+
+    def __init__(
+        self, server_uri, jsonEncoder=CodecJSONEncoder, jsonDecoder=CodecJSONDecoder
+    ):
+        super().__init__(server_uri, jsonEncoder=jsonEncoder, jsonDecoder=jsonDecoder)
+        self._steps = []
+        self._step_remote_objects = {}
+
+    def _encode_references(self, value):
+        if isinstance(value, PipelineStep):
+            if value._pipeline is not self:
+                raise ValueError("Cannot reference a step of another pipeline.")
+            return {"__remobj_step__": value._step_id}
+        if isinstance(value, dict):
+            return {key: self._encode_references(val) for (key, val) in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._encode_references(val) for val in value]
+        return value
+
+    def _add_step(self, remote_object, attribute_path, step):
+        if remote_object._server_uri != self._server_uri:
+            raise ValueError(
+                f"Remote object of `{remote_object._server_uri}` cannot be used "
+                f"in a pipeline of `{self._server_uri}`."
+            )
+        step_id = str(len(self._steps))
+        step["id"] = step_id
+        step["object_id"] = remote_object._remote_object_id
+        if attribute_path is not None:
+            step["attribute_path"] = attribute_path
+        self._steps.append(step)
+        self._step_remote_objects[step_id] = remote_object
+        return PipelineStep(self, step_id)
+
+    def call(self, remote_object, func_name, /, **kwargs):
+        """
+        Add a call of the remote object's method, with keyword arguments that
+        may be PipelineSteps.
+        """
+        return self._add_step(
+            remote_object,
+            getattr(remote_object, "_attribute_path", None),
+            {"func_name": func_name, "args": self._encode_references(kwargs)},
+        )
+
+    def get(self, remote_object, attribute_name=None):
+        """
+        Add a read of the remote object's attribute (or of the remote object
+        itself).
+        """
+        attribute_path = getattr(remote_object, "_attribute_path", None)
+        if attribute_name is not None:
+            attribute_path = (
+                attribute_name
+                if attribute_path is None
+                else f"{attribute_path}.{attribute_name}"
+            )
+        return self._add_step(remote_object, attribute_path, {})
+
+    def execute(self, *outputs, return_handles=False):
+        """
+        Execute the accumulated steps in one request.
+
+        Return
+        ------
+        (list): the returns of the `outputs` steps, in order. With
+            `return_handles`, non-primitive returns are proxied as handles of
+            objects the server registers.
+        """
+        for output in outputs:
+            if output._pipeline is not self:
+                raise ValueError("Cannot output a step of another pipeline.")
+        response = self._post(
+            "remoteobjects/pipeline",
+            data={
+                "steps": self._steps,
+                "outputs": [output._step_id for output in outputs],
+                "return_handles": return_handles,
+            },
+        )
+        response_json = json.loads(response.content, cls=self.jsonDecoder)
+        if response.status_code != 200:
+            raise RemoteObjectError(
+                response_json["error"],
+                response_json["message"],
+                response_json["traceback"],
+            )
+        returns = []
+        for output in outputs:
+            if output._step_id in response_json["return_handles"]:
+                returns.append(
+                    self._step_remote_objects[output._step_id]._remote_handle(
+                        response_json["return_handles"][output._step_id]
+                    )
+                )
+            else:
+                returns.append(response_json["returns"][output._step_id])
+        return returns
@@ -0,0 +1,106 @@
+from .rest_client import RestClient
+import atexit
+import logging
+import sys
+import threading
+
+
+class ReleaseQueue(object):
+    """
+    Collect the remote resources of garbage-collected proxies (registered
+    objects, uploaded files and offered downloads), releasing them in batches
+    from a background thread and at interpreter exit, so that `__del__` does
+    no network I/O.
+    """
+
+    def __init__(self, flush_interval=0.5, batch_size=256):
+        """
+        :flush_interval float: seconds between flushes of the queue
+        :batch_size int: queue length that triggers an early flush
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # reentrant, as `__del__` may run while this thread holds the lock
+        self._lock = threading.RLock()
+        # {server_uri: {"object_ids": [], "uploads": [namespaced file_keys],
+        #   "file_ids": []}}
+        self._pending = {}
+        self._pending_count = 0
+        # serialises flushes, so one returns after any concurrent flush is done
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def _enqueue(self, server_uri, key, value):
+        with self._lock:
+            pending = self._pending.setdefault(
+                server_uri, {"object_ids": [], "uploads": [], "file_ids": []}
+            )
+            pending[key].append(value)
+            self._pending_count += 1
+            if self._thread is None and not sys.is_finalizing():
+                # (a thread cannot start once the interpreter is finalizing)
+                self._thread = threading.Thread(
+                    target=self._run, name="remoteobjects_release", daemon=True
+                )
+                self._thread.start()
+            if self._pending_count >= self.batch_size:
+                self._wakeup.set()
+
+    def release_object(self, server_uri, object_id):
+        self._enqueue(server_uri, "object_ids", object_id)
+
+    def release_files(self, server_uri, namespace, file_keys):
+        """
+        :namespace dict: {"client_id": , "object_id": } the files were uploaded
+            under
+        """
+        self._enqueue(server_uri, "uploads", dict(namespace, file_keys=list(file_keys)))
+
+    def release_download(self, server_uri, file_id):
+        self._enqueue(server_uri, "file_ids", file_id)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """
+        Release everything queued, with one request per server and kind of
+        resource.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = {}
+                self._pending_count = 0
+            self._release(pending)
+
+    def _release(self, pending):
+        for (server_uri, server_pending) in pending.items():
+            client = RestClient(server_uri)
+            for (endpoint, key) in [
+                ("remoteobjects/registry", "object_ids"),
+                ("remoteobjects/upload", "uploads"),
+                ("remoteobjects/download", "file_ids"),
+            ]:
+                if len(server_pending[key]) == 0:
+                    continue
+                try:
+                    response = client._delete(
+                        endpoint, data={key: server_pending[key]}
+                    )
+                    if response.status_code != 200:
+                        raise RuntimeError(response.content)
+                except BaseException as err:
+                    logger = logging.getLogger("remoteobjects_client")
+                    logger.warning(
+                        f"Failed to release {key} {server_pending[key]} "
+                        f"of `{server_uri}`: {repr(err)}"
+                    )
+
+
+RELEASE_QUEUE = ReleaseQueue()
@@ -1,5 +1,7 @@
 from .remote_object import RemoteObject
+from ..codecs import CodecJSONEncoder, CodecJSONDecoder
 import json
+import threading
 
 
 class RemoteAttribute(RemoteObject):
@@ -12,9 +14,11 @@ class RemoteAttribute(RemoteObject):
         ancestor_obj: dict,
         allowed_upload_extension_regex=r".*",
         attribute_depth_allowance: int = 0,
-        jsonEncoder=json.JSONEncoder,
-        jsonDecoder=json.JSONDecoder,
+        jsonEncoder=CodecJSONEncoder,
+        jsonDecoder=CodecJSONDecoder,
     ):
+        # properties are defined on the class, so each attribute needs its own
+        self.__class__ = type(self.__class__.__name__, (self.__class__,), {})
         super().__init__(
             server_uri,
             root_object_id,
@@ -28,8 +32,29 @@ class RemoteAttribute(RemoteObject):
         self._attribute_depth_allowance = attribute_depth_allowance
         self._ancestor_obj[remote_object_str] = self
         self._initialised = False
+        self._init_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # only reached for names not (yet) defined: initialise on first access
+        if name.startswith("_") or self.__dict__.get("_initialised", True):
+            raise AttributeError(
+                f"'{self.__class__.__name__}' object has no attribute '{name}'"
+            )
+        self._init_from_remote_signature()
+        return getattr(self, name)
+
+    def _attribute_child_path(self, name):
+        if self._attribute_path is None:
+            return name
+        return f"{self._attribute_path}.{name}"
 
     def _init_from_remote_signature(self):
+        with self._init_lock:
+            # another thread may have initialised it meanwhile
+            if not self._initialised:
+                self._init_from_remote_signature_locked()
+
+    def _init_from_remote_signature_locked(self):
         response = self._get(
             "remoteobjects/registry/signature",
             params={
@@ -52,8 +77,8 @@ class RemoteAttribute(RemoteObject):
         if self._attribute_depth_allowance != 0:
             for (name, obj_str) in response_json["attributes"].items():
                 # the class might already have the property defined
-                if not hasattr(self, name):
-                    self._add_property(f"{self._attribute_path}.{name}")
+                if not hasattr(self.__class__, name):
+                    self._add_property(self._attribute_child_path(name))
 
             for (name, obj_str) in response_json["attributes_nonprimitive"].items():
                 if obj_str in self._ancestor_obj:
@@ -62,7 +87,7 @@ class RemoteAttribute(RemoteObject):
                     remote_attribute = RemoteAttribute(
                         self._server_uri,
                         self._remote_object_id,
-                        f"{self._attribute_path}.{name}",
+                        self._attribute_child_path(name),
                         obj_str,
                         self._ancestor_obj,
                         self._allowed_extension_regex,
@@ -0,0 +1,121 @@
+from .remote_object import RemoteObjectError
+from .rest_client import RestClient
+from .release_queue import RELEASE_QUEUE
+from ..codecs import CodecJSONEncoder, CodecJSONDecoder
+import json
+import mmap
+import os
+import requests
+import tempfile
+
+
+class RemoteFile(RestClient):
+    """
+    A server-local file that a method returned (as a `ServerFile`), to be
+    streamed to disk. The server offers the file until this proxy is
+    released or collected.
+    """
+
+    def __init__(
+        self,
+        server_uri,
+        file_id,
+        filename,
+        size,
+        etag=None,
+        jsonEncoder=CodecJSONEncoder,
+        jsonDecoder=CodecJSONDecoder,
+    ):
+        super().__init__(server_uri, jsonEncoder=jsonEncoder, jsonDecoder=jsonDecoder)
+        self.file_id = file_id
+        # named by the server, so kept from naming a path outside a directory
+        self.filename = os.path.basename(filename)
+        if self.filename in ["", ".", ".."]:
+            self.filename = file_id
+        self.size = size
+        self.etag = etag
+        self._released = False
+
+    def __repr__(self):
+        return f"RemoteFile({self.filename}, {self.size} bytes)"
+
+    def download(self, filepath=None, resume=False, chunk_size=1 << 20):
+        """
+        Stream the file to `filepath`, one chunk at a time. With `resume`, an
+        existing file at `filepath`, taken to be a partial download of this
+        file, is completed with a Range request rather than downloaded again.
+        The range is conditional on the file not having changed on the server
+        since it was offered (else the whole file is sent).
+
+        :filepath str|None: the file, or directory, to save to. Defaults to
+            `filename` in the working directory.
+
+        Return
+        ------
+        (str): the filepath saved to
+        """
+        if filepath is None:
+            filepath = self.filename
+        elif os.path.isdir(filepath):
+            filepath = os.path.join(filepath, self.filename)
+
+        offset = 0
+        if resume and self.etag is not None and os.path.exists(filepath):
+            offset = os.path.getsize(filepath)
+            if offset >= self.size:
+                offset = 0  # not a partial download, so downloaded anew
+
+        headers = {}
+        if offset > 0:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = f'"{self.etag}"'
+        response = self._manage_CRUD_request(
+            requests.get,
+            "remoteobjects/download",
+            params={"file_id": self.file_id},
+            stream=True,
+            headers=headers,
+        )
+        try:
+            if response.status_code not in [200, 206]:
+                response_json = json.loads(response.content, cls=self.jsonDecoder)
+                raise RemoteObjectError(
+                    response_json["error"],
+                    response_json["message"],
+                    response_json["traceback"],
+                )
+            # a 200 is the whole file, even if a range was requested
+            with open(filepath, "ab" if response.status_code == 206 else "wb") as fio:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    fio.write(chunk)
+        finally:
+            response.close()
+        return filepath
+
+    def mmap(self, filepath=None, resume=False):
+        """
+        Download the file (to a temporary file by default) and memory-map it
+        read-only.
+
+        Return
+        ------
+        (mmap.mmap): the mapped file
+        """
+        if filepath is None:
+            fd, filepath = tempfile.mkstemp(suffix="_" + self.filename)
+            os.close(fd)
+        self.download(filepath, resume=resume)
+        with open(filepath, "rb") as fio:
+            return mmap.mmap(fio.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def release(self):
+        """
+        Queue the release of the file on the server.
+        """
+        if getattr(self, "_released", True):
+            return
+        RELEASE_QUEUE.release_download(self._server_uri, self.file_id)
+        self._released = True
+
+    def __del__(self):
+        self.release()
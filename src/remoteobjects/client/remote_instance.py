@@ -1,6 +1,10 @@
-from .remote_object import RemoteObject
+from .remote_object import RemoteObject, RemoteObjectError
 from .rest_client import RestClient
+from .release_queue import RELEASE_QUEUE
+from .lease_renewer import LEASE_RENEWER
+from ..codecs import CodecJSONEncoder, CodecJSONDecoder
 import json
+import uuid
 
 
 class RequiredParameter(object):
@@ -16,9 +20,10 @@ class RemoteInstance(RemoteObject):
         delete_remote_on_del=True,
         remote_object_id=None,
         allowed_upload_extension_regex=r".*",
-        jsonEncoder=json.JSONEncoder,
-        jsonDecoder=json.JSONDecoder,
+        jsonEncoder=CodecJSONEncoder,
+        jsonDecoder=CodecJSONDecoder,
     ):
+        lease_ttl = None
         if remote_object_id is None:
             # Register a new instance
             for (key, value) in init_args_dict.items():
@@ -41,6 +46,15 @@ class RemoteInstance(RemoteObject):
             if registration_response.status_code != 200:
                 raise RuntimeError(registration_response_json)
             remote_object_id = registration_response_json["id"]
+            lease_ttl = registration_response_json.get("lease_ttl", None)
+        else:
+            # an attached proxy holds the object's lease too, renewing it to
+            # learn the server's lease TTL
+            lease_response = RestClient(server_uri)._put(
+                "remoteobjects/lease", data={"object_ids": [remote_object_id]}
+            )
+            if lease_response.status_code == 200:
+                lease_ttl = lease_response.json().get("lease_ttl", None)
 
         super().__init__(
             server_uri,
@@ -51,22 +65,130 @@ class RemoteInstance(RemoteObject):
             confirm_server_version=True,
         )
         self._del_remote = delete_remote_on_del
+        if lease_ttl is not None:
+            self._hold_lease(lease_ttl)
 
     def _manage_CRUD_request(
-        self, request_func, endpoint, data=None, params={}, files=None
+        self,
+        request_func,
+        endpoint,
+        data=None,
+        params={},
+        files=None,
+        stream=False,
+        timeout=None,
     ):
         if "object_id" not in params and hasattr(self, "_remote_object_id"):
-            params["object_id"] = self._remote_object_id
+            # a copy, as the default `params` is shared by every call
+            params = dict(params, object_id=self._remote_object_id)
         return super()._manage_CRUD_request(
-            request_func, endpoint, data=data, params=params, files=files
+            request_func,
+            endpoint,
+            data=data,
+            params=params,
+            files=files,
+            stream=stream,
+            timeout=timeout,
         )
 
     def __del__(self):
-        self._delete_files_uploaded()
+        super().__del__()
         if hasattr(self, "_del_remote") and self._del_remote:
-            self._delete(
-                "remoteobjects/registry", params={"object_id": self._remote_object_id}
+            RELEASE_QUEUE.release_object(self._server_uri, self._remote_object_id)
+
+    @classmethod
+    def broadcast(
+        cls,
+        func_name,
+        remote_objects=None,
+        args=None,
+        per_object_args=None,
+        attribute_path=None,
+        server_uri=None,
+        jsonEncoder=CodecJSONEncoder,
+        jsonDecoder=CodecJSONDecoder,
+        timeout=None,
+    ):
+        """
+        Call the same method of many remote objects in one request, which the
+        server executes in parallel. The calls of objects that migrated to
+        another server are sent there.
+
+        :remote_objects list|None: remote objects (or their IDs), otherwise
+            all of the server's objects of this class
+        :args dict|None: the arguments shared by all calls
+        :per_object_args dict|None: {remote object (or ID): arguments}
+            updating the shared arguments of that object's call
+        :timeout float|None: seconds after which each call still waiting on
+            its object is dropped, its result being a RemoteObjectError
+
+        Return
+        ------
+        (dict): {object_id: return | RemoteObjectError}
+        """
+        data = {
+            "func_name": func_name,
+            "args": args if args is not None else {},
+            "per_object_args": {
+                getattr(remote_object, "_remote_object_id", remote_object): obj_args
+                for (remote_object, obj_args) in (
+                    per_object_args if per_object_args is not None else {}
+                ).items()
+            },
+        }
+        if remote_objects is None:
+            data["class_key"] = cls._class_key
+        else:
+            data["object_ids"] = [
+                getattr(remote_object, "_remote_object_id", remote_object)
+                for remote_object in remote_objects
+            ]
+        if attribute_path is not None:
+            data["attribute_path"] = attribute_path
+        if timeout is not None:
+            data["timeout"] = timeout
+            data["call_ids"] = {
+                object_id: uuid.uuid4().hex for object_id in data.get("object_ids", [])
+            }
+
+        results = {}
+        pending = [
+            (server_uri if server_uri is not None else cls._default_server_uri, data, 0)
+        ]
+        while len(pending) > 0:
+            (server_uri, data, moves) = pending.pop(0)
+            client = RestClient(
+                server_uri,
+                jsonEncoder=jsonEncoder,
+                jsonDecoder=jsonDecoder,
             )
+            response = client._post("remoteobjects/broadcast", data=data)
+            response_json = json.loads(response.content, cls=jsonDecoder)
+            if response.status_code != 200:
+                raise RemoteObjectError(
+                    response_json["error"],
+                    response_json["message"],
+                    response_json["traceback"],
+                )
+            moved = {}  # {server_uri: [object_id]}
+            for (object_id, result) in response_json["results"].items():
+                if "moved_to" in result and moves < cls._remobj_max_moves:
+                    moved.setdefault(result["moved_to"], []).append(object_id)
+                    continue
+                RemoteObject._emit_logs(result)
+                if "error" in result:
+                    results[object_id] = RemoteObjectError(
+                        result["error"], result["message"], result["traceback"]
+                    )
+                else:
+                    results[object_id] = result["return"]
+            for (moved_to, object_ids) in moved.items():
+                moved_data = {
+                    key: value for (key, value) in data.items() if key != "class_key"
+                }
+                moved_data["object_ids"] = object_ids
+                pending.append((moved_to, moved_data, moves + 1))
+        return results
 
     def _set_id(self, new_id):
         response = self._patch(
@@ -79,4 +201,27 @@ class RemoteInstance(RemoteObject):
         response_json = json.loads(response.content, cls=self.jsonDecoder)
         if response.status_code != 200:
             raise RuntimeError(response_json)
+        lease_ttl = self._lease_ttl
+        self._drop_lease()
         self._remote_object_id = response_json["id"]
+        self._method_handles = {}
+        if lease_ttl is not None:
+            self._hold_lease(lease_ttl)
+
+    def _migrate(self, server_uri):
+        """
+        Move the remote object to the server at `server_uri` (see
+        `remoteobjects.server.endpoints.RemoteObjectEndpoint_Migrate`), which
+        every proxy of the object then follows.
+        """
+        response = self._post(
+            "remoteobjects/migrate",
+            params={
+                "object_id": self._remote_object_id,
+                "server_uri": server_uri,
+            },
+        )
+        response_json = json.loads(response.content, cls=self.jsonDecoder)
+        if response.status_code != 200:
+            raise RuntimeError(response_json)
+        self._follow_move(server_uri)
@@ -0,0 +1,82 @@
+import json
+import threading
+
+from .define_remote_class import _remote_class
+from .remote_object import RemoteObject
+from .rest_client import RestClient
+
+
+class RemoteModule(object):
+    """
+    A module-like namespace of the classes a server offers, each defined (as
+    by `defineRemoteClass`) when it is first accessed, and cached thereafter:
+
+        remote = connect("http://localhost:6000")
+        dummy = remote.Dummy(dumbness="Lazy")  # an instance of DummyRemote
+
+    so a client only fetches the signatures of the classes it uses.
+    """
+
+    def __init__(
+        self,
+        server_uri,
+        delete_remote_on_del=True,
+        allowed_upload_extension_regex=r".*",
+        attribute_depth_allowance=0,
+    ):
+        self._server_uri = server_uri
+        self._class_kwargs = {
+            "delete_remote_on_del": delete_remote_on_del,
+            "allowed_upload_extension_regex": allowed_upload_extension_regex,
+            "attribute_depth_allowance": attribute_depth_allowance,
+        }
+        self._classes = {}  # {class_key: {class_key}Remote}
+        self._class_keys = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, class_key):
+        # only reached for names that are not attributes of the module
+        if class_key.startswith("_"):
+            raise AttributeError(
+                f"'{self.__class__.__name__}' object has no attribute '{class_key}'"
+            )
+        remote_class = self._classes.get(class_key, None)
+        if remote_class is not None:
+            return remote_class
+        with self._lock:
+            if class_key not in self._classes:
+                try:
+                    self._classes[class_key] = _remote_class(
+                        class_key, self._server_uri, **self._class_kwargs
+                    )
+                except RuntimeError as err:
+                    raise AttributeError(
+                        f"Server `{self._server_uri}` offers no class `{class_key}`."
+                    ) from err
+            return self._classes[class_key]
+
+    def __dir__(self):
+        return list(super().__dir__()) + self._list_class_keys()
+
+    def _list_class_keys(self):
+        if self._class_keys is None:
+            response = RestClient(self._server_uri)._get("remoteobjects/registry")
+            if response.status_code != 200:
+                raise RuntimeError(response.json())
+            self._class_keys = json.loads(response.content)["class_keys"]
+        return self._class_keys
+
+    def __repr__(self):
+        return f"<RemoteModule of '{self._server_uri}'>"
+
+
+def connect(server_uri, confirm_server_version=True, **kwargs):
+    """
+    Return
+    ------
+    (RemoteModule): the classes offered by the server, defined lazily. See
+        RemoteModule for the keyword arguments.
+    """
+    if confirm_server_version:
+        RemoteObject._confirm_server_version(server_uri)
+    return RemoteModule(server_uri, **kwargs)
@@ -1,11 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
 import types
 from os import path
 import re
 import requests
 import json
+import threading
+import uuid
 
 from .rest_client import RestClient
+from .release_queue import RELEASE_QUEUE
+from .lease_renewer import LEASE_RENEWER
 from .. import __VERSION__
+from ..single_flight import SingleFlight
+from .transaction import Transaction, _active_transaction
+from ..codecs import CODECS, CodecJSONEncoder, CodecJSONDecoder
+
+
+# namespaces this process's uploads on servers
+CLIENT_ID = uuid.uuid4().hex
 
 
 class RemoteObjectError(RuntimeError):
@@ -19,14 +31,25 @@ class RemoteObjectError(RuntimeError):
         return f"\nRemote Traceback:\n{self.traceback}{self.message}"
 
 
+# the reads in flight of the process's proxies, shared by identical reads
+READ_FLIGHTS = SingleFlight()
+
+
 class RemoteObject(RestClient):
+    # the redirects followed by a request, to an object that has migrated
+    _remobj_max_moves = 4
+    # the names of read-only methods, whose identical concurrent calls (from
+    # any of the process's proxies of the object) share one request, as reads
+    # of the same attribute do. Set on the class, or on an instance.
+    _remobj_coalesced_methods = frozenset()
+
     def __init__(
         self,
         server_uri,
         remote_object_id,
         allowed_upload_extension_regex=r".*",
-        jsonEncoder=json.JSONEncoder,
-        jsonDecoder=json.JSONDecoder,
+        jsonEncoder=CodecJSONEncoder,
+        jsonDecoder=CodecJSONDecoder,
         confirm_server_version=False,
     ):
         if confirm_server_version:
@@ -34,14 +57,18 @@ class RemoteObject(RestClient):
         super().__init__(server_uri, jsonEncoder=jsonEncoder, jsonDecoder=jsonDecoder)
         self._allowed_extension_regex = allowed_upload_extension_regex
         self._remote_object_id = remote_object_id
+        self._lease_ttl = None
         self.files_uploaded = {}
+        # serialises the calls with file arguments, as the server replaces
+        # the previous upload of each file_key
+        self._upload_lock = threading.RLock()
+        # {func_name: handle_id} of the server-resolved methods
+        self._method_handles = {}
 
     @staticmethod
-    def _confirm_server_version(server_uri, jsonDecoder=json.JSONDecoder):
+    def _confirm_server_version(server_uri, jsonDecoder=CodecJSONDecoder):
         version_response = json.loads(
-            requests.get(
-                server_uri + "/remoteobjects/version",
-            ).content,
+            RestClient(server_uri)._get("remoteobjects/version").content,
             cls=jsonDecoder,
         )["response"]
         if version_response != __VERSION__:
@@ -50,8 +77,21 @@ class RemoteObject(RestClient):
             )
 
     def _manage_CRUD_request(
-        self, request_func, endpoint, data=None, params={}, files=None
+        self,
+        request_func,
+        endpoint,
+        data=None,
+        params={},
+        files=None,
+        stream=False,
+        timeout=None,
     ):
+        if timeout is None:
+            timeout = self._remobj_timeout
+        if timeout is not None and "call_id" in params and params["call_id"] is None:
+            # a call that may time out, which the server is told of by its id
+            # if it is given up on (see `_cancel_call`)
+            params = dict(params, call_id=uuid.uuid4().hex, timeout=timeout)
         files_uploaded = {}
         # manage uploading data filepath values
         if data is not None and isinstance(data, dict):
@@ -67,34 +107,142 @@ class RemoteObject(RestClient):
                 ):
                     files_uploaded[data_arg] = open(data_arg_val, "rb")
 
+        transaction = _active_transaction(
+            self._server_uri, params.get("object_id", None)
+        )
+        if transaction is not None:
+            if len(files_uploaded) > 0:
+                for file in files_uploaded.values():
+                    file.close()
+                raise RuntimeError("Calls with file arguments cannot be buffered.")
+            buffered = transaction._buffer(request_func, endpoint, data, params, stream)
+            if buffered is not None:
+                return buffered
+
+        group = (self._server_uri, params.get("object_id", None))
         if len(files_uploaded) > 0:
-            upload_response = super()._manage_CRUD_request(
-                requests.put, "remoteobjects/upload", files=files_uploaded
-            )
-            if upload_response.status_code != 200:
-                raise RuntimeError(f"Failed to upload file arguments: {files_uploaded}")
-            upload_response_json = json.loads(
-                upload_response.content, cls=self.jsonDecoder
-            )
-            for data_arg, data_arg_filepath in upload_response_json[
-                "files_uploaded"
-            ].items():
-                files_uploaded[data_arg].close()
-                # update filepath arg_val to the server-local filepath returned
-                data[data_arg] = data_arg_filepath
-
-            self._delete_files_uploaded(
+            READ_FLIGHTS.forget(group)
+            try:
+                with self._upload_lock:
+                    self._upload_files(data, files_uploaded)
+                    return self._manage_fileless_request(
+                        request_func,
+                        endpoint,
+                        data,
+                        params,
+                        stream=stream,
+                        timeout=timeout,
+                    )
+            finally:
+                READ_FLIGHTS.forget(group)
+        key = self._coalescing_key(request_func, endpoint, data, params, stream)
+        if key is None:
+            if request_func is requests.get:
+                return self._manage_fileless_request(
+                    request_func, endpoint, data, params, stream=stream, timeout=timeout
+                )
+            # a possible write, after which reads do not share earlier ones:
+            # neither those in flight as it is sent, nor those started while
+            # it was in flight (which the server may have served before it)
+            READ_FLIGHTS.forget(group)
+            try:
+                return self._manage_fileless_request(
+                    request_func, endpoint, data, params, stream=stream, timeout=timeout
+                )
+            finally:
+                READ_FLIGHTS.forget(group)
+        return READ_FLIGHTS.do(
+            key,
+            lambda: self._manage_fileless_request(
+                request_func, endpoint, data, params, stream=stream, timeout=timeout
+            ),
+            group,
+        )[0]
+
+    def _coalescing_key(self, request_func, endpoint, data, params, stream):
+        # the key of a read that may share the response of an identical read
+        if stream or endpoint != "remoteobjects/registry":
+            return None
+        if request_func is requests.get:
+            if "class_key" in params:
+                return None  # a registration
+        elif (
+            request_func is not requests.post
+            or params.get("func_name", None) not in self._remobj_coalesced_methods
+        ):
+            return None
+        try:
+            return json.dumps(
                 [
-                    file_key_dupe
-                    for file_key_dupe in files_uploaded.keys()
-                    if file_key_dupe in self.files_uploaded
-                ]
+                    request_func.__name__,
+                    {
+                        key: value
+                        for (key, value) in params.items()
+                        if key not in ["call_id", "handle"]
+                    },
+                    data,
+                ],
+                sort_keys=True,
+                cls=self.jsonEncoder,
             )
-            self.files_uploaded.update(files_uploaded)
+        except (TypeError, ValueError):
+            return None
 
-        fileless_response = super()._manage_CRUD_request(
-            request_func, endpoint, data, params
+    def _upload_files(self, data, files_uploaded):
+        upload_response = super()._manage_CRUD_request(
+            requests.put,
+            "remoteobjects/upload",
+            params=self._upload_namespace(),
+            files=files_uploaded,
         )
+        if upload_response.status_code != 200:
+            raise RuntimeError(f"Failed to upload file arguments: {files_uploaded}")
+        upload_response_json = json.loads(upload_response.content, cls=self.jsonDecoder)
+        for data_arg, data_arg_filepath in upload_response_json[
+            "files_uploaded"
+        ].items():
+            files_uploaded[data_arg].close()
+            # update filepath arg_val to the server-local filepath returned
+            data[data_arg] = data_arg_filepath
+
+        # the server replaces the previous upload of each file_key
+        self.files_uploaded.update(files_uploaded)
+
+    def _manage_fileless_request(
+        self, request_func, endpoint, data, params, stream=False, timeout=None
+    ):
+        try:
+            fileless_response = super()._manage_CRUD_request(
+                request_func, endpoint, data, params, stream=stream, timeout=timeout
+            )
+            if (
+                fileless_response.status_code == 410
+                and params.get("handle") is not None
+            ):
+                # the method handle is stale, so call by path (resolving anew)
+                self._method_handles.pop(params.get("func_name"), None)
+                params = dict(params, handle=None)
+                fileless_response = super()._manage_CRUD_request(
+                    request_func, endpoint, data, params, stream=stream, timeout=timeout
+                )
+            moves = 0
+            while (
+                fileless_response.status_code == 421 and moves < self._remobj_max_moves
+            ):
+                # the object migrated to another server, so follow it there
+                moved_to = json.loads(fileless_response.content).get("moved_to")
+                if moved_to is None:
+                    break
+                self._follow_move(moved_to)
+                params = dict(params, handle=None) if "handle" in params else params
+                fileless_response = super()._manage_CRUD_request(
+                    request_func, endpoint, data, params, stream=stream, timeout=timeout
+                )
+                moves += 1
+        except requests.exceptions.Timeout:
+            if params.get("call_id") is not None:
+                self._cancel_call(params["call_id"], timeout)
+            raise
 
         if fileless_response.status_code != 200:
             resp_json = json.loads(fileless_response.content, cls=self.jsonDecoder)
@@ -106,33 +254,112 @@ class RemoteObject(RestClient):
             )
         return fileless_response
 
+    def _follow_move(self, server_uri):
+        # the server-side state of the proxy (its method handles, uploaded
+        # files and lease) is that of the object's previous server
+        lease_ttl = self._lease_ttl
+        self._drop_lease()
+        self._server_uri = server_uri
+        self._method_handles = {}
+        self.files_uploaded = {}
+        if lease_ttl is not None:
+            self._hold_lease(lease_ttl)
+
+    def _cancel_call(self, call_id, timeout=None):
+        """
+        Tell the server that the call was given up on, so that it is dropped
+        if it is still waiting on the object, or else its cancellation token
+        is cancelled (see `remoteobjects.server.cancellation_token`).
+        """
+        try:
+            RestClient(self._server_uri)._post(
+                "remoteobjects/cancel", {"call_ids": [call_id]}, timeout=timeout
+            )
+        except (requests.exceptions.RequestException, ConnectionError):
+            pass  # the server will drop the call at its deadline regardless
+
     def __del__(self):
-        self._delete_files_uploaded()
+        self._release_files_uploaded()
+        self._drop_lease()
+
+    def map(self, method_name, iterable_of_kwargs, max_workers=None):
+        """
+        Call the remote method once with each kwargs dict of the iterable, in
+        parallel over the connections shared with the server. A proxy may be
+        called from many threads at once.
+
+        Return
+        ------
+        (list): the returns, in the order of the iterable
+        """
+        method = getattr(self, method_name)
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="remoteobjects_map"
+        ) as executor:
+            return list(
+                executor.map(lambda kwargs: method(**kwargs), iterable_of_kwargs)
+            )
+
+    def transaction(self):
+        """
+        Return
+        ------
+        (Transaction): the context in which the object's attribute sets and
+            method calls are buffered, to be applied atomically on exit
+        """
+        return Transaction(self)
+
+    def _hold_lease(self, lease_ttl):
+        # keep the remote object's lease renewed for the life of this proxy
+        self._lease_ttl = lease_ttl
+        LEASE_RENEWER.hold(self._server_uri, self._remote_object_id, lease_ttl)
+
+    def _drop_lease(self):
+        if getattr(self, "_lease_ttl", None) is None:
+            return
+        LEASE_RENEWER.drop(self._server_uri, self._remote_object_id)
+        self._lease_ttl = None
+
+    def _release_files_uploaded(self):
+        # queue the deletion, instead of blocking garbage collection on it
+        if not hasattr(self, "files_uploaded") or len(self.files_uploaded) == 0:
+            return
+        files_uploaded, self.files_uploaded = self.files_uploaded, {}
+        RELEASE_QUEUE.release_files(
+            self._server_uri, self._upload_namespace(), files_uploaded.keys()
+        )
+
+    def _upload_namespace(self):
+        return {"client_id": CLIENT_ID, "object_id": self._remote_object_id}
 
     def _delete_files_uploaded(self, file_keys=None):
         if not hasattr(self, "files_uploaded"):
             return
 
-        if file_keys is None:
-            file_keys = list(self.files_uploaded.keys())
+        with self._upload_lock:
+            if file_keys is None:
+                file_keys = list(self.files_uploaded.keys())
 
-        if len(file_keys) > 0:
-            upload_response = super()._delete(
-                "remoteobjects/upload", data={"file_keys": file_keys}
-            )
-            if upload_response.status_code != 200:
-                raise RuntimeError((f"Failed to delete uploaded {file_keys}"))
-            for file_key in file_keys:
-                self.files_uploaded.pop(file_key)
+            if len(file_keys) > 0:
+                upload_response = super()._delete(
+                    "remoteobjects/upload",
+                    data={"file_keys": file_keys},
+                    params=self._upload_namespace(),
+                )
+                if upload_response.status_code != 200:
+                    raise RuntimeError((f"Failed to delete uploaded {file_keys}"))
+                for file_key in file_keys:
+                    self.files_uploaded.pop(file_key)
 
+    @staticmethod
     def _define_remote_function_loc(
-        self,
         func_name: str,
         parameters: dict,
         remote_root_object_id: str,
         attribute_absolute_path: str = None,
         crud_operation: str = "post",
         crud_endpoint: str = ("remoteobjects/" "registry"),
+        return_annotation: str = None,
     ):
         kwargs_param_present = False
         if len(parameters) > 0:
@@ -145,16 +372,23 @@ class RemoteObject(RestClient):
             param_dict["code_string"] for param_dict in parameters.values()
         ]
 
+        remobj_params = [
+            "remobj_capture_logs = None",
+            "remobj_stream = False",
+            "remobj_return_handle = False",
+            "remobj_timeout = None",
+        ]
         if kwargs_param_present:
-            signature_params.insert(-1, "remobj_capture_logs = None")
+            signature_params[-1:-1] = remobj_params
         else:
-            signature_params.append("remobj_capture_logs = None")
+            signature_params += remobj_params
         signature_params.insert(0, "self")
 
         loc = [
-            "def {}({}):".format(
+            "def {}({}){}:".format(
                 func_name,
                 ",".join(signature_params),
+                "" if return_annotation is None else f" -> {return_annotation}",
             ),
             "\targs = {",
             *[
@@ -172,26 +406,116 @@ class RemoteObject(RestClient):
             f"\tresp = self._{crud_operation}(",
             f"\t\t'{crud_endpoint}',",
             "\t\tparams = {",
-            f"\t\t\t'object_id': '{remote_root_object_id}',",
+            # the id of the proxy, if not given
+            "\t\t\t'object_id': {},".format(
+                "self._remote_object_id"
+                if remote_root_object_id is None
+                else f"'{remote_root_object_id}'"
+            ),
         ]
         if attribute_absolute_path is not None:
             loc.append(f"\t\t\t'attribute_path': '{attribute_absolute_path}',")
         loc += [
             f"\t\t\t'func_name': '{func_name}',",
+            "\t\t\t'stream': remobj_stream,",
+            "\t\t\t'return_handle': remobj_return_handle,",
+            f"\t\t\t'handle': self._method_handles.get('{func_name}'),",
+            "\t\t\t'resolve_handle': True,",
+            # given with the timeout, defaulting to `_remobj_timeout`
+            "\t\t\t'call_id': None,",
+            "\t\t\t'timeout': remobj_timeout,",
             "\t\t},",
             "\t\tdata = args,",
+            "\t\tstream = remobj_stream,",
+            "\t\ttimeout = remobj_timeout,",
             "\t)",
+            "\tif remobj_stream:",
+            "\t\treturn self._iter_streamed_return(resp, remobj_capture_logs)",
             "\tresp_json = json.loads(resp.content, cls=self.jsonDecoder)",
-            "\tif 'logs' in resp_json and resp_json['logs'] is not None and len(resp_json['logs']) > 0:",
-            "\t\tif remobj_capture_logs is None:",
-            "\t\t\tprint(resp_json['logs'], end='')",
-            "\t\telif isinstance(remobj_capture_logs, list):",
-            "\t\t\tremobj_capture_logs.append(resp_json['logs'])",
-            "\treturn resp_json['return']",
+            "\tif 'handle' in resp_json:",
+            f"\t\tself._method_handles['{func_name}'] = resp_json['handle']",
+            "\tself._emit_logs(resp_json, remobj_capture_logs)",
+            "\treturn self._method_return(resp_json)",
             "",
         ]
         return loc
 
+    def _method_return(self, resp_json):
+        if "return_handle" in resp_json:
+            return self._remote_handle(resp_json["return_handle"])
+        if "return_file" in resp_json:
+            from .remote_file import RemoteFile
+
+            return RemoteFile(
+                self._server_uri,
+                resp_json["return_file"]["id"],
+                resp_json["return_file"]["filename"],
+                resp_json["return_file"]["size"],
+                etag=resp_json["return_file"].get("etag", None),
+                jsonEncoder=self.jsonEncoder,
+                jsonDecoder=self.jsonDecoder,
+            )
+        return resp_json["return"]
+
+    def _remote_handle(self, handle):
+        """
+        Proxy a method's return that the server registered as an object of its
+        own. The proxy's signature is only fetched when it is first accessed,
+        and the object remains registered on the server until it is
+        deregistered, or its lease lapses after the last proxy holding it is
+        collected.
+        """
+        from .remote_attribute import RemoteAttribute
+
+        remote_handle = RemoteAttribute(
+            self._server_uri,
+            handle["id"],
+            None,
+            handle["object_str"],
+            {},
+            self._allowed_extension_regex,
+            attribute_depth_allowance=-1,
+            jsonEncoder=self.jsonEncoder,
+            jsonDecoder=self.jsonDecoder,
+        )
+        if handle.get("lease_ttl", None) is not None:
+            remote_handle._hold_lease(handle["lease_ttl"])
+        return remote_handle
+
+    @staticmethod
+    def _emit_logs(resp_json, remobj_capture_logs=None):
+        if (
+            "logs" in resp_json
+            and resp_json["logs"] is not None
+            and len(resp_json["logs"]) > 0
+        ):
+            if remobj_capture_logs is None:
+                print(resp_json["logs"], end="")
+            elif isinstance(remobj_capture_logs, list):
+                remobj_capture_logs.append(resp_json["logs"])
+
+    def _iter_streamed_return(self, response, remobj_capture_logs=None):
+        """
+        Lazily yield the values of a streamed method return, decoding one
+        newline-delimited record at a time. The remote object remains locked
+        until the stream is exhausted or this generator is closed.
+        """
+        try:
+            for line in response.iter_lines():
+                if len(line) == 0:
+                    continue
+                record = json.loads(line, cls=self.jsonDecoder)
+                if "value" in record:
+                    yield record["value"]
+                elif "error" in record:
+                    raise RemoteObjectError(
+                        record["error"], record["message"], record["traceback"]
+                    )
+                else:
+                    self._emit_logs(record, remobj_capture_logs)
+        finally:
+            response.close()
+
     def _add_method_loc(self, func_name, func_loc):
         func_code = "\n".join(func_loc)
         local_env_dict = {}
@@ -212,7 +536,9 @@ class RemoteObject(RestClient):
         return json.loads(response.content, cls=self.jsonDecoder)["value"]
 
     def _set_attribute(self, attribute_absolute_path, value):
-        if value.__class__.__module__ != "builtins":
+        if value.__class__.__module__ != "builtins" and not CODECS.encodes(
+            value.__class__
+        ):
             raise RuntimeError(
                 f"Cannot set remote attribute `{attribute_absolute_path}` to"
                 + f" non-primitive value {value} <{value.__class__}>."
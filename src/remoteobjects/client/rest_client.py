@@ -1,10 +1,54 @@
+import functools
+import random
 import requests
 import json
+import threading
+import time
+
+from .socket_transport import SocketTransport
+from ..codecs import CodecJSONEncoder, CodecJSONDecoder
 
 
 class RestClient(object):
+    # requests rejected by a busy server (with a `_remobj_retry_statuses`
+    # status) are retried up to `_remobj_max_retries` times, after the
+    # server's Retry-After hint, or else after a jittered backoff, doubling
+    # from `_remobj_retry_backoff` seconds up to `_remobj_retry_backoff_max`.
+    # Set on the class, or on an instance. The `_remobj_` prefix reserves the
+    # names of the client's settings, which the properties of a proxy's
+    # remote attributes (see `RemoteObject._add_property`) would otherwise
+    # shadow.
+    _remobj_retry_statuses = (429, 503)
+    _remobj_max_retries = 3
+    _remobj_retry_backoff = 0.1
+    _remobj_retry_backoff_max = 10.0
+    # the seconds to wait for a response, or None to wait indefinitely
+    _remobj_timeout = None
+    # the HTTP connections kept alive to each server, shared by its clients
+    _remobj_pool_maxsize = 32
+
+    _sessions = {}  # {server_uri: requests.Session}
+    _sessions_lock = threading.Lock()
+
+    @classmethod
+    def _session(cls, server_uri):
+        session = cls._sessions.get(server_uri)
+        if session is not None:
+            return session
+        with cls._sessions_lock:
+            session = cls._sessions.get(server_uri)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=cls._remobj_pool_maxsize
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._sessions[server_uri] = session
+            return session
+
     def __init__(
-        self, server_uri, jsonEncoder=json.JSONEncoder, jsonDecoder=json.JSONDecoder
+        self, server_uri, jsonEncoder=CodecJSONEncoder, jsonDecoder=CodecJSONDecoder
     ):
         self._server_uri = server_uri
         self.jsonEncoder = jsonEncoder
@@ -12,7 +56,7 @@ class RestClient(object):
 
     @staticmethod
     def _content_type(
-        data, jsonEncoder=json.JSONEncoder
+        data, jsonEncoder=CodecJSONEncoder
     ):  # returns converted data, {"Content-Type": }
         if isinstance(data, dict):
             return json.dumps(data, cls=jsonEncoder), {
@@ -26,32 +70,111 @@ class RestClient(object):
         }
 
     def _manage_CRUD_request(
-        self, request_func, endpoint, data=None, params={}, files=None
+        self,
+        request_func,
+        endpoint,
+        data=None,
+        params={},
+        files=None,
+        stream=False,
+        headers=None,
+        timeout=None,
     ):
         uri = self._server_uri + "/" + endpoint
+        if timeout is None:
+            timeout = self._remobj_timeout
+        if self._server_uri.split("://", 1)[0] in SocketTransport.SCHEMES:
+            # the same request, over the server's persistent socket connection
+            request_func = functools.partial(
+                SocketTransport.for_uri(self._server_uri).request,
+                request_func.__name__,
+            )
+        else:
+            # over the server's pool of kept-alive connections
+            request_func = functools.partial(
+                self._session(self._server_uri).request, request_func.__name__
+            )
 
         if data is None and files is None:
-            response = request_func(url=uri, params=params)
+            request_kwargs = dict(params=params, headers=headers)
         elif data is not None and (files is None or len(files) == 0):
             reqdata, header = self._content_type(data, self.jsonEncoder)
+            if headers is not None:
+                header.update(headers)
+            request_kwargs = dict(params=params, data=reqdata, headers=header)
+        else:  # data and files
+            # files are read by the request, so cannot be retried
+            return request_func(
+                url=uri,
+                params=params,
+                data=data,
+                files=files,
+                headers=headers,
+                stream=stream,
+                timeout=timeout,
+            )
+
+        attempt = 0
+        while True:
             response = request_func(
-                url=uri, params=params, data=reqdata, headers=header
+                url=uri, stream=stream, timeout=timeout, **request_kwargs
             )
-        else:  # data and files
-            response = request_func(url=uri, params=params, data=data, files=files)
-        return response
+            if (
+                response.status_code not in self._remobj_retry_statuses
+                or attempt >= self._remobj_max_retries
+            ):
+                return response
+            response.close()
+            time.sleep(self._retry_delay(attempt, response))
+            attempt += 1
 
-    def _delete(self, endpoint, data=None, params={}):
-        return self._manage_CRUD_request(requests.delete, endpoint, data, params)
+    def _retry_delay(self, attempt, response):
+        retry_after = response.headers.get("Retry-After", None)
+        try:
+            return float(retry_after) * random.uniform(1.0, 1.5)
+        except (TypeError, ValueError):
+            # "full jitter", so that rejected clients do not retry in step
+            return random.uniform(
+                0,
+                min(
+                    self._remobj_retry_backoff_max,
+                    self._remobj_retry_backoff * 2**attempt,
+                ),
+            )
 
-    def _get(self, endpoint, data=None, params={}):
-        return self._manage_CRUD_request(requests.get, endpoint, data, params)
+    def _delete(self, endpoint, data=None, params={}, stream=False, timeout=None):
+        return self._manage_CRUD_request(
+            requests.delete, endpoint, data, params, stream=stream, timeout=timeout
+        )
 
-    def _patch(self, endpoint, data=None, params={}, files=None):
-        return self._manage_CRUD_request(requests.patch, endpoint, data, params, files)
+    def _get(self, endpoint, data=None, params={}, stream=False, timeout=None):
+        return self._manage_CRUD_request(
+            requests.get, endpoint, data, params, stream=stream, timeout=timeout
+        )
 
-    def _post(self, endpoint, data=None, params={}, files=None):
-        return self._manage_CRUD_request(requests.post, endpoint, data, params, files)
+    def _patch(
+        self, endpoint, data=None, params={}, files=None, stream=False, timeout=None
+    ):
+        return self._manage_CRUD_request(
+            requests.patch,
+            endpoint,
+            data,
+            params,
+            files,
+            stream=stream,
+            timeout=timeout,
+        )
 
-    def _put(self, endpoint, data=None, params={}, files=None):
-        return self._manage_CRUD_request(requests.put, endpoint, data, params, files)
+    def _post(
+        self, endpoint, data=None, params={}, files=None, stream=False, timeout=None
+    ):
+        return self._manage_CRUD_request(
+            requests.post, endpoint, data, params, files, stream=stream, timeout=timeout
+        )
+
+    def _put(
+        self, endpoint, data=None, params={}, files=None, stream=False, timeout=None
+    ):
+        return self._manage_CRUD_request(
+            requests.put, endpoint, data, params, files, stream=stream, timeout=timeout
+        )
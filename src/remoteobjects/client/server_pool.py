@@ -0,0 +1,250 @@
+import hashlib
+import json
+import threading
+import time
+
+import requests
+
+from .define_remote_class import _remote_class
+from .rest_client import RestClient
+
+
+def _is_unreachable(err):
+    # the failures to connect, of `requests` and of the socket transports
+    if isinstance(err, requests.exceptions.ConnectionError):
+        return True
+    return isinstance(err, OSError) and not isinstance(
+        err, requests.exceptions.RequestException
+    )
+
+
+class ServerPool(object):
+    """
+    The classes offered by several identical servers, among which their
+    objects are distributed:
+
+        pool = ServerPool(["http://host0:6000", "http://host1:6000"])
+        dummy = pool.Dummy(dumbness="Shared")  # registered on one of them
+
+    Each new object is registered on the least-loaded server (by the
+    `/remoteobjects/stats` of the servers, polled at most every `stats_ttl`
+    seconds), or, with `placement="hashed"`, on the server its
+    `remobj_placement_key` (by default, its class and arguments) hashes to.
+    A proxy then routes all of its calls to the server of its object. A
+    server that is unreachable is passed over for `down_ttl` seconds, and
+    its registrations fail over to the other servers.
+    """
+
+    PLACEMENTS = ["least_loaded", "hashed"]
+
+    def __init__(
+        self,
+        server_uris,
+        placement="least_loaded",
+        stats_ttl=1.0,
+        stats_timeout=1.0,
+        down_ttl=10.0,
+        delete_remote_on_del=True,
+        allowed_upload_extension_regex=r".*",
+        attribute_depth_allowance=0,
+    ):
+        if placement not in self.PLACEMENTS:
+            raise ValueError(f"`placement` must be one of {self.PLACEMENTS}.")
+        if len(server_uris) == 0:
+            raise ValueError("A ServerPool needs at least one server.")
+        self._server_uris = list(server_uris)
+        self.placement = placement
+        self.stats_ttl = stats_ttl
+        self.stats_timeout = stats_timeout
+        self.down_ttl = down_ttl
+        self._class_kwargs = {
+            "delete_remote_on_del": delete_remote_on_del,
+            "allowed_upload_extension_regex": allowed_upload_extension_regex,
+            "attribute_depth_allowance": attribute_depth_allowance,
+        }
+        self._lock = threading.Lock()
+        self._classes = {}  # {class_key: pooled {class_key}Remote}
+        self._stats = {}  # {server_uri: (time.monotonic() of poll, stats)}
+        self._down_until = {}  # {server_uri: time.monotonic()}
+        self._locations = {}  # {object_id: server_uri} of the objects placed
+
+    def _mark_down(self, server_uri):
+        with self._lock:
+            self._down_until[server_uri] = time.monotonic() + self.down_ttl
+            self._stats.pop(server_uri, None)
+
+    def _available(self):
+        now = time.monotonic()
+        available = [
+            server_uri
+            for server_uri in self._server_uris
+            if self._down_until.get(server_uri, 0) <= now
+        ]
+        # with every server down, try them all rather than none
+        return available if len(available) > 0 else list(self._server_uris)
+
+    def stats(self, server_uri):
+        """
+        Return
+        ------
+        (dict): the server's `/remoteobjects/stats`, at most `stats_ttl`
+            seconds old
+        """
+        polled = self._stats.get(server_uri, None)
+        if polled is not None and time.monotonic() - polled[0] < self.stats_ttl:
+            return polled[1]
+        response = RestClient(server_uri)._get(
+            "remoteobjects/stats", timeout=self.stats_timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(response.json())
+        stats = json.loads(response.content)
+        with self._lock:
+            self._stats[server_uri] = (time.monotonic(), stats)
+        return stats
+
+    def _load(self, server_uri):
+        stats = self.stats(server_uri)
+        return (stats["busy_objects"] + stats["waiting"], stats["objects"])
+
+    def _placement_order(self, placement_key):
+        """
+        Return
+        ------
+        (list): the available servers, in order of preference for an object
+        """
+        available = self._available()
+        if self.placement == "hashed":
+            # rendezvous hashing: only the objects of a server that goes down
+            # move, and they spread over the others
+            return sorted(
+                available,
+                key=lambda server_uri: hashlib.sha256(
+                    f"{server_uri}\n{placement_key}".encode()
+                ).digest(),
+                reverse=True,
+            )
+        loads = {}
+        for server_uri in available:
+            try:
+                loads[server_uri] = self._load(server_uri)
+            except BaseException as err:
+                if not _is_unreachable(err):
+                    raise
+                self._mark_down(server_uri)
+        if len(loads) == 0:
+            return available
+        return sorted(loads, key=loads.get)
+
+    def _placed(self, remote_object):
+        server_uri = remote_object._server_uri
+        with self._lock:
+            self._locations[remote_object._remote_object_id] = server_uri
+            polled = self._stats.get(server_uri, None)
+            if polled is not None:
+                # until the next poll, count the object towards its server
+                polled[1]["objects"] += 1
+
+    def locate(self, object_id):
+        """
+        Return
+        ------
+        (str): the uri of the server of the object, which was placed by the
+            pool or else is found on one of its servers
+        """
+        server_uri = self._locations.get(object_id, None)
+        if server_uri is not None:
+            return server_uri
+        for server_uri in self._available():
+            try:
+                response = RestClient(server_uri)._get(
+                    "remoteobjects/registry/signature",
+                    params={"object_id": object_id},
+                )
+            except BaseException as err:
+                if not _is_unreachable(err):
+                    raise
+                self._mark_down(server_uri)
+                continue
+            if response.status_code == 200:
+                with self._lock:
+                    self._locations[object_id] = server_uri
+                return server_uri
+        raise LookupError(f"No server of the pool has an object `{object_id}`.")
+
+    def __getattr__(self, class_key):
+        # only reached for names that are not attributes of the pool
+        if class_key.startswith("_"):
+            raise AttributeError(
+                f"'{self.__class__.__name__}' object has no attribute '{class_key}'"
+            )
+        pooled_class = self._classes.get(class_key, None)
+        if pooled_class is None:
+            pooled_class = self._pooled_class(class_key)
+            with self._lock:
+                pooled_class = self._classes.setdefault(class_key, pooled_class)
+        return pooled_class
+
+    def _pooled_class(self, class_key):
+        # the servers are identical, so any of them defines the class
+        remote_class = None
+        for server_uri in self._available():
+            try:
+                remote_class = _remote_class(
+                    class_key, server_uri, **self._class_kwargs
+                )
+                break
+            except RuntimeError as err:
+                raise AttributeError(
+                    f"The pool's servers offer no class `{class_key}`."
+                ) from err
+            except BaseException as err:
+                if not _is_unreachable(err):
+                    raise
+                self._mark_down(server_uri)
+        if remote_class is None:
+            raise ConnectionError("No server of the pool is reachable.")
+        pool = self
+
+        def __init__(
+            self,
+            *args,
+            server_uri=None,
+            remote_object_id=None,
+            remobj_placement_key=None,
+            **kwargs,
+        ):
+            if server_uri is not None or remote_object_id is not None:
+                # a proxy of an existing object, wherever it lives
+                if server_uri is None:
+                    server_uri = pool.locate(remote_object_id)
+                remote_class.__init__(
+                    self,
+                    *args,
+                    server_uri=server_uri,
+                    remote_object_id=remote_object_id,
+                    **kwargs,
+                )
+                return
+            if remobj_placement_key is None:
+                remobj_placement_key = json.dumps(
+                    [class_key, args, kwargs], sort_keys=True, default=repr
+                )
+            error = None
+            for server_uri in pool._placement_order(remobj_placement_key):
+                try:
+                    remote_class.__init__(self, *args, server_uri=server_uri, **kwargs)
+                except BaseException as err:
+                    if not _is_unreachable(err):
+                        raise
+                    pool._mark_down(server_uri)
+                    error = err
+                    continue
+                pool._placed(self)
+                return
+            raise ConnectionError("No server of the pool is reachable.") from error
+
+        return type(remote_class.__name__, (remote_class,), {"__init__": __init__})
+
+    def __repr__(self):
+        return f"<ServerPool of {self._server_uris}>"
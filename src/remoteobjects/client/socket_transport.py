@@ -0,0 +1,237 @@
+from urllib.parse import urlsplit
+import itertools
+import json
+import queue
+import socket
+import threading
+from requests.structures import CaseInsensitiveDict
+import requests
+
+from ..framing import SharedMemoryChannel, pack_frame, recv_frame
+
+
+class SocketResponse(object):
+    """
+    The subset of `requests.Response` used by the clients, over the frames
+    of a SocketTransport response. The frames consumed are credited back to
+    the server (see `remoteobjects.framing.SendWindow`), so at most the
+    transport's `window` of them are buffered ahead of the consumer.
+    """
+
+    def __init__(self, transport, request_id, frames, timeout=None):
+        self._transport = transport
+        self._request_id = request_id
+        self._frames = frames
+        self._timeout = timeout
+        self._consumed = 0  # body frames not yet credited back
+        header, payload = self._next_frame()
+        self.status_code = header["status"]
+        self.headers = CaseInsensitiveDict(header["headers"])
+        self._final = header["final"]
+        self._pending_payload = payload
+        self._content = None
+
+    def _next_frame(self):
+        try:
+            frame = self._frames.get(timeout=self._timeout)
+        except queue.Empty:
+            self._final = True
+            self._transport._cancel(self._request_id)
+            raise requests.exceptions.ReadTimeout(
+                f"No response within {self._timeout} s."
+            )
+        if isinstance(frame, BaseException):
+            raise frame
+        if not frame[0]["final"]:
+            self._consumed += 1
+            if self._consumed >= max(1, self._transport.window // 2):
+                self._transport._credit(self._request_id, self._consumed)
+                self._consumed = 0
+        return frame
+
+    def iter_content(self, chunk_size=None):
+        """
+        Yield the payloads of the response's frames as they are received
+        (regardless of `chunk_size`).
+        """
+        if self._content is not None:
+            yield self._content
+            return
+        if len(self._pending_payload) > 0:
+            yield self._pending_payload
+        self._pending_payload = b""
+        while not self._final:
+            header, payload = self._next_frame()
+            self._final = header["final"]
+            if len(payload) > 0:
+                yield payload
+        self._transport._end(self._request_id)
+
+    def iter_lines(self):
+        pending = b""
+        for chunk in self.iter_content():
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            yield from lines
+        if len(pending) > 0:
+            yield pending
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = b"".join(self.iter_content())
+        return self._content
+
+    def json(self, **kwargs):
+        return json.loads(self.content, **kwargs)
+
+    def close(self):
+        if not self._final:
+            self._final = True
+            self._transport._cancel(self._request_id)
+
+
+class SocketTransport(object):
+    """
+    A persistent socket connection to a RemoteObjectSocketServer, shared by
+    the clients of a `tcp://host:port` server_uri, or of a
+    `unix:///path/to/socket` server_uri of a same-host server. Requests are
+    framed with ids, so that many threads can have requests in flight on the
+    connection at once. A reader thread routes response frames to their
+    requests.
+
+    Over a Unix domain socket, large payloads are passed through shared
+    memory rather than through the socket (see SharedMemoryChannel), with
+    `shm_kwargs`.
+
+    The server sends at most `window` frames of a response ahead of its
+    consumer, so a streamed return is read at the consumer's pace.
+    """
+
+    SCHEMES = ["tcp", "unix"]
+    window = 8
+    shm_kwargs = {"threshold": 1 << 16, "segment_size": 1 << 22}
+
+    _transports = {}  # {server_uri: SocketTransport}
+    _transports_lock = threading.Lock()
+
+    @classmethod
+    def for_uri(cls, server_uri):
+        with cls._transports_lock:
+            transport = cls._transports.get(server_uri)
+            if transport is None or transport._closed:
+                transport = cls(server_uri)
+                cls._transports[server_uri] = transport
+            return transport
+
+    def __init__(self, server_uri):
+        self._server_uri = server_uri
+        address = urlsplit(server_uri)
+        if address.scheme == "unix":
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(address.path)
+            self._shm_channel = SharedMemoryChannel(self._send, **self.shm_kwargs)
+        else:
+            self._sock = socket.create_connection((address.hostname, address.port))
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._shm_channel = None
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        # {request_id: queue.Queue of at most `window` + 1 frames}
+        self._responses = {}
+        self._closed = False
+        threading.Thread(
+            target=self._read, name="remoteobjects_socket_reader", daemon=True
+        ).start()
+
+    def _read(self):
+        error = ConnectionError("Socket transport closed.")
+        try:
+            while True:
+                frame = recv_frame(self._sock, self._shm_channel)
+                if frame is None:
+                    break
+                with self._lock:
+                    frames = self._responses.get(frame[0]["id"])
+                if frames is not None:
+                    frames.put(frame)
+        except BaseException as err:
+            error = err
+        with self._lock:
+            self._closed = True
+            responses = self._responses
+            self._responses = {}
+        if self._shm_channel is not None:
+            self._shm_channel.close()
+        for frames in responses.values():
+            frames.put(error)
+
+    def _send(self, header, payload=b""):
+        with self._send_lock:
+            self._sock.sendall(pack_frame(header, payload, self._shm_channel))
+
+    def _end(self, request_id):
+        with self._lock:
+            self._responses.pop(request_id, None)
+
+    def _credit(self, request_id, credit):
+        try:
+            self._send({"id": request_id, "credit": credit})
+        except OSError:
+            pass  # the reader fails the response
+
+    def _cancel(self, request_id):
+        self._end(request_id)
+        try:
+            self._send({"id": request_id, "cancel": True})
+        except OSError:
+            pass
+
+    def request(self, method, url, stream=False, timeout=None, **kwargs):
+        """
+        Send a request, encoded as `requests` would encode it for HTTP. Like
+        `requests`, a `timeout` raises `requests.exceptions.ReadTimeout` if
+        no frame of the response is received for that many seconds.
+
+        Return
+        ------
+        (SocketResponse): once the response's status is received, and, unless
+            `stream`, its whole body
+        """
+        # the url is the server_uri followed by the endpoint's path
+        prepared = requests.Request(
+            method.upper(),
+            "http://remoteobjects" + url[len(self._server_uri) :],
+            **kwargs,
+        ).prepare()
+        path, _, query = prepared.path_url.partition("?")
+        body = prepared.body if prepared.body is not None else b""
+        if isinstance(body, str):
+            body = body.encode()
+
+        request_id = next(self._request_ids)
+        frames = queue.Queue()
+        with self._lock:
+            if self._closed:
+                raise ConnectionError("Socket transport closed.")
+            self._responses[request_id] = frames
+        try:
+            self._send(
+                {
+                    "id": request_id,
+                    "method": prepared.method,
+                    "path": path,
+                    "query": query,
+                    "headers": dict(prepared.headers.items()),
+                    "window": self.window,
+                },
+                body,
+            )
+        except BaseException:
+            self._end(request_id)
+            raise
+        response = SocketResponse(self, request_id, frames, timeout)
+        if not stream:
+            response.content
+        return response
@@ -0,0 +1,184 @@
+"""
+Generate a static module of the proxy classes of a server's classes, ahead
+of time, rather than defining them at runtime with `defineRemoteClass`:
+
+    python -m remoteobjects.client.stubs http://localhost:6000 -o dummy_stubs.py
+
+The module's classes have the methods of the server's classes, with their
+signatures, so they are visible to IDEs and type checkers. On import, the
+module checks (in one request) that the server's version and the signatures
+of its classes are those it was generated from.
+"""
+import argparse
+import json
+import sys
+
+from .define_remote_object_loc import _define_remote_constructor
+from .remote_object import RemoteObject
+from .rest_client import RestClient
+from .. import __VERSION__
+
+
+def _server_json(server_uri, endpoint, params={}):
+    response = RestClient(server_uri)._get(endpoint, params=params)
+    if response.status_code != 200:
+        raise RuntimeError(response.json())
+    return json.loads(response.content)
+
+
+def _class_loc(
+    class_key,
+    server_uri,
+    delete_remote_on_del,
+    allowed_upload_extension_regex,
+    attribute_depth_allowance,
+):
+    signature_json = _server_json(
+        server_uri,
+        "remoteobjects/registry/signature",
+        {"class_key": class_key, "all_methods": True},
+    )
+    class_signature = signature_json["methods"]
+    return_annotations = signature_json.get("returns", {})
+    definition_loc = [
+        "",
+        "",
+        f"class {class_key}Remote(RemoteInstance):",
+        f"\t_class_key = '{class_key}'",
+        "\t_default_server_uri = SERVER_URI",
+        "",
+    ]
+    definition_loc += _define_remote_constructor(
+        class_signature.pop("__init__"),
+        server_uri,
+        class_key,
+        delete_remote_on_del,
+        allowed_upload_extension_regex,
+        attribute_depth_allowance,
+        define_methods=False,
+    )
+    for (method_name, parameters) in class_signature.items():
+        method_loc = RemoteObject._define_remote_function_loc(
+            method_name,
+            parameters,
+            None,
+            return_annotation=return_annotations.get(method_name, None),
+        )
+        definition_loc.append("")
+        definition_loc += ["\t" + loc for loc in method_loc if len(loc) > 0]
+    return definition_loc
+
+
+def generateStubModule(
+    server_uri,
+    class_keys=None,
+    delete_remote_on_del=True,
+    allowed_upload_extension_regex=r".*",
+    attribute_depth_allowance=0,
+):
+    """
+    Return
+    ------
+    (str): the source of a module of the `{class_key}Remote` proxy classes
+        of the server's classes (by default, all of them)
+    """
+    RemoteObject._confirm_server_version(server_uri)
+    if class_keys is None:
+        class_keys = _server_json(server_uri, "remoteobjects/registry")["class_keys"]
+    signature_hash = _server_json(
+        server_uri, "remoteobjects/version", {"class_key": class_keys}
+    )["signature_hash"]
+
+    module_loc = [
+        '"""',
+        f"Proxy classes of the remote objects of `{server_uri}`, generated by",
+        "`python -m remoteobjects.client.stubs`. Do not edit.",
+        '"""',
+        "from __future__ import annotations",
+        "import json",
+        "",
+        "from remoteobjects.client import RemoteInstance, RemoteAttribute",
+        "from remoteobjects.codecs import CodecJSONEncoder, CodecJSONDecoder",
+        "from remoteobjects.client.remote_instance import RequiredParameter",
+        "from remoteobjects.client.stubs import checkStubModule",
+        "",
+        f"SERVER_URI = {repr(server_uri)}",
+        f"SERVER_VERSION = {repr(__VERSION__)}",
+        f"SIGNATURE_HASH = {repr(signature_hash)}",
+        f"CLASS_KEYS = {repr(class_keys)}",
+        "",
+        "checkStubModule(SERVER_URI, SERVER_VERSION, SIGNATURE_HASH, CLASS_KEYS)",
+    ]
+    for class_key in class_keys:
+        module_loc += _class_loc(
+            class_key,
+            server_uri,
+            delete_remote_on_del,
+            allowed_upload_extension_regex,
+            attribute_depth_allowance,
+        )
+    return "\n".join(module_loc).replace("\t", "    ") + "\n"
+
+
+def checkStubModule(server_uri, server_version, signature_hash, class_keys):
+    """
+    Raise a RuntimeError if the server's version, or the signatures of its
+    classes, differ from those the stub module was generated from.
+    """
+    response_json = _server_json(
+        server_uri, "remoteobjects/version", {"class_key": class_keys}
+    )
+    if response_json["response"] != server_version:
+        raise RuntimeError(
+            f"Server's version `{response_json['response']}` != `{server_version}`"
+            " of the stubs: regenerate them."
+        )
+    if response_json["signature_hash"] != signature_hash:
+        raise RuntimeError(
+            f"Server's classes {class_keys} have changed since the stubs were"
+            " generated: regenerate them."
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m remoteobjects.client.stubs",
+        description="Generate a module of proxy classes of a server's classes.",
+    )
+    parser.add_argument("server_uri")
+    parser.add_argument(
+        "-o", "--output", default=None, help="the module's filepath (default: stdout)"
+    )
+    parser.add_argument(
+        "-c",
+        "--class-key",
+        action="append",
+        dest="class_keys",
+        default=None,
+        help="a class to generate (default: all of the server's classes)",
+    )
+    parser.add_argument(
+        "--keep-remote-on-del",
+        action="store_false",
+        dest="delete_remote_on_del",
+    )
+    parser.add_argument("--allowed-upload-extension-regex", default=r".*")
+    parser.add_argument("--attribute-depth-allowance", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    source = generateStubModule(
+        args.server_uri,
+        class_keys=args.class_keys,
+        delete_remote_on_del=args.delete_remote_on_del,
+        allowed_upload_extension_regex=args.allowed_upload_extension_regex,
+        attribute_depth_allowance=args.attribute_depth_allowance,
+    )
+    if args.output is None:
+        sys.stdout.write(source)
+    else:
+        with open(args.output, "w") as fio:
+            fio.write(source)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import json
+import threading
+
+import requests
+
+# {(server_uri, object_id): Transaction} of each thread
+_ACTIVE = threading.local()
+
+
+def _active_transaction(server_uri, object_id):
+    return getattr(_ACTIVE, "transactions", {}).get((server_uri, object_id), None)
+
+
+class _BufferedResponse(object):
+    # the response to a request buffered by a transaction
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self, **kwargs):
+        return json.loads(self.content, **kwargs)
+
+    def close(self):
+        pass
+
+
+class Transaction(object):
+    """
+    Buffer the attribute sets and method calls of a remote object (through
+    any of its proxies, e.g. also those of its attributes), made by this
+    thread, and apply them in one request, under one acquisition of the
+    object's lock, when the context exits:
+
+        with remoteObj.transaction() as transaction:
+            remoteObj.a = 1
+            remoteObj.configure(b=2)  # returns None, see `returns`
+
+    Before applying any, the server checks every set and call (attribute
+    paths, methods and arguments). Should one fail as it is applied, the
+    attribute sets before it are undone and a RemoteObjectError raised, so
+    that other requests never see the object half-configured. Method calls
+    cannot be undone.
+
+    Reads are not buffered, so they do not see the buffered sets. Calls with
+    file arguments cannot be buffered.
+    """
+
+    def __init__(self, remote_object):
+        self._remote_object = remote_object
+        self._key = None
+        self._steps = []
+        self._call_step_ids = []
+        self.returns = None  # the returns of the calls, once applied
+
+    def __enter__(self):
+        self._key = (
+            self._remote_object._server_uri,
+            self._remote_object._remote_object_id,
+        )
+        transactions = _ACTIVE.__dict__.setdefault("transactions", {})
+        if self._key in transactions:
+            raise RuntimeError(
+                f"Object `{self._key[1]}` is already in a transaction of this thread."
+            )
+        transactions[self._key] = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _ACTIVE.transactions.pop(self._key, None)
+        if exc_type is None:
+            self.commit()
+        return False
+
+    def _buffer(self, request_func, endpoint, data, params, stream):
+        """
+        Return
+        ------
+        (_BufferedResponse|None): the response to the request, if it is
+            buffered
+        """
+        if endpoint != "remoteobjects/registry":
+            return None
+        step = {"id": str(len(self._steps)), "object_id": params["object_id"]}
+        if params.get("attribute_path", None) is not None:
+            step["attribute_path"] = params["attribute_path"]
+        if request_func is requests.put and "attribute_path" in step:
+            step["value"] = data["value"]
+            self._steps.append(step)
+            return _BufferedResponse(b"{}")
+        if request_func is requests.post and params.get("func_name") is not None:
+            if stream:
+                raise RuntimeError("Streamed calls cannot be buffered.")
+            step["func_name"] = params["func_name"]
+            step["args"] = data if data is not None else {}
+            self._steps.append(step)
+            self._call_step_ids.append(step["id"])
+            return _BufferedResponse(b'{"return": null}')
+        return None
+
+    def commit(self):
+        """
+        Apply the buffered sets and calls (as the context exits).
+
+        Return
+        ------
+        (list): the returns of the calls, in order
+        """
+        steps, self._steps = self._steps, []
+        call_step_ids, self._call_step_ids = self._call_step_ids, []
+        if len(steps) == 0:
+            self.returns = []
+            return self.returns
+        remote_object = self._remote_object
+        response = remote_object._post(
+            "remoteobjects/pipeline",
+            data={
+                "steps": steps,
+                "outputs": call_step_ids,
+                "return_handles": True,
+                "atomic": True,
+            },
+        )
+        response_json = json.loads(response.content, cls=remote_object.jsonDecoder)
+        self.returns = [
+            remote_object._remote_handle(response_json["return_handles"][step_id])
+            if step_id in response_json["return_handles"]
+            else response_json["returns"][step_id]
+            for step_id in call_step_ids
+        ]
+        return self.returns
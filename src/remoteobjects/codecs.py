@@ -0,0 +1,188 @@
+import base64
+import collections
+import dataclasses
+import datetime
+import decimal
+import enum
+import json
+import threading
+
+
+class CodecRegistry(object):
+    """
+    The JSON encodings of the types JSON lacks, shared by the clients and the
+    servers (which each register the same types). A value of a registered
+    type is encoded as a single-key object, `{"__remobj_{tag}__": encoding}`,
+    and decoded back to the type by the other end.
+
+    Codecs are dispatched on the exact type of a value, through one dict
+    lookup, so subclasses of a registered type are not encoded (except that
+    enums and dataclasses, registered by `register_class`, share codecs).
+    """
+
+    def __init__(self, misses_maxsize=1024):
+        """
+        :misses_maxsize int: the number of the (most recently looked up)
+            types without a codec that are remembered as such
+        """
+        self._lock = threading.Lock()
+        self._encoders = {}  # {type: (key, encode)}
+        # the types without a codec, least recently looked up first
+        self._misses = collections.OrderedDict()
+        self.misses_maxsize = misses_maxsize
+        self._decoders = {  # {key: decode}
+            self._key("enum"): self._decode_enum,
+            self._key("dataclass"): self._decode_dataclass,
+        }
+        self._classes = {}  # {class name: enum or dataclass}
+
+        registry = self
+
+        class _JSONEncoder(json.JSONEncoder):
+            def default(self, value):
+                codec = registry._codec(value.__class__)
+                if codec is None:
+                    return super().default(value)
+                return {codec[0]: codec[1](value)}
+
+        class _JSONDecoder(json.JSONDecoder):
+            def __init__(self, *args, **kwargs):
+                kwargs.setdefault("object_hook", registry.decode)
+                super().__init__(*args, **kwargs)
+
+        self.JSONEncoder = _JSONEncoder
+        self.JSONDecoder = _JSONDecoder
+
+    @staticmethod
+    def _key(tag):
+        return f"__remobj_{tag}__"
+
+    def register(self, class_obj, tag, encode, decode):
+        """
+        :class_obj type: encoded with this codec (but not its subclasses)
+        :tag str: names the codec in encodings
+        :encode callable: value -> JSON-serialisable encoding
+        :decode callable: encoding -> value
+        """
+        with self._lock:
+            self._misses.pop(class_obj, None)
+            self._encoders[class_obj] = (self._key(tag), encode)
+            self._decoders[self._key(tag)] = decode
+
+    def register_class(self, class_obj):
+        """
+        Register an enum or a dataclass, by its name, which the other end
+        must register too.
+        """
+        if not (
+            issubclass(class_obj, enum.Enum) or dataclasses.is_dataclass(class_obj)
+        ):
+            raise TypeError(
+                f"`{class_obj.__name__}` is neither an enum nor a dataclass."
+            )
+        with self._lock:
+            self._classes[class_obj.__name__] = class_obj
+            self._misses.pop(class_obj, None)
+
+    def _codec(self, class_obj):
+        codec = self._encoders.get(class_obj, None)
+        if codec is not None:
+            return codec
+        with self._lock:
+            if class_obj in self._misses:
+                self._misses.move_to_end(class_obj)
+                return None
+            codec = self._encoders.get(class_obj, None)
+            if codec is None and self._classes.get(class_obj.__name__) is class_obj:
+                if issubclass(class_obj, enum.Enum):
+                    codec = (self._key("enum"), self._encode_enum)
+                else:
+                    codec = (self._key("dataclass"), self._encode_dataclass)
+                self._encoders[class_obj] = codec
+            if codec is None:
+                self._misses[class_obj] = None
+                while len(self._misses) > self.misses_maxsize:
+                    self._misses.popitem(last=False)
+        return codec
+
+    def encodes(self, class_obj):
+        """
+        Return
+        ------
+        (bool): whether values of the class are encoded as values
+        """
+        return self._codec(class_obj) is not None
+
+    def decode(self, obj):
+        # the `object_hook` of the JSONDecoder, for every decoded object
+        if len(obj) == 1:
+            for (key, encoding) in obj.items():
+                decode = self._decoders.get(key, None)
+                if decode is not None:
+                    return decode(encoding)
+        return obj
+
+    @staticmethod
+    def _encode_enum(value):
+        return [value.__class__.__name__, value.value]
+
+    def _decode_enum(self, encoding):
+        return self._classes[encoding[0]](encoding[1])
+
+    @staticmethod
+    def _encode_dataclass(value):
+        return [
+            value.__class__.__name__,
+            {
+                field.name: getattr(value, field.name)
+                for field in dataclasses.fields(value)
+            },
+        ]
+
+    def _decode_dataclass(self, encoding):
+        return self._classes[encoding[0]](**encoding[1])
+
+
+def _decode_timedelta(encoding):
+    return datetime.timedelta(
+        days=encoding[0], seconds=encoding[1], microseconds=encoding[2]
+    )
+
+
+CODECS = CodecRegistry()
+CODECS.register(
+    datetime.datetime,
+    "datetime",
+    datetime.datetime.isoformat,
+    datetime.datetime.fromisoformat,
+)
+CODECS.register(
+    datetime.date, "date", datetime.date.isoformat, datetime.date.fromisoformat
+)
+CODECS.register(
+    datetime.time, "time", datetime.time.isoformat, datetime.time.fromisoformat
+)
+CODECS.register(
+    datetime.timedelta,
+    "timedelta",
+    lambda value: [value.days, value.seconds, value.microseconds],
+    _decode_timedelta,
+)
+CODECS.register(
+    complex,
+    "complex",
+    lambda value: [value.real, value.imag],
+    lambda encoding: complex(*encoding),
+)
+CODECS.register(decimal.Decimal, "decimal", str, decimal.Decimal)
+CODECS.register(
+    bytes,
+    "bytes",
+    lambda value: base64.b64encode(value).decode(),
+    base64.b64decode,
+)
+
+# the JSONEncoder and JSONDecoder of the shared registry, the defaults of the
+# clients' `jsonEncoder` and `jsonDecoder`
+CodecJSONEncoder = CODECS.JSONEncoder
+CodecJSONDecoder = CODECS.JSONDecoder
@@ -0,0 +1,244 @@
+from multiprocessing import resource_tracker, shared_memory
+import asyncio
+import json
+import struct
+import threading
+
+# a frame is the byte-lengths of its JSON header and its payload, followed by
+# the header and the payload
+__FRAME_PREFIX__ = struct.Struct("!II")
+
+# names of the shared-memory segments created by this process
+__CREATED_SEGMENTS__ = set()
+
+
+class FrameError(ConnectionError):
+    """
+    A frame that the connection cannot carry, e.g. one naming a shared-memory
+    segment over a connection without a SharedMemoryChannel.
+    """
+
+
+def _shared_memory_header(header, shm_channel):
+    # the frame passes a payload, or releases a segment, through shared memory
+    if ("shm" in header or "shm_release" in header) and shm_channel is None:
+        raise FrameError(f"Shared-memory frame {header} over a socket without it.")
+    return "shm_release" in header
+
+
+class SharedMemoryChannel(object):
+    """
+    Pass the payloads of a connection's frames, that are of at least
+    `threshold` bytes, through shared-memory segments named in the frame
+    headers, rather than through the socket. Only for peers on the same
+    host.
+
+    Each end lends segments from its own pool, reusing them once the peer
+    sends back `{"shm_release": name}`, so that their pages stay mapped on
+    both ends. Payloads larger than `segment_size`, or sent while every
+    segment is lent, go through the socket.
+    """
+
+    def __init__(self, send, threshold=1 << 16, segment_size=1 << 22, max_segments=8):
+        """
+        :send callable: sends a frame's header (of a release) to the peer
+        """
+        self._send = send
+        self.threshold = threshold
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._segments = {}  # {name: SharedMemory} created by this end
+        self._free = []  # names of the segments not lent
+        self._attached = {}  # {name: SharedMemory} created by the peer
+
+    def lend(self, payload):
+        """
+        Return
+        ------
+        (dict|None): the {"name": , "size": } of the segment the payload was
+            copied to, or None if it is to be sent through the socket
+        """
+        if not (self.threshold <= len(payload) <= self.segment_size):
+            return None
+        with self._lock:
+            if len(self._free) > 0:
+                segment = self._segments[self._free.pop()]
+            elif len(self._segments) < self.max_segments:
+                segment = shared_memory.SharedMemory(
+                    create=True, size=self.segment_size
+                )
+                self._segments[segment.name] = segment
+                __CREATED_SEGMENTS__.add(segment.name)
+            else:
+                return None
+        segment.buf[: len(payload)] = payload
+        return {"name": segment.name, "size": len(payload)}
+
+    def release(self, name):
+        with self._lock:
+            if name in self._segments:
+                self._free.append(name)
+
+    def read(self, shm):
+        with self._lock:
+            segment = self._attached.get(shm["name"])
+            if segment is None:
+                segment = shared_memory.SharedMemory(name=shm["name"])
+                if shm["name"] not in __CREATED_SEGMENTS__:
+                    # the peer unlinks its segments
+                    resource_tracker.unregister(segment._name, "shared_memory")
+                self._attached[shm["name"]] = segment
+        payload = bytes(segment.buf[: shm["size"]])
+        self._send({"shm_release": shm["name"]})
+        return payload
+
+    def close(self):
+        with self._lock:
+            for segment in self._attached.values():
+                segment.close()
+            for segment in self._segments.values():
+                segment.close()
+                segment.unlink()
+                __CREATED_SEGMENTS__.discard(segment.name)
+            self._attached = {}
+            self._segments = {}
+            self._free = []
+
+
+class SendWindow(object):
+    """
+    The credit of a response's body frames: a request's header may carry a
+    `window`, the count of frames the peer has room for, which the peer
+    extends with `{"id": , "credit": n}` as it consumes them. A sender waits
+    for credit before each frame but the final one, so that a slow consumer
+    slows the sender rather than buffering the whole response. Without a
+    window, the credit is unbounded.
+    """
+
+    def __init__(self, window=None):
+        self._credit = window
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def grant(self, credit):
+        with self._condition:
+            if self._credit is not None:
+                self._credit += credit
+            self._condition.notify_all()
+
+    def close(self):
+        # as the response is cancelled, or the connection closed
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def take(self):
+        """
+        Wait for the credit of a frame.
+
+        Return
+        ------
+        (bool): False if the window was closed meanwhile
+        """
+        with self._condition:
+            while not self._closed and self._credit is not None and self._credit <= 0:
+                self._condition.wait()
+            if self._closed:
+                return False
+            if self._credit is not None:
+                self._credit -= 1
+            return True
+
+
+class AsyncSendWindow(object):
+    """
+    SendWindow, for the coroutines of an asyncio event loop.
+    """
+
+    def __init__(self, window=None):
+        self._credit = window
+        self._credited = asyncio.Event()
+
+    def grant(self, credit):
+        if self._credit is not None:
+            self._credit += credit
+        self._credited.set()
+
+    async def take(self):
+        while self._credit is not None and self._credit <= 0:
+            self._credited.clear()
+            await self._credited.wait()
+        if self._credit is not None:
+            self._credit -= 1
+
+
+def pack_frame(header, payload=b"", shm_channel=None):
+    if shm_channel is not None:
+        shm = shm_channel.lend(payload)
+        if shm is not None:
+            header = dict(header, shm=shm)
+            payload = b""
+    header_bytes = json.dumps(header).encode()
+    return (
+        __FRAME_PREFIX__.pack(len(header_bytes), len(payload)) + header_bytes + payload
+    )
+
+
+def _recv_exactly(sock, length):
+    buffer = bytearray(length)
+    view = memoryview(buffer)
+    received = 0
+    while received < length:
+        chunk_length = sock.recv_into(view[received:], length - received)
+        if chunk_length == 0:
+            raise ConnectionError("Socket closed mid-frame.")
+        received += chunk_length
+    return bytes(buffer)
+
+
+def recv_frame(sock, shm_channel=None):
+    """
+    Receive the next frame, handling the shared-memory releases of the
+    SharedMemoryChannel in between.
+
+    Return
+    ------
+    (tuple): the frame's (header, payload), or None if the socket closed
+        between frames. Raises FrameError for a shared-memory frame without
+        a `shm_channel`.
+    """
+    while True:
+        try:
+            prefix = _recv_exactly(sock, __FRAME_PREFIX__.size)
+        except ConnectionError:
+            return None
+        header_length, payload_length = __FRAME_PREFIX__.unpack(prefix)
+        header = json.loads(_recv_exactly(sock, header_length))
+        payload = _recv_exactly(sock, payload_length)
+        if _shared_memory_header(header, shm_channel):
+            shm_channel.release(header["shm_release"])
+            continue
+        if "shm" in header:
+            payload = shm_channel.read(header.pop("shm"))
+        return header, payload
+
+
+async def read_frame(reader, shm_channel=None):
+    """
+    `recv_frame`, from an asyncio.StreamReader.
+    """
+    while True:
+        try:
+            prefix = await reader.readexactly(__FRAME_PREFIX__.size)
+        except asyncio.IncompleteReadError:
+            return None
+        header_length, payload_length = __FRAME_PREFIX__.unpack(prefix)
+        header = json.loads(await reader.readexactly(header_length))
+        payload = await reader.readexactly(payload_length)
+        if _shared_memory_header(header, shm_channel):
+            shm_channel.release(header["shm_release"])
+            continue
+        if "shm" in header:
+            payload = shm_channel.read(header.pop("shm"))
+        return header, payload
@@ -1,3 +1,21 @@
 from .endpoints import addRemoteObjectResources
-from .object_registry import ObjectRegistry
+from .socket_server import RemoteObjectSocketServer, startRemoteObjectSocketServer
+from .object_registry import ObjectRegistry, StaleHandleError
+from .registry_snapshot import RegistrySnapshot
+from .async_server import (
+    AsyncRemoteObjectSocketServer,
+    RemoteObjectASGIApp,
+    startRemoteObjectAsyncServer,
+)
+from .object_lock import ObjectLock
+from .method_cache import MethodCache, pure_method
+from .admission import AdmissionControl, AdmissionError
+from .cancellation import (
+    CallCancelled,
+    CallTracker,
+    CancellationToken,
+    cancellation_token,
+)
+from .upload_store import UploadStore, UploadQuotaError
+from .download_store import DownloadStore, ServerFile
 from .. import __VERSION__
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+
+from .cancellation import CallCancelled
+
+
+class AdmissionError(RuntimeError):
+    """
+    A request was not admitted to a busy object: rejected with `status`,
+    to be retried after `retry_after` seconds.
+    """
+
+    def __init__(self, message, status, retry_after):
+        self.status = status
+        self.retry_after = retry_after
+        super(AdmissionError, self).__init__(message)
+
+
+class AdmissionControl(object):
+    """
+    Bound the requests waiting on object locks, so that an overloaded server
+    rejects requests quickly, instead of queueing them without limit.
+    Requests are rejected:
+    - 429, when the object already has `max_object_waiters` waiting on it
+    - 503, when `max_total_waiters` are waiting across all objects
+    - 503, when they have waited `max_wait` seconds for the object
+    each with a hint to retry after `retry_after` seconds. None disables a
+    limit.
+    """
+
+    def __init__(
+        self,
+        max_object_waiters=None,
+        max_total_waiters=None,
+        max_wait=None,
+        retry_after=1.0,
+    ):
+        self.max_object_waiters = max_object_waiters
+        self.max_total_waiters = max_total_waiters
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._total_waiters = 0
+        self.rejected = {429: 0, 503: 0}
+
+    def _reject(self, message, status):
+        with self._lock:
+            self.rejected[status] += 1
+        return AdmissionError(message, status, self.retry_after)
+
+    def _enqueue(self, lock):
+        with self._lock:
+            if (
+                self.max_object_waiters is not None
+                and lock.waiting() >= self.max_object_waiters
+            ):
+                self.rejected[429] += 1
+                raise AdmissionError(
+                    f"Object has {lock.waiting()} requests waiting already.",
+                    429,
+                    self.retry_after,
+                )
+            if (
+                self.max_total_waiters is not None
+                and self._total_waiters >= self.max_total_waiters
+            ):
+                self.rejected[503] += 1
+                raise AdmissionError(
+                    f"Server has {self._total_waiters} requests waiting already.",
+                    503,
+                    self.retry_after,
+                )
+            self._total_waiters += 1
+
+    def _dequeue(self):
+        with self._lock:
+            self._total_waiters -= 1
+
+    def _wait_timeout(self, cancellation_token):
+        timeouts = [self.max_wait]
+        if cancellation_token is not None:
+            timeouts.append(cancellation_token.remaining())
+        timeouts = [timeout for timeout in timeouts if timeout is not None]
+        return min(timeouts) if len(timeouts) > 0 else None
+
+    def _not_acquired(self, cancellation_token):
+        if cancellation_token is not None:
+            cancellation_token.raise_if_cancelled()
+        return self._reject(f"Object was busy for longer than {self.max_wait} s.", 503)
+
+    def acquire(self, lock, cancellation_token=None, holder=None):
+        """
+        Acquire the object's lock, or raise an AdmissionError, or a
+        CallCancelled if the call is cancelled while it waits.
+        """
+        if lock.acquire(blocking=False, holder=holder):
+            return
+        self._enqueue(lock)
+        try:
+            timeout = self._wait_timeout(cancellation_token)
+            acquired = lock.acquire(
+                timeout=-1 if timeout is None else timeout,
+                cancellation_token=cancellation_token,
+                holder=holder,
+            )
+        finally:
+            self._dequeue()
+        if not acquired:
+            raise self._not_acquired(cancellation_token)
+
+    async def acquire_async(self, lock, cancellation_token=None, holder=None):
+        """
+        Await the object's lock, or raise an AdmissionError, or a
+        CallCancelled if the call is cancelled while it waits.
+        """
+        if lock.acquire(blocking=False, holder=holder):
+            return
+        self._enqueue(lock)
+        loop = asyncio.get_running_loop()
+        acquisition = asyncio.ensure_future(lock.acquire_async(holder))
+        awaited = {acquisition}
+        if cancellation_token is not None:
+            cancelled = loop.create_future()
+
+            def cancel():
+                loop.call_soon_threadsafe(
+                    lambda: cancelled.done() or cancelled.set_result(True)
+                )
+
+            cancellation_token.add_callback(cancel)
+            awaited.add(cancelled)
+        try:
+            await asyncio.wait(
+                awaited,
+                timeout=self._wait_timeout(cancellation_token),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            if cancellation_token is not None:
+                cancellation_token.remove_callback(cancel)
+            self._dequeue()
+            acquired = acquisition.done() and not acquisition.cancelled()
+            if not acquisition.done():
+                acquisition.cancel()  # passes on the lock if granted meanwhile
+        if not acquired:
+            raise self._not_acquired(cancellation_token)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "waiting": self._total_waiters,
+                "rejected": dict(self.rejected),
+                "limits": {
+                    "max_object_waiters": self.max_object_waiters,
+                    "max_total_waiters": self.max_total_waiters,
+                    "max_wait": self.max_wait,
+                    "retry_after": self.retry_after,
+                },
+            }
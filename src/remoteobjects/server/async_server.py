@@ -0,0 +1,554 @@
+from werkzeug.wsgi import FileWrapper
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+import asyncio
+import json
+import logging
+import os
+import threading
+
+from ..codecs import CodecJSONDecoder, CodecJSONEncoder
+from ..framing import AsyncSendWindow, SharedMemoryChannel, pack_frame, read_frame
+from .admission import AdmissionError
+from .cancellation import CallCancelled
+from .object_registry import ObjectRegistry
+from .socket_server import _dispatch_framed_request, _framed_environ
+from . import endpoints
+
+
+class AsyncRemoteObjectDispatcher(object):
+    """
+    Dispatch requests to a Flask app's remote-object resources from an
+    asyncio event loop, so that a request only occupies a thread while it
+    runs. Requests on registered objects (of the registry, pipelines and
+    migrations) await the objects' locks (see `ObjectLock.acquire_async`)
+    before they are handed to the app, which runs in a bounded executor, and
+    the locks are released once the response has been sent. Each call of a
+    broadcast awaits its own object's lock. Idle and waiting clients
+    therefore cost a coroutine, not a thread. Waiting requests are bounded
+    by the endpoints' AdmissionControl.
+
+    With COALESCE_READS, identical attribute reads share the read in flight
+    before they await the object's lock, as they do on the threaded servers.
+    """
+
+    # responses with at most this many bytes are read in one executor call
+    max_buffered_response = 1 << 20
+    # files are sent in chunks of this many bytes
+    file_chunk_size = 1 << 20
+
+    def __init__(self, flask_app, max_workers=None):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="remoteobjects_async"
+        )
+        self._read_flights = {}  # {(object_id, attribute_path): asyncio.Future}
+
+    @staticmethod
+    def _locked_object_ids(method, path, query, body):
+        # the objects that the request locks, in the order that the endpoints
+        # acquire them
+        if path == "/remoteobjects/registry":
+            if method not in ["GET", "PUT", "POST", "PATCH"]:
+                return []
+            if "object_id" not in query or "class_key" in query:
+                return []
+            return query["object_id"][:1]
+        if path == "/remoteobjects/migrate" and method == "POST":
+            return query.get("object_id", [])[:1]
+        if path == "/remoteobjects/pipeline" and method == "POST":
+            try:
+                steps = json.loads(body).get("steps", [])
+                return ObjectRegistry.pipeline_object_ids(steps)
+            except BaseException:
+                return []  # the endpoint reports the invalid pipeline
+        return []
+
+    @staticmethod
+    def _read_flight_key(method, path, query):
+        # the attribute reads of RemoteObjectEndpoint_Registry, if coalesced
+        if endpoints.__READ_FLIGHTS__ is None:
+            return None
+        if path != "/remoteobjects/registry" or method != "GET":
+            return None
+        if "object_id" not in query or "class_key" in query:
+            return None
+        return query["object_id"][0], query.get("attribute_path", [None])[0]
+
+    @staticmethod
+    def _start_call(method, path, query):
+        # the method calls of RemoteObjectEndpoint_Registry, which may be
+        # cancelled (see `endpoints._start_call`)
+        if path != "/remoteobjects/registry" or method != "POST":
+            return None, None
+        call_id = query.get("call_id", [None])[0]
+        timeout = query.get("timeout", [None])[0]
+        return call_id, endpoints.__CALL_TRACKER__.start(
+            call_id, None if timeout is None else float(timeout)
+        )
+
+    async def _acquire(self, object_ids, cancellation_token, holder):
+        """
+        Await the locks of the registered objects, in order.
+
+        Return
+        ------
+        (tuple): the {object_id: lock} held, and the rejection's (body,
+            status[, headers]) if the request was not admitted or was
+            cancelled as it waited (holding no lock), else None
+        """
+        held_locks = {}
+        for object_id in object_ids:
+            lock = endpoints.__REMOTE_OBJECT_SEMAPHORES__.get(object_id)
+            if lock is None:
+                continue  # the endpoint reports the unknown object
+            try:
+                await endpoints.__ADMISSION_CONTROL__.acquire_async(
+                    lock, cancellation_token, holder
+                )
+            except BaseException as err:
+                self._release(held_locks)
+                if isinstance(err, AdmissionError):
+                    return {}, endpoints._admission_rejection(err)
+                if isinstance(err, CallCancelled):
+                    return {}, endpoints._cancelled_response(err)
+                raise
+            held_locks[object_id] = lock
+        if cancellation_token is not None and cancellation_token.cancelled:
+            # dropped before it started
+            self._release(held_locks)
+            return {}, endpoints._cancelled_response(CallCancelled("Call cancelled."))
+        return held_locks, None
+
+    @staticmethod
+    def _release(held_locks):
+        for lock in held_locks.values():
+            lock.release()
+
+    def _json_response(self, body, status, headers={}):
+        return (
+            status,
+            [("Content-Type", "application/json"), *headers.items()],
+            self._body(
+                [json.dumps(body, cls=CodecJSONEncoder).encode()],
+                None,
+                {},
+            ),
+        )
+
+    def _file_wrapper(self, file, buffer_size=8192):
+        return FileWrapper(file, max(buffer_size, self.file_chunk_size))
+
+    def _run_app(self, environ):
+        status, headers, app_iter = _dispatch_framed_request(self.flask_app, environ)
+        chunks = []
+        content_length = dict(headers).get("Content-Length", None)
+        if (
+            content_length is not None
+            and int(content_length) <= self.max_buffered_response
+        ):
+            try:
+                chunks = list(app_iter)
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+            app_iter = None
+        return status, headers, chunks, app_iter
+
+    @classmethod
+    def _close(cls, app_iter, held_locks, call_id=None):
+        try:
+            if app_iter is not None and hasattr(app_iter, "close"):
+                app_iter.close()
+        finally:
+            cls._release(held_locks)
+            endpoints.__CALL_TRACKER__.finish(call_id)
+
+    async def _broadcast_call(self, environ, request_json, object_id):
+        # the broadcast's call of the object, once it holds the object's lock
+        call_id = request_json.get("call_ids", {}).get(object_id, None)
+        cancellation_token = endpoints.__CALL_TRACKER__.start(
+            call_id, request_json.get("timeout", None)
+        )
+        try:
+            held_locks, rejection = await self._acquire(
+                [object_id],
+                cancellation_token,
+                {
+                    "verb": environ["REQUEST_METHOD"],
+                    "path": environ["PATH_INFO"],
+                    "func_name": request_json.get("func_name", None),
+                    "attribute_path": request_json.get("attribute_path", None),
+                },
+            )
+        except BaseException:
+            endpoints.__CALL_TRACKER__.finish(call_id)
+            raise
+        if rejection is not None:
+            endpoints.__CALL_TRACKER__.finish(call_id)
+            return rejection[0]
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            endpoints.RemoteObjectEndpoint_Broadcast.call_in_context,
+            self.flask_app,
+            dict(
+                environ,
+                **{
+                    "remoteobjects.held_locks": held_locks,
+                    "remoteobjects.cancellation_token": cancellation_token,
+                },
+            ),
+            request_json,
+            object_id,
+        )
+        # the call runs in its thread even if the broadcast is cancelled
+        future.add_done_callback(lambda future: self._close(None, held_locks, call_id))
+        return await asyncio.shield(future)
+
+    async def _broadcast(self, environ, body):
+        """
+        Return
+        ------
+        (tuple|None): the broadcast's response, or None for the endpoint to
+            report its invalid request
+        """
+        try:
+            request_json = json.loads(body, cls=CodecJSONDecoder)
+            object_ids = endpoints.RemoteObjectEndpoint_Broadcast.object_ids(
+                request_json
+            )
+        except BaseException:
+            return None
+        results = await asyncio.gather(
+            *[
+                self._broadcast_call(environ, request_json, object_id)
+                for object_id in object_ids
+            ]
+        )
+        return self._json_response({"results": dict(zip(object_ids, results))}, 200)
+
+    async def dispatch(self, method, path, query_string, headers, body):
+        """
+        Return
+        ------
+        (tuple): the response's (status, [(header, value)...], body), the body
+            being an async iterator of bytes that must be exhausted or closed
+        """
+        query = parse_qs(query_string)
+        flight_key = self._read_flight_key(method, path, query)
+        if flight_key is None:
+            return await self._dispatch(method, path, query_string, headers, body)
+
+        flight = self._read_flights.get(flight_key, None)
+        if flight is not None:
+            endpoints.__READ_FLIGHTS__.count(False)
+            shared = await asyncio.shield(flight)
+            if shared is not None:
+                status, response_headers, chunks = shared
+                return status, response_headers, self._body(chunks, None, {})
+            # the read in flight did not buffer its response
+            return await self._dispatch(method, path, query_string, headers, body)
+        flight = self._read_flights[
+            flight_key
+        ] = asyncio.get_running_loop().create_future()
+        endpoints.__READ_FLIGHTS__.count(True)
+        try:
+            return await self._dispatch(
+                method, path, query_string, headers, body, flight
+            )
+        finally:
+            # the flight ends before the object is released, so before any
+            # later write to it
+            self._read_flights.pop(flight_key, None)
+            if not flight.done():
+                flight.set_result(None)
+
+    async def _dispatch(self, method, path, query_string, headers, body, flight=None):
+        loop = asyncio.get_running_loop()
+        query = parse_qs(query_string)
+        environ = _framed_environ(method, path, query_string, headers, body)
+        environ["wsgi.file_wrapper"] = self._file_wrapper
+        if path == "/remoteobjects/broadcast" and method == "POST":
+            response = await self._broadcast(environ, body)
+            if response is not None:
+                return response
+
+        call_id, cancellation_token = self._start_call(method, path, query)
+        try:
+            held_locks, rejection = await self._acquire(
+                self._locked_object_ids(method, path, query, body),
+                cancellation_token,
+                {
+                    "verb": method,
+                    "path": path,
+                    "func_name": query.get("func_name", [None])[0],
+                    "attribute_path": query.get("attribute_path", [None])[0],
+                },
+            )
+        except BaseException:
+            endpoints.__CALL_TRACKER__.finish(call_id)
+            raise
+        if rejection is not None:
+            endpoints.__CALL_TRACKER__.finish(call_id)
+            return self._json_response(*rejection)
+        environ["remoteobjects.held_locks"] = held_locks
+        if cancellation_token is not None:
+            environ["remoteobjects.cancellation_token"] = cancellation_token
+
+        future = loop.run_in_executor(self.executor, self._run_app, environ)
+        try:
+            status, response_headers, chunks, app_iter = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # the request still runs in its thread: release the locks after
+            future.add_done_callback(
+                lambda future: self._close(
+                    None if future.exception() else future.result()[3],
+                    held_locks,
+                    call_id,
+                )
+            )
+            raise
+        except BaseException:
+            self._close(None, held_locks, call_id)
+            raise
+        if flight is not None and app_iter is None:
+            flight.set_result((status, response_headers, chunks))
+        return (
+            status,
+            response_headers,
+            self._body(chunks, app_iter, held_locks, call_id),
+        )
+
+    async def _body(self, chunks, app_iter, held_locks, call_id=None):
+        loop = asyncio.get_running_loop()
+        try:
+            for chunk in chunks:
+                yield chunk
+            if app_iter is not None:
+                iterator = iter(app_iter)
+                while True:
+                    chunk = await loop.run_in_executor(
+                        self.executor, next, iterator, None
+                    )
+                    if chunk is None:
+                        break
+                    yield chunk
+        finally:
+            await loop.run_in_executor(
+                self.executor, self._close, app_iter, held_locks, call_id
+            )
+
+
+class RemoteObjectASGIApp(object):
+    """
+    An ASGI application serving the routes of `addRemoteObjectResources` over
+    HTTP through an AsyncRemoteObjectDispatcher, to be run by an ASGI server,
+    e.g. `uvicorn module:asgi_app`:
+
+        app = Flask(__name__)
+        addRemoteObjectResources(app, [...])
+        asgi_app = RemoteObjectASGIApp(app)
+    """
+
+    def __init__(self, flask_app, max_workers=None):
+        self.dispatcher = AsyncRemoteObjectDispatcher(flask_app, max_workers)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            raise NotImplementedError(f"Unsupported ASGI scope `{scope['type']}`.")
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        status, headers, response_body = await self.dispatcher.dispatch(
+            scope["method"],
+            scope["path"],
+            scope["query_string"].decode(),
+            [(key.decode(), value.decode()) for (key, value) in scope["headers"]],
+            body,
+        )
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": status,
+                    "headers": [
+                        (key.lower().encode(), value.encode())
+                        for (key, value) in headers
+                    ],
+                }
+            )
+            async for chunk in response_body:
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await response_body.aclose()
+
+
+class AsyncRemoteObjectSocketServer(object):
+    """
+    The framed protocol of RemoteObjectSocketServer (for `tcp://` and
+    `unix://` clients), with its credit of response frames, served from an
+    asyncio event loop through an AsyncRemoteObjectDispatcher.
+    """
+
+    def __init__(
+        self,
+        flask_app,
+        host="0.0.0.0",
+        port=6001,
+        unix_socket_path=None,
+        max_workers=None,
+        shm_threshold=1 << 16,
+        shm_segment_size=1 << 22,
+    ):
+        self.dispatcher = AsyncRemoteObjectDispatcher(flask_app, max_workers)
+        self.host = host
+        self.port = port
+        self.unix_socket_path = unix_socket_path
+        self.shm_kwargs = None
+        if unix_socket_path is not None:
+            self.shm_kwargs = {
+                "threshold": shm_threshold,
+                "segment_size": shm_segment_size,
+            }
+            self.dispatcher.file_chunk_size = shm_segment_size
+        self.server = None
+
+    async def start(self):
+        if self.unix_socket_path is not None:
+            if os.path.exists(self.unix_socket_path):
+                os.remove(self.unix_socket_path)  # a stale socket
+            self.server = await asyncio.start_unix_server(
+                self._serve_connection, path=self.unix_socket_path
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self._serve_connection, host=self.host, port=self.port
+            )
+        return self.server
+
+    async def _serve_connection(self, reader, writer):
+        def send(header, payload=b""):
+            writer.write(pack_frame(header, payload, shm_channel))
+
+        shm_channel = None
+        if self.shm_kwargs is not None:
+            shm_channel = SharedMemoryChannel(send, **self.shm_kwargs)
+        tasks = {}
+        windows = {}  # {request_id: AsyncSendWindow}
+
+        def done(request_id):
+            tasks.pop(request_id, None)
+            windows.pop(request_id, None)
+
+        try:
+            while True:
+                frame = await read_frame(reader, shm_channel)
+                if frame is None:
+                    break
+                header, payload = frame
+                if header.get("cancel", False):
+                    if header["id"] in tasks:
+                        tasks[header["id"]].cancel()
+                    continue
+                if "credit" in header:
+                    if header["id"] in windows:
+                        windows[header["id"]].grant(header["credit"])
+                    continue
+                window = AsyncSendWindow(header.get("window", None))
+                task = asyncio.create_task(
+                    self._serve_request(send, writer, header, payload, window)
+                )
+                tasks[header["id"]] = task
+                windows[header["id"]] = window
+                task.add_done_callback(
+                    lambda task, request_id=header["id"]: done(request_id)
+                )
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in list(tasks.values()):
+                task.cancel()
+            writer.close()
+            if shm_channel is not None:
+                shm_channel.close()
+
+    async def _serve_request(self, send, writer, header, payload, window):
+        request_id = header["id"]
+        try:
+            status, headers, response_body = await self.dispatcher.dispatch(
+                header["method"],
+                header["path"],
+                header.get("query", ""),
+                header.get("headers", {}),
+                payload,
+            )
+        except asyncio.CancelledError:
+            raise
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            logger.error(f"Error dispatching socket request {header}: {repr(err)}")
+            send({"id": request_id, "status": 500, "headers": {}, "final": True})
+            return
+
+        try:
+            response_header = {
+                "id": request_id,
+                "status": status,
+                "headers": dict(headers),
+            }
+            async for chunk in response_body:
+                if len(chunk) == 0:
+                    continue
+                await window.take()
+                send(dict(response_header, final=False), chunk)
+                response_header = {"id": request_id}
+                await writer.drain()
+            send(dict(response_header, final=True))
+            await writer.drain()
+        except ConnectionError:
+            pass  # the client disconnected
+        finally:
+            await response_body.aclose()
+
+
+def startRemoteObjectAsyncServer(flask_app, **kwargs):
+    """
+    Serve the Flask app's remote-object resources over `tcp://host:port`,
+    or over `unix://{unix_socket_path}` if given, from an asyncio event loop
+    in a daemon thread. Call after `addRemoteObjectResources`. See
+    AsyncRemoteObjectSocketServer for the keyword arguments.
+
+    Return
+    ------
+    (AsyncRemoteObjectSocketServer): the server
+    """
+    server = AsyncRemoteObjectSocketServer(flask_app, **kwargs)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="remoteobjects_async_server", daemon=True).start()
+    started.wait()
+    server.loop = loop
+    return server
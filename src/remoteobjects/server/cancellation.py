@@ -0,0 +1,155 @@
+import contextlib
+import contextvars
+import threading
+import time
+
+
+class CallCancelled(RuntimeError):
+    """
+    A call was cancelled by its client, or outlived its deadline.
+    """
+
+    pass
+
+
+class CancellationToken(object):
+    """
+    The cancellation state of a call, which a long-running method may check
+    (through `cancellation_token()`) to stop early once its client has given
+    up on it.
+    """
+
+    def __init__(self, deadline=None):
+        """
+        :deadline float: the `time.monotonic()` after which the call is
+            abandoned by its client, if any
+        """
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._cancelled or (
+            self.deadline is not None and time.monotonic() >= self.deadline
+        )
+
+    def remaining(self):
+        """
+        Return
+        ------
+        (float|None): the seconds left until the deadline, if any
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            callbacks = self._callbacks
+            self._callbacks = []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback):
+        """
+        Call `callback()` when the token is cancelled (immediately if it is
+        already).
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise CallCancelled(
+                "Call cancelled by its client."
+                if self._cancelled
+                else "Call outlived its deadline."
+            )
+
+
+_CURRENT_TOKEN = contextvars.ContextVar("remoteobjects_cancellation_token")
+
+
+def cancellation_token():
+    """
+    Return
+    ------
+    (CancellationToken): that of the remote call being executed, or a token
+        that is never cancelled, outside of a remote call
+    """
+    return _CURRENT_TOKEN.get(None) or CancellationToken()
+
+
+@contextlib.contextmanager
+def _current_call(token):
+    # makes `token` that of `cancellation_token()` within the context
+    context_token = _CURRENT_TOKEN.set(token)
+    try:
+        yield token
+    finally:
+        _CURRENT_TOKEN.reset(context_token)
+
+
+class CallTracker(object):
+    """
+    The cancellation tokens of the calls in progress, by the `call_id` their
+    clients gave them. A cancellation that arrives before its call is kept
+    for `tombstone_ttl` seconds, so that the call is dropped on arrival.
+    """
+
+    def __init__(self, tombstone_ttl=60.0):
+        self.tombstone_ttl = tombstone_ttl
+        self._lock = threading.Lock()
+        self._tokens = {}  # {call_id: CancellationToken}
+        self._tombstones = {}  # {call_id: time.monotonic() of cancellation}
+
+    def start(self, call_id, timeout=None):
+        token = CancellationToken(
+            None if timeout is None else time.monotonic() + timeout
+        )
+        if call_id is None:
+            return token
+        with self._lock:
+            if self._tombstones.pop(call_id, None) is not None:
+                token._cancelled = True
+            self._tokens[call_id] = token
+        return token
+
+    def finish(self, call_id):
+        with self._lock:
+            self._tokens.pop(call_id, None)
+
+    def cancel(self, call_id):
+        """
+        Return
+        ------
+        (bool): whether the call was in progress
+        """
+        with self._lock:
+            token = self._tokens.get(call_id, None)
+            if token is None:
+                now = time.monotonic()
+                self._tombstones = {
+                    tombstone_id: cancelled_at
+                    for (tombstone_id, cancelled_at) in self._tombstones.items()
+                    if now - cancelled_at < self.tombstone_ttl
+                }
+                self._tombstones[call_id] = now
+                return False
+        token.cancel()
+        return True
+
+    def in_progress(self):
+        with self._lock:
+            return len(self._tokens)
@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+import time
+import uuid
+
+
+class ServerFile(object):
+    """
+    Return a ServerFile from a method to offer the server-local file for
+    download, instead of returning its contents. The client receives a
+    `RemoteFile` with which to stream the file to disk.
+    """
+
+    def __init__(self, filepath, filename=None, delete_after=False):
+        """
+        :filepath str: the server-local file
+        :filename str|None: the name the client saves the file as, defaulting
+            to the basename of `filepath`
+        :delete_after bool: remove the file once the client releases it
+        """
+        self.filepath = filepath
+        self.filename = filename if filename is not None else os.path.basename(filepath)
+        self.delete_after = delete_after
+
+
+def file_etag(filepath):
+    """
+    Return
+    ------
+    (str): a validator of the file's content, which changes with its
+        modification time or size
+    """
+    stat = os.stat(filepath)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+class DownloadStore(object):
+    """
+    The ServerFiles offered for download, by file ID, until their client
+    releases them, the object that returned them is deregistered, or they
+    expire by age.
+    """
+
+    def __init__(self, max_age=None):
+        """
+        :max_age float|None: seconds after which `expire` releases a file
+            that has been neither offered nor downloaded since
+        """
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # {file_id: (ServerFile, object_id, time.monotonic())}
+        self._files = {}
+
+    def offer(self, server_file, object_id=None):
+        """
+        :object_id str|None: the object that returned the file, with whose
+            deregistration the file is released
+
+        Return
+        ------
+        (dict): the handle of the file {"id": , "filename": , "size": ,
+            "etag": }, the etag validating ranges of the file as offered
+        """
+        # a missing file raises here, before it is stored
+        size = os.path.getsize(server_file.filepath)
+        etag = file_etag(server_file.filepath)
+        file_id = uuid.uuid4().hex
+        with self._lock:
+            self._files[file_id] = (server_file, object_id, time.monotonic())
+        return {
+            "id": file_id,
+            "filename": server_file.filename,
+            "size": size,
+            "etag": etag,
+        }
+
+    def get(self, file_id):
+        with self._lock:
+            if file_id not in self._files:
+                raise KeyError(f"No file `{file_id}` is offered for download.")
+            (server_file, object_id, _) = self._files[file_id]
+            self._files[file_id] = (server_file, object_id, time.monotonic())
+            return server_file
+
+    def _remove(self, server_files):
+        for server_file in server_files:
+            if not server_file.delete_after:
+                continue
+            try:
+                os.remove(server_file.filepath)
+            except FileNotFoundError:
+                pass
+            except BaseException as err:
+                logger = logging.getLogger("remoteobjects_endpoints")
+                logger.error(
+                    f"Error removing downloaded file `{server_file.filepath}`: "
+                    f"{repr(err)}"
+                )
+
+    def _release_where(self, predicate):
+        # release the files whose (file_id, object_id, offered) satisfy it
+        with self._lock:
+            released = {
+                file_id: self._files.pop(file_id)[0]
+                for (file_id, (_, object_id, offered)) in list(self._files.items())
+                if predicate(file_id, object_id, offered)
+            }
+        self._remove(released.values())
+        return list(released.keys())
+
+    def release(self, file_ids):
+        """
+        Return
+        ------
+        (list): the file_ids released
+        """
+        with self._lock:
+            released = {
+                file_id: self._files.pop(file_id)[0]
+                for file_id in file_ids
+                if file_id in self._files
+            }
+        self._remove(released.values())
+        return list(released.keys())
+
+    def release_object(self, object_id):
+        """
+        Release the files that the object returned.
+        """
+        self._release_where(
+            lambda file_id, file_object_id, offered: file_object_id == object_id
+        )
+
+    def expire(self):
+        """
+        Return
+        ------
+        (int): the count of files unused for `max_age` that were released
+        """
+        if self.max_age is None:
+            return 0
+        oldest = time.monotonic() - self.max_age
+        return len(
+            self._release_where(lambda file_id, object_id, offered: offered < oldest)
+        )
+
+    def stats(self):
+        with self._lock:
+            return {"files": len(self._files), "max_age": self.max_age}
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                expired = self.expire()
+                if expired > 0:
+                    logger = logging.getLogger("remoteobjects_endpoints")
+                    logger.info(f"Released {expired} expired downloadable files.")
+            except BaseException as err:
+                logger = logging.getLogger("remoteobjects_endpoints")
+                logger.error(f"Error expiring downloadable files: {repr(err)}")
+
+    def start_sweeper(self, interval):
+        """
+        Expire files every `interval` seconds from a background thread.
+        """
+        threading.Thread(
+            target=self._run,
+            args=(interval,),
+            name="remoteobjects_download_sweeper",
+            daemon=True,
+        ).start()
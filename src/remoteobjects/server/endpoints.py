@@ -1,11 +1,18 @@
-from flask import request
+from flask import current_app, request, Response, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_restful import Resource, Api
-from werkzeug.utils import secure_filename
 import re
 import os.path
-from datetime import datetime
+import base64
+import hashlib
+import hmac
+import json
 from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import math
+import threading
+import time
 import traceback
 
 logger = logging.getLogger("remoteobjects_endpoints")
@@ -28,16 +35,36 @@ def captureLoggingOutput(logger, stringIoObject):
     return handler
 
 
-from .object_registry import ObjectRegistry
+from .object_registry import ObjectRegistry, StaleHandleError
+from .registry_snapshot import RegistrySnapshot
+from .upload_store import UploadStore, UploadQuotaError
+from .download_store import DownloadStore, ServerFile, file_etag
+from .admission import AdmissionControl, AdmissionError
+from .cancellation import CallTracker, CallCancelled, _current_call
+from ..client.rest_client import RestClient
+from ..codecs import CodecJSONEncoder, CodecJSONDecoder
+from ..single_flight import SingleFlight
 from .. import __VERSION__
 
 __REMOTE_OBJECT_REGISTRY__ = None
+__REGISTRY_SNAPSHOT__ = None
 __REMOTE_OBJECT_SEMAPHORES__ = {}
+__ADMISSION_CONTROL__ = AdmissionControl()
+__CALL_TRACKER__ = CallTracker()
 
 __UPLOAD_DIRECTORY__ = "/tmp"
 __ALLOWED_EXTENSION_REGEX__ = r".*"
 
-__UPLOADED_FILE_DICT__ = {}
+__UPLOAD_STORE__ = None
+__DOWNLOAD_STORE__ = DownloadStore()
+
+__MIGRATION_KEY__ = None
+__MIGRATION_PEERS__ = None
+# the attribute reads in flight, shared by identical reads, if COALESCE_READS
+__READ_FLIGHTS__ = None
+
+__BROADCAST_MAX_WORKERS__ = None
+__BROADCAST_EXECUTOR__ = None
 
 
 def _str_object_attribute(object_id, attribute_path):
@@ -46,6 +73,265 @@ def _str_object_attribute(object_id, attribute_path):
     return object_id
 
 
+def _is_value(value):
+    # values that are returned as is, instead of as a registered-object handle
+    return (
+        value is None
+        or ObjectRegistry.class_is_primitive(value.__class__)
+        or isinstance(value, (list, tuple, dict))
+    )
+
+
+def _register_handle(value, owner_objid):
+    return {
+        "id": __REMOTE_OBJECT_REGISTRY__.register_object(value, owner_objid),
+        "object_str": ObjectRegistry._object_str(value),
+        "lease_ttl": __REMOTE_OBJECT_REGISTRY__.lease_ttl,
+    }
+
+
+def _object_lock_held(object_id):
+    # the async server acquires the locks of a request's objects before
+    # dispatching the request, and releases them after the response (also
+    # of an object renamed or migrated meanwhile)
+    held_locks = request.environ.get("remoteobjects.held_locks", {})
+    if object_id in held_locks:
+        return True
+    lock = __REMOTE_OBJECT_SEMAPHORES__.get(object_id)
+    return lock is not None and any(held is lock for held in held_locks.values())
+
+
+def _admission_rejection(err):
+    logger = logging.getLogger("remoteobjects_endpoints")
+    logger.warning(f"Rejected request: {err}")
+    return (
+        {
+            "error": str(err),
+            "message": "Server busy, retry later",
+            "traceback": "None",
+            "retry_after": err.retry_after,
+        },
+        err.status,
+        {"Retry-After": str(math.ceil(err.retry_after))},
+    )
+
+
+def _cancelled_response(err):
+    return {
+        "error": str(err),
+        "message": "Call dropped before it started",
+        "traceback": "None",
+    }, 408
+
+
+def _moved_response(object_id, server_uri):
+    # the object was migrated (see RemoteObjectEndpoint_Migrate): its client
+    # proxies follow it to its new server
+    return {
+        "error": f"Object `{object_id}` has migrated to `{server_uri}`.",
+        "message": "Object moved",
+        "traceback": "None",
+        "moved_to": server_uri,
+    }, 421
+
+
+def _request_holder(func_name=None, attribute_path=None):
+    # describes the request to the locks it holds and waits on (see
+    # `ObjectLock.profile`)
+    return {
+        "verb": request.method,
+        "path": request.path,
+        "func_name": func_name or request.args.get("func_name", None),
+        "attribute_path": attribute_path or request.args.get("attribute_path", None),
+    }
+
+
+def _acquire_object(object_id, cancellation_token=None, holder=None):
+    """
+    Return
+    ------
+    (tuple|None): the rejection's (body, status, headers) if the request was
+        not admitted to the object (see AdmissionControl), or was cancelled
+        while it waited, else None
+    """
+    moved_to = __REMOTE_OBJECT_REGISTRY__.obj_forwarded(object_id)
+    if moved_to is not None:
+        return _moved_response(object_id, moved_to)
+    if not _object_lock_held(object_id):
+        lock = __REMOTE_OBJECT_SEMAPHORES__[object_id]
+        if holder is None:
+            holder = _request_holder()
+        try:
+            __ADMISSION_CONTROL__.acquire(lock, cancellation_token, holder)
+        except AdmissionError as err:
+            return _admission_rejection(err)
+        except CallCancelled as err:
+            return _cancelled_response(err)
+        request.environ.setdefault("remoteobjects.acquired_locks", {})[object_id] = (
+            lock,
+            holder,
+        )
+        # the object may have migrated while the request waited on it
+        moved_to = __REMOTE_OBJECT_REGISTRY__.obj_forwarded(object_id)
+        if moved_to is not None:
+            _release_object(object_id)
+            return _moved_response(object_id, moved_to)
+    if cancellation_token is not None and cancellation_token.cancelled:
+        _release_object(object_id)
+        return _cancelled_response(CallCancelled("Call cancelled."))
+    return None
+
+
+def _start_call(call_id, timeout=None):
+    """
+    :param float timeout: seconds after which the call is dropped, else the
+        request's `timeout` argument
+
+    Return
+    ------
+    (tuple): the call's (CancellationToken, callable that finishes it). The
+        async server starts (and finishes) the calls it dispatches, to drop
+        them while they wait on the object.
+    """
+    cancellation_token = request.environ.get("remoteobjects.cancellation_token", None)
+    if cancellation_token is not None:
+        return cancellation_token, lambda: None
+    if timeout is None:
+        timeout = request.args.get("timeout", default=None, type=float)
+    cancellation_token = __CALL_TRACKER__.start(call_id, timeout)
+    return cancellation_token, lambda: __CALL_TRACKER__.finish(call_id)
+
+
+def _release_object(object_id):
+    if not _object_lock_held(object_id):
+        # the lock acquired, which a migration removes from the semaphores
+        acquired = request.environ.get("remoteobjects.acquired_locks", {}).pop(
+            object_id, None
+        )
+        if acquired is not None:
+            acquired[0].release()
+        else:
+            __REMOTE_OBJECT_SEMAPHORES__[object_id].release()
+
+
+def _hand_over_object(object_id):
+    # the object's lock is no longer the request's to release
+    request.environ.get("remoteobjects.acquired_locks", {}).pop(object_id, None)
+
+
+def _release_leaked_locks(exception=None):
+    """
+    Release the object locks that a request left held as it ended, reporting
+    the error path that leaked them.
+    """
+    acquired_locks = request.environ.pop("remoteobjects.acquired_locks", {})
+    for (object_id, (lock, holder)) in acquired_locks.items():
+        if lock.holder() is not holder:
+            continue
+        logger = logging.getLogger("remoteobjects_endpoints")
+        logger.error(
+            f"Request {holder} left the lock of object `{object_id}` held"
+            + (f" (on {repr(exception)})" if exception is not None else "")
+        )
+        lock.leaks += 1
+        lock.release()
+
+
+def _arg_bool(value):
+    return value.lower() in ["true", "1"]
+
+
+def _start_log_capture(obj):
+    if not hasattr(obj, "logger"):
+        return None
+    tmp_logging = StringIO()
+    return captureLoggingOutput(getattr(obj, "logger"), tmp_logging), tmp_logging
+
+
+def _release_log_capture(obj, log_capture):
+    if log_capture is None:
+        return None
+    log_handler, tmp_logging = log_capture
+    log_handler.close()
+    getattr(obj, "logger").removeHandler(log_handler)
+    return tmp_logging.getvalue()
+
+
+class _StreamEnd(object):
+    """
+    Ends a streamed call once: releases its log capture and the object's
+    semaphore (unless `object_lock` is None, as the async server releases
+    it itself), and calls `finish_call()`. It is called both as the stream
+    ends and as its response is closed, since a response closed before the
+    stream started (e.g. as the client disconnected) never runs the stream.
+    """
+
+    def __init__(self, obj, log_capture, object_lock=None, finish_call=None):
+        self._lock = threading.Lock()
+        self._ended = False
+        self._obj = obj
+        self._log_capture = log_capture
+        self._object_lock = object_lock
+        self._finish_call = finish_call
+
+    def logs(self):
+        with self._lock:
+            (log_capture, self._log_capture) = (self._log_capture, None)
+        return _release_log_capture(self._obj, log_capture)
+
+    def __call__(self):
+        with self._lock:
+            if self._ended:
+                return
+            self._ended = True
+            (log_capture, self._log_capture) = (self._log_capture, None)
+        try:
+            _release_log_capture(self._obj, log_capture)
+        finally:
+            if self._object_lock is not None:
+                self._object_lock.release()
+            if self._finish_call is not None:
+                self._finish_call()
+
+
+def _stream_return(return_iterator, message, stream_end, cancellation_token=None):
+    """
+    Yield newline-delimited JSON records of `{"value": item}` for each item
+    of the method's return, so neither end has to hold the whole return in
+    memory. An error mid-iteration is sent as a final error record, and
+    captured logs follow the values. The stream stops early if the call is
+    cancelled, and is ended by `stream_end` (see _StreamEnd).
+    """
+    try:
+        try:
+            for item in return_iterator:
+                yield json.dumps({"value": item}, cls=CodecJSONEncoder) + "\n"
+                if cancellation_token is not None:
+                    cancellation_token.raise_if_cancelled()
+        except Exception as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            logger.error(message)
+            yield json.dumps(
+                {
+                    "error": str(err),
+                    "message": message,
+                    "traceback": traceback.format_exc(),
+                }
+            ) + "\n"
+        logs = stream_end.logs()
+        if logs is not None:
+            yield json.dumps({"logs": logs}, cls=CodecJSONEncoder) + "\n"
+    finally:
+        stream_end()
+
+
+class _CodecJSONProvider(DefaultJSONProvider):
+    # decodes the request bodies with the codec registry
+    def loads(self, s, **kwargs):
+        kwargs.setdefault("cls", CodecJSONDecoder)
+        return super().loads(s, **kwargs)
+
+
 class RemoteObjectEndpoint_Upload(Resource):
     @staticmethod
     def _allowed_file(filename):
@@ -54,22 +340,36 @@ class RemoteObjectEndpoint_Upload(Resource):
             is not None
         )
 
+    @staticmethod
+    def _namespace(namespace_dict):
+        return (
+            namespace_dict.get("client_id", None),
+            namespace_dict.get("object_id", None),
+        )
+
+    def get(self):
+        # return the usage of the upload store
+        return __UPLOAD_STORE__.stats(), 200
+
     def put(self):
+        namespace = self._namespace(request.args)
         file_key_to_path_dict = {}
         for file_key, file_obj in request.files.items():
             if self._allowed_file(file_obj.filename):
                 # argument was initially a filepath, but was uploaded
-                filename = secure_filename(file_obj.filename)
-                filepath = os.path.join(
-                    __UPLOAD_DIRECTORY__,
-                    "{}{}".format(
-                        datetime.now().strftime("%Y-%m-%d_%Hh%Mm%S_"), filename
-                    ),
-                )
-                file_obj.save(filepath)
-                file_key_to_path_dict[file_key] = filepath
+                try:
+                    file_key_to_path_dict[file_key] = __UPLOAD_STORE__.save(
+                        namespace, file_key, file_obj
+                    )
+                except UploadQuotaError as err:
+                    logger = logging.getLogger("remoteobjects_endpoints")
+                    logger.warning(str(err))
+                    return {
+                        "error": str(err),
+                        "message": f"Files uploaded: {file_key_to_path_dict}",
+                        "traceback": traceback.format_exc(),
+                    }, 413
             else:
-                __UPLOADED_FILE_DICT__.update(file_key_to_path_dict)
                 logger = logging.getLogger("remoteobjects_endpoints")
                 message = (
                     "Allowed extension regex "
@@ -82,21 +382,37 @@ class RemoteObjectEndpoint_Upload(Resource):
                     "traceback": "None",
                 }, 500
 
-        __UPLOADED_FILE_DICT__.update(file_key_to_path_dict)
         return {"files_uploaded": file_key_to_path_dict}, 200
 
     def delete(self):
+        """
+        Delete the `file_keys` of the namespace of the request's arguments,
+        or those of each of the `uploads` namespaces:
+            [{"client_id": , "object_id": , "file_keys": [...]},...]
+        """
         deleted_files_dict = {}
+        request_json = request.get_json(silent=True) or {}
+        uploads = []
         try:
-            for file_key in request.json["file_keys"]:
-                if file_key in __UPLOADED_FILE_DICT__:
-                    filepath = __UPLOADED_FILE_DICT__[file_key]
-                    os.remove(filepath)
-                    deleted_files_dict[file_key] = filepath
+            if "uploads" in request_json:
+                uploads = request_json["uploads"]
+            else:
+                uploads = [
+                    dict(
+                        request.args.items(),
+                        file_keys=request_json.get("file_keys", []),
+                    )
+                ]
+            for upload in uploads:
+                deleted_files_dict.update(
+                    __UPLOAD_STORE__.remove(
+                        self._namespace(upload), upload["file_keys"]
+                    )
+                )
         except BaseException as err:
             logger = logging.getLogger("remoteobjects_endpoints")
             logger.error(
-                f"Error deleting files: {request.json['file_keys']}\n"
+                f"Error deleting files: {uploads}\n"
                 f"\tFiles deleted: {deleted_files_dict}\n"
                 f"\tError: {repr(err)}"
             )
@@ -108,6 +424,51 @@ class RemoteObjectEndpoint_Upload(Resource):
         return {"files_removed": deleted_files_dict}, 200
 
 
+class RemoteObjectEndpoint_Download(Resource):
+    def get(self):
+        """
+        Send the offered file of `file_id` from disk, honouring Range and
+        conditional headers so that a client can resume a partial download.
+        Without a `file_id`, return the usage of the download store.
+        """
+        file_id = request.args.get("file_id", default=None, type=str)
+        if file_id is None:
+            return __DOWNLOAD_STORE__.stats(), 200
+        try:
+            server_file = __DOWNLOAD_STORE__.get(file_id)
+            # the etag of the offer validates the If-Range of resumed downloads
+            return send_file(
+                server_file.filepath,
+                as_attachment=True,
+                download_name=server_file.filename,
+                conditional=True,
+                etag=file_etag(server_file.filepath),
+            )
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = f"Error sending the file `{file_id}`"
+            logger.error(message)
+            return {
+                "error": str(err),
+                "message": message,
+                "traceback": traceback.format_exc(),
+            }, 500
+
+    def delete(self):
+        file_ids = (request.get_json(silent=True) or {}).get("file_ids", [])
+        try:
+            return {"files_released": __DOWNLOAD_STORE__.release(file_ids)}, 200
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = f"Error releasing the files {file_ids}"
+            logger.error(message)
+            return {
+                "error": str(err),
+                "message": message,
+                "traceback": traceback.format_exc(),
+            }, 500
+
+
 class RemoteObjectEndpoint_Signature(Resource):
     def get(self):
         class_key = request.args.get("class_key", default=None, type=str)
@@ -115,8 +476,19 @@ class RemoteObjectEndpoint_Signature(Resource):
         attribute_path = request.args.get("attribute_path", default=None, type=str)
 
         if class_key is not None:
-            # return the {method_name: method_signature...} of the class
+            # return the {method_name: method_signature...} of the class's
+            # __init__, or of all its methods (with their return annotations)
+            all_methods = request.args.get("all_methods", default=False, type=_arg_bool)
             try:
+                if all_methods:
+                    return {
+                        "methods": __REMOTE_OBJECT_REGISTRY__.class_signature(
+                            class_key
+                        ),
+                        "returns": __REMOTE_OBJECT_REGISTRY__.class_return_annotations(
+                            class_key
+                        ),
+                    }, 200
                 return {
                     "methods": __REMOTE_OBJECT_REGISTRY__.class_init_signature(
                         class_key
@@ -134,6 +506,9 @@ class RemoteObjectEndpoint_Signature(Resource):
         elif object_id is not None:
             # return the {method_name: method_signature...} of the registered
             # object
+            moved_to = __REMOTE_OBJECT_REGISTRY__.obj_forwarded(object_id)
+            if moved_to is not None:
+                return _moved_response(object_id, moved_to)
             try:
                 return (
                     __REMOTE_OBJECT_REGISTRY__.obj_signature(object_id, attribute_path),
@@ -190,7 +565,10 @@ class RemoteObjectEndpoint_Registry(Resource):
                     class_key, self._arg_dict(request)
                 )
 
-                return {"id": object_id}, 200
+                return {
+                    "id": object_id,
+                    "lease_ttl": __REMOTE_OBJECT_REGISTRY__.lease_ttl,
+                }, 200
             except BaseException as err:
                 logger = logging.getLogger("remoteobjects_endpoints")
                 message = f"Error registering a new object `{class_key}({self._arg_dict(request)})`"
@@ -202,36 +580,62 @@ class RemoteObjectEndpoint_Registry(Resource):
                 }, 500
         else:  # object_id is not None:
             # return the value of the object's attribute
-            __REMOTE_OBJECT_SEMAPHORES__[object_id].acquire()
-            try:
-                value = __REMOTE_OBJECT_REGISTRY__.obj_attribute(
-                    object_id, attribute_path
-                )
-                if ObjectRegistry.class_is_primitive(value.__class__):
-                    return_pair = ({"value": value}, 200)
-                else:
-                    return_pair = (ObjectRegistry._obj_signature(value), 200)
-            except BaseException as err:
-                logger = logging.getLogger("remoteobjects_endpoints")
-                message = f"Error getting an object's attribute `{_str_object_attribute(object_id, attribute_path)}`"
-                logger.error(message)
-                return_pair = (
-                    {
-                        "error": str(err),
-                        "message": message,
-                        "traceback": traceback.format_exc(),
-                    },
-                    500,
+            if __READ_FLIGHTS__ is None or _object_lock_held(object_id):
+                # (the async server coalesces reads before acquiring the lock)
+                return_pair, acquired = self._read_attribute(object_id, attribute_path)
+                leader = True
+            else:
+                # identical reads share the read in flight, which is done after
+                # they arrived: the flight ends before the object is released,
+                # so before any later write to it
+                (return_pair, acquired), leader = __READ_FLIGHTS__.do(
+                    (object_id, attribute_path),
+                    lambda: self._read_attribute(object_id, attribute_path),
+                    object_id,
                 )
-            __REMOTE_OBJECT_SEMAPHORES__[object_id].release()
-            return return_pair[0], return_pair[1]
+            if leader and acquired:
+                _release_object(object_id)
+            return return_pair
+
+    @staticmethod
+    def _read_attribute(object_id, attribute_path):
+        """
+        Return
+        ------
+        (tuple): the response's (body, status[, headers]), and whether the
+            object was acquired (for the caller to release)
+        """
+        rejection = _acquire_object(object_id)
+        if rejection is not None:
+            return rejection, False
+        try:
+            value = __REMOTE_OBJECT_REGISTRY__.obj_attribute(object_id, attribute_path)
+            if ObjectRegistry.class_is_primitive(value.__class__):
+                return_pair = ({"value": value}, 200)
+            else:
+                return_pair = (ObjectRegistry._obj_signature(value), 200)
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = f"Error getting an object's attribute `{_str_object_attribute(object_id, attribute_path)}`"
+            logger.error(message)
+            return_pair = (
+                {
+                    "error": str(err),
+                    "message": message,
+                    "traceback": traceback.format_exc(),
+                },
+                500,
+            )
+        return return_pair, True
 
     def put(self):
         object_id = request.args.get("object_id", default=None, type=str)
         attribute_path = request.args.get("attribute_path", default=None, type=str)
         if object_id is not None and attribute_path is not None:
             # set the value of the object's attribute
-            __REMOTE_OBJECT_SEMAPHORES__[object_id].acquire()
+            rejection = _acquire_object(object_id)
+            if rejection is not None:
+                return rejection
             try:
                 __REMOTE_OBJECT_REGISTRY__.obj_attribute_set(
                     object_id, attribute_path, request.json["value"]
@@ -249,7 +653,7 @@ class RemoteObjectEndpoint_Registry(Resource):
                     },
                     500,
                 )
-            __REMOTE_OBJECT_SEMAPHORES__[object_id].release()
+            _release_object(object_id)
             return return_pair[0], return_pair[1]
         return {
             "errror": (
@@ -261,14 +665,71 @@ class RemoteObjectEndpoint_Registry(Resource):
         }, 500
 
     def post(self):
+        # a call's client may cancel it by its `call_id` (see
+        # RemoteObjectEndpoint_Cancel), or give a `timeout` after which it
+        # abandons the call
+        cancellation_token, finish_call = _start_call(
+            request.args.get("call_id", default=None, type=str)
+        )
+        response = None
+        try:
+            response = self._call(cancellation_token, finish_call)
+        finally:
+            if not isinstance(response, Response):
+                finish_call()  # else the stream finishes the call
+        return response
+
+    def _call(self, cancellation_token, finish_call):
         object_id = request.args.get("object_id", type=str)
         func_name = request.args.get("func_name", type=str)
         attribute_path = request.args.get("attribute_path", default=None, type=str)
+        stream = request.args.get("stream", default=False, type=_arg_bool)
+        return_handle = request.args.get(
+            "return_handle", default=False, type=_arg_bool
+        )
+        # a method handle (see `ObjectRegistry.resolve_method_handle`) skips
+        # the traversal of the attribute path
+        handle = request.args.get("handle", default=None, type=str)
+        resolve_handle = request.args.get(
+            "resolve_handle", default=False, type=_arg_bool
+        )
 
-        __REMOTE_OBJECT_SEMAPHORES__[object_id].acquire()
+        if handle is not None:
+            try:
+                method_handle = __REMOTE_OBJECT_REGISTRY__.method_handle(handle)
+            except StaleHandleError as err:
+                return {
+                    "error": str(err),
+                    "message": f"Stale handle for `{_str_object_attribute(object_id, attribute_path)}.{func_name}`",
+                    "traceback": traceback.format_exc(),
+                }, 410
+            object_id = method_handle["object_id"]
+            attribute_path = method_handle["attribute_path"]
+            func_name = method_handle["func_name"]
+
+        resolved_handle = None
+        rejection = _acquire_object(
+            object_id,
+            cancellation_token,
+            _request_holder(func_name, attribute_path),
+        )
+        if rejection is not None:
+            return rejection
         try:
-            obj = __REMOTE_OBJECT_REGISTRY__.obj_attribute(object_id, attribute_path)
+            if handle is None and resolve_handle and not stream:
+                handle = (
+                    resolved_handle
+                ) = __REMOTE_OBJECT_REGISTRY__.resolve_method_handle(
+                    object_id, func_name, attribute_path
+                )
+            if handle is not None:
+                obj = __REMOTE_OBJECT_REGISTRY__.method_handle(handle)["object"]
+            else:
+                obj = __REMOTE_OBJECT_REGISTRY__.obj_attribute(
+                    object_id, attribute_path
+                )
         except BaseException as err:
+            _release_object(object_id)
             logger = logging.getLogger("remoteobjects_endpoints")
             message = f"Error accessing an object's attribute: `{_str_object_attribute(object_id, attribute_path)}`"
             logger.error(message)
@@ -276,25 +737,63 @@ class RemoteObjectEndpoint_Registry(Resource):
                 "error": str(err),
                 "message": message,
                 "traceback": traceback.format_exc(),
-            }, 500
-
-        if hasattr(obj, "logger"):
-            tmp_logging = StringIO()
-            log_handler = captureLoggingOutput(getattr(obj, "logger"), tmp_logging)
+            }, (410 if isinstance(err, StaleHandleError) else 500)
 
+        log_capture = _start_log_capture(obj)
         method_arguments = self._arg_dict(request)
         try:
-            return_pair = (
-                {
-                    "return": __REMOTE_OBJECT_REGISTRY__.obj_call_method(
+            with _current_call(cancellation_token):
+                if handle is not None:
+                    method_return = __REMOTE_OBJECT_REGISTRY__.call_method_handle(
+                        handle, method_arguments
+                    )
+                else:
+                    method_return = __REMOTE_OBJECT_REGISTRY__.obj_call_method(
                         object_id,
                         func_name,
                         method_arguments,
                         attribute_path=attribute_path,
                     )
-                },
-                200,
-            )
+            if stream:
+                # the stream takes over the log capture and the semaphore
+                stream_end = _StreamEnd(
+                    obj,
+                    log_capture,
+                    object_lock=(
+                        None
+                        if _object_lock_held(object_id)
+                        else request.environ["remoteobjects.acquired_locks"][object_id][
+                            0
+                        ]
+                    ),
+                    finish_call=finish_call,
+                )
+                _hand_over_object(object_id)
+                response = Response(
+                    _stream_return(
+                        iter(method_return),
+                        f"Error streaming an object's method return: `{_str_object_attribute(object_id, attribute_path)}.{func_name}({method_arguments})`",
+                        stream_end,
+                        cancellation_token=cancellation_token,
+                    ),
+                    mimetype="application/x-ndjson",
+                )
+                response.call_on_close(stream_end)
+                return response
+            if isinstance(method_return, ServerFile):
+                return_pair = (
+                    {"return_file": __DOWNLOAD_STORE__.offer(method_return, object_id)},
+                    200,
+                )
+            elif return_handle and not _is_value(method_return):
+                return_pair = (
+                    {"return_handle": _register_handle(method_return, object_id)},
+                    200,
+                )
+            else:
+                return_pair = ({"return": method_return}, 200)
+            if resolved_handle is not None:
+                return_pair[0]["handle"] = resolved_handle
         except BaseException as err:
             logger = logging.getLogger("remoteobjects_endpoints")
             message = f"Error calling an object's method: `{_str_object_attribute(object_id, attribute_path)}.{func_name}({method_arguments})`"
@@ -308,18 +807,19 @@ class RemoteObjectEndpoint_Registry(Resource):
                 500,
             )
 
-        if hasattr(obj, "logger"):
-            log_handler.close()
-            getattr(obj, "logger").removeHandler(log_handler)
-            return_pair[0]["logs"] = tmp_logging.getvalue()
+        logs = _release_log_capture(obj, log_capture)
+        if logs is not None:
+            return_pair[0]["logs"] = logs
 
-        __REMOTE_OBJECT_SEMAPHORES__[object_id].release()
+        _release_object(object_id)
         return return_pair[0], return_pair[1]
 
     def patch(self):
         object_id = request.args.get("object_id", type=str)
         new_id = request.args.get("new_id", type=str)
-        __REMOTE_OBJECT_SEMAPHORES__[object_id].acquire()
+        rejection = _acquire_object(object_id)
+        if rejection is not None:
+            return rejection
         try:
             new_id = __REMOTE_OBJECT_REGISTRY__.obj_set_id(object_id, new_id)
             return_pair = ({"id": new_id}, 200)
@@ -336,11 +836,15 @@ class RemoteObjectEndpoint_Registry(Resource):
                 },
                 500,
             )
-        __REMOTE_OBJECT_SEMAPHORES__[object_id].release()
+        _release_object(object_id)
         return return_pair[0], return_pair[1]
 
     def delete(self):
         object_id = request.args.get("object_id", type=str)
+        if object_id is None:
+            return self._delete_many(self._arg_dict(request).get("object_ids", []))
+        if __REMOTE_OBJECT_REGISTRY__.obj_forwarded(object_id) is not None:
+            return self._delete_many([object_id])
         try:
             __REMOTE_OBJECT_REGISTRY__.deregister_object(object_id)
             return_pair = ({}, 200)
@@ -358,31 +862,672 @@ class RemoteObjectEndpoint_Registry(Resource):
             )
         return return_pair[0], return_pair[1]
 
+    @staticmethod
+    def _delete_many(object_ids):
+        deregistered = []
+        errors = {}
+        # the migrated objects are deregistered from their new servers
+        forwarded = _forwarded_object_ids(object_ids)
+        for (server_uri, forwarded_ids) in forwarded.items():
+            try:
+                response = RestClient(server_uri)._delete(
+                    "remoteobjects/registry", data={"object_ids": forwarded_ids}
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(response.content)
+                response_json = response.json()
+                deregistered += response_json["deregistered"]
+                errors.update(response_json["errors"])
+                for object_id in forwarded_ids:
+                    __REMOTE_OBJECT_REGISTRY__.drop_forward(object_id)
+            except BaseException as err:
+                errors.update({object_id: str(err) for object_id in forwarded_ids})
+        for object_id in object_ids:
+            if __REMOTE_OBJECT_REGISTRY__.obj_forwarded(object_id) is not None:
+                continue
+            try:
+                __REMOTE_OBJECT_REGISTRY__.deregister_object(object_id)
+                deregistered.append(object_id)
+            except BaseException as err:
+                errors[object_id] = str(err)
+        if len(errors) > 0:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            logger.warning(f"Error deregistering objects: {errors}")
+        return {"deregistered": deregistered, "errors": errors}, 200
+
+
+class RemoteObjectEndpoint_Pipeline(Resource):
+    def post(self):
+        request_json = request.get_json(silent=True) or {}
+        steps = request_json.get("steps", [])
+        outputs = request_json.get("outputs", None)
+        return_handles = request_json.get("return_handles", False)
+        atomic = request_json.get("atomic", False)
+        try:
+            object_ids = ObjectRegistry.pipeline_object_ids(steps)
+            if len(object_ids) == 1:
+                # e.g. the transaction of a proxy, which follows its object
+                moved_to = __REMOTE_OBJECT_REGISTRY__.obj_forwarded(object_ids[0])
+                if moved_to is not None:
+                    return _moved_response(object_ids[0], moved_to)
+            for object_id in object_ids:
+                __REMOTE_OBJECT_REGISTRY__.get_registered_object(object_id)
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = f"Error validating pipeline: `{steps}`"
+            logger.error(message)
+            return {
+                "error": str(err),
+                "message": message,
+                "traceback": traceback.format_exc(),
+            }, 500
+
+        # acquire in a consistent order, so concurrent pipelines cannot deadlock
+        for (index, object_id) in enumerate(object_ids):
+            rejection = _acquire_object(object_id)
+            if rejection is not None:
+                for acquired_id in object_ids[:index]:
+                    _release_object(acquired_id)
+                return rejection
+        try:
+            step_returns = __REMOTE_OBJECT_REGISTRY__.execute_pipeline(
+                steps, outputs, atomic=atomic
+            )
+            return_pair = ({"returns": {}, "return_handles": {}}, 200)
+            step_object_ids = {
+                step.get("id", str(index)): step["object_id"]
+                for (index, step) in enumerate(steps)
+            }
+            for (step_id, step_return) in step_returns.items():
+                if return_handles and not _is_value(step_return):
+                    return_pair[0]["return_handles"][step_id] = _register_handle(
+                        step_return, step_object_ids[step_id]
+                    )
+                else:
+                    return_pair[0]["returns"][step_id] = step_return
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = f"Error executing pipeline: `{steps}`"
+            logger.error(message)
+            return_pair = (
+                {
+                    "error": str(err),
+                    "message": message,
+                    "traceback": traceback.format_exc(),
+                },
+                500,
+            )
+        for object_id in object_ids:
+            _release_object(object_id)
+        return return_pair[0], return_pair[1]
+
+
+class RemoteObjectEndpoint_Broadcast(Resource):
+    @staticmethod
+    def _call_object_method(
+        object_id, func_name, method_arguments, attribute_path, call_id, timeout
+    ):
+        # as a call of RemoteObjectEndpoint_Registry, in a request context of
+        # its own
+        if object_id not in __REMOTE_OBJECT_SEMAPHORES__ and (
+            __REMOTE_OBJECT_REGISTRY__.obj_forwarded(object_id) is None
+        ):
+            return {
+                "error": str(
+                    NotImplementedError(f"No registered object for `{object_id}`.")
+                ),
+                "message": f"Error accessing object `{object_id}`",
+                "traceback": "None",
+            }
+
+        cancellation_token, finish_call = _start_call(call_id, timeout)
+        try:
+            rejection = _acquire_object(
+                object_id,
+                cancellation_token,
+                _request_holder(func_name, attribute_path),
+            )
+            if rejection is not None:
+                return rejection[0]
+            obj = None
+            log_capture = None
+            try:
+                obj = __REMOTE_OBJECT_REGISTRY__.obj_attribute(
+                    object_id, attribute_path
+                )
+                log_capture = _start_log_capture(obj)
+                with _current_call(cancellation_token):
+                    result = {
+                        "return": __REMOTE_OBJECT_REGISTRY__.obj_call_method(
+                            object_id,
+                            func_name,
+                            method_arguments,
+                            attribute_path=attribute_path,
+                        )
+                    }
+            except BaseException as err:
+                logger = logging.getLogger("remoteobjects_endpoints")
+                message = f"Error calling an object's method: `{_str_object_attribute(object_id, attribute_path)}.{func_name}({method_arguments})`"
+                logger.error(message)
+                result = {
+                    "error": str(err),
+                    "message": message,
+                    "traceback": traceback.format_exc(),
+                }
+            logs = _release_log_capture(obj, log_capture)
+            if logs is not None:
+                result["logs"] = logs
+            _release_object(object_id)
+            return result
+        finally:
+            finish_call()
+
+    @staticmethod
+    def object_ids(request_json):
+        # the IDs of the broadcast's objects
+        if request_json.get("object_ids", None) is not None:
+            return request_json["object_ids"]
+        return __REMOTE_OBJECT_REGISTRY__.class_object_ids(
+            request_json.get("class_key", None)
+        )
+
+    @classmethod
+    def call_in_context(cls, flask_app, environ, request_json, object_id):
+        """
+        Call the object's method, in a request context of its own (of the
+        broadcast's `environ`), so that the lock it leaves held is released
+        as it ends (see `_release_leaked_locks`).
+
+        Return
+        ------
+        (dict): the call's result
+        """
+        environ = {
+            key: value
+            for (key, value) in environ.items()
+            if key != "remoteobjects.acquired_locks"
+        }
+        with flask_app.request_context(environ):
+            return cls._call_object_method(
+                object_id,
+                request_json.get("func_name", None),
+                {
+                    **request_json.get("args", {}),
+                    **request_json.get("per_object_args", {}).get(object_id, {}),
+                },
+                request_json.get("attribute_path", None),
+                request_json.get("call_ids", {}).get(object_id, None),
+                request_json.get("timeout", None),
+            )
+
+    def post(self):
+        """
+        Call the same method of many objects, on a thread pool. The objects
+        are those of `object_ids`, or else all those of `class_key`. Each
+        object's arguments are the shared `args` updated by its entry in
+        `per_object_args`. Each call is dropped if it waits on its object
+        beyond `timeout` seconds, or is cancelled by its entry in `call_ids`
+        (see RemoteObjectEndpoint_Cancel). The result of an object that
+        migrated is the forward of RemoteObjectEndpoint_Registry, with its
+        `moved_to`.
+        """
+        request_json = request.get_json(silent=True) or {}
+        try:
+            object_ids = self.object_ids(request_json)
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = f"Error getting the objects of class `{request_json.get('class_key', None)}`"
+            logger.error(message)
+            return {
+                "error": str(err),
+                "message": message,
+                "traceback": traceback.format_exc(),
+            }, 500
+
+        flask_app = current_app._get_current_object()
+        futures = {
+            object_id: __BROADCAST_EXECUTOR__.submit(
+                self.call_in_context,
+                flask_app,
+                request.environ,
+                request_json,
+                object_id,
+            )
+            for object_id in object_ids
+        }
+        return {
+            "results": {
+                object_id: future.result() for (object_id, future) in futures.items()
+            }
+        }, 200
+
+
+def _forwarded_object_ids(object_ids):
+    """
+    Return
+    ------
+    (dict): {server_uri: [object_id]} of the objects migrated to other servers
+    """
+    forwarded = {}
+    for object_id in object_ids:
+        server_uri = __REMOTE_OBJECT_REGISTRY__.obj_forwarded(object_id)
+        if server_uri is not None:
+            forwarded.setdefault(server_uri, []).append(object_id)
+    return forwarded
+
+
+class RemoteObjectEndpoint_Lease(Resource):
+    def put(self):
+        # renew the leases of the objects, and forward the renewals of the
+        # migrated objects to their new servers
+        object_ids = (request.get_json(silent=True) or {}).get("object_ids", [])
+        unknown = __REMOTE_OBJECT_REGISTRY__.renew_leases(object_ids)
+        for (server_uri, forwarded_ids) in _forwarded_object_ids(unknown).items():
+            try:
+                response = RestClient(server_uri)._put(
+                    "remoteobjects/lease", data={"object_ids": forwarded_ids}
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(response.content)
+                forwarded_unknown = response.json()["unknown"]
+            except BaseException as err:
+                logger = logging.getLogger("remoteobjects_endpoints")
+                logger.warning(
+                    f"Failed to forward the lease renewals of {forwarded_ids} to "
+                    f"`{server_uri}`: {repr(err)}"
+                )
+                continue
+            unknown = [
+                object_id
+                for object_id in unknown
+                if object_id not in forwarded_ids or object_id in forwarded_unknown
+            ]
+        return {
+            "unknown": unknown,
+            "lease_ttl": __REMOTE_OBJECT_REGISTRY__.lease_ttl,
+        }, 200
+
+    def patch(self):
+        # pin (or unpin) the object, exempting it from expiry and eviction
+        object_id = request.args.get("object_id", type=str)
+        pinned = request.args.get("pinned", default=True, type=_arg_bool)
+        try:
+            __REMOTE_OBJECT_REGISTRY__.obj_pin(object_id, pinned)
+            return {"pinned": pinned}, 200
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = f"Error pinning object: `{object_id}`"
+            logger.error(message)
+            return {
+                "error": str(err),
+                "message": message,
+                "traceback": traceback.format_exc(),
+            }, 500
+
+
+def _reap_expired_leases(registry, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            expired = registry.expire_leases()
+            if len(expired) > 0:
+                logger = logging.getLogger("remoteobjects_endpoints")
+                logger.info(f"Deregistered objects with expired leases: {expired}")
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            logger.error(f"Error expiring leases: {repr(err)}")
+
+
+class RemoteObjectEndpoint_Snapshot(Resource):
+    def put(self):
+        # take a registry snapshot now
+        if __REGISTRY_SNAPSHOT__ is None:
+            return {
+                "error": str(RuntimeError("No SNAPSHOT_DIRECTORY is configured.")),
+                "message": "Error taking a registry snapshot",
+                "traceback": "None",
+            }, 500
+        try:
+            written, removed = __REGISTRY_SNAPSHOT__.take()
+            return {"written": written, "removed": removed}, 200
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = "Error taking a registry snapshot"
+            logger.error(message)
+            return {
+                "error": str(err),
+                "message": message,
+                "traceback": traceback.format_exc(),
+            }, 500
+
+
+class RemoteObjectEndpoint_Locks(Resource):
+    def get(self):
+        """
+        Profile the contention of the objects' locks: the `top` objects by
+        the time requests have waited on them, the requests that have been
+        waiting, or holding a lock, for longer than `threshold` seconds, and
+        the objects whose locks were left held by a request (and released).
+        """
+        top = request.args.get("top", default=10, type=int)
+        threshold = request.args.get("threshold", default=1.0, type=float)
+        profiles = [
+            dict(lock.profile(), object_id=object_id)
+            for (object_id, lock) in list(__REMOTE_OBJECT_SEMAPHORES__.items())
+        ]
+        profiles.sort(key=lambda profile: profile["wait_time"], reverse=True)
+        return {
+            "contended": profiles[:top],
+            "long_waits": [
+                dict(waiter, object_id=profile["object_id"])
+                for profile in profiles
+                for waiter in profile["waiters"]
+                if waiter["waited"] > threshold
+            ],
+            "long_holds": [
+                {
+                    "object_id": profile["object_id"],
+                    "holder": profile["holder"],
+                    "held_for": profile["held_for"],
+                }
+                for profile in profiles
+                if profile["held_for"] is not None and profile["held_for"] > threshold
+            ],
+            "leaks": {
+                profile["object_id"]: profile["leaks"]
+                for profile in profiles
+                if profile["leaks"] > 0
+            },
+        }, 200
+
+
+def _migration_signature(object_id, state, purpose=b"state"):
+    # signs the state sent by the source, and (with purpose b"imported") the
+    # target's acknowledgement of it, so that each proves it has the key
+    return hmac.new(
+        __MIGRATION_KEY__,
+        purpose + b"\n" + object_id.encode() + b"\n" + state,
+        hashlib.sha256,
+    ).hexdigest()
+
+
+class RemoteObjectEndpoint_Migrate(Resource):
+    """
+    Migrate objects between servers that share a MIGRATION_KEY, for objects
+    of snapshotable classes (see `ObjectRegistry.class_is_snapshotable`).
+    The target must acknowledge the import with the key before the source
+    forwards the object to it. Objects are only sent to the MIGRATION_PEERS
+    server uris: without them, the server migrates no objects (though it
+    imports those migrated to it).
+    """
+
+    def post(self):
+        # migrate the object to the server at `server_uri`, under the same ID,
+        # once the requests in flight on it are done. Those that then wait on
+        # it, and all later ones, are redirected to its new server.
+        object_id = request.args.get("object_id", type=str)
+        server_uri = request.args.get("server_uri", type=str)
+        if __MIGRATION_KEY__ is None:
+            return {
+                "error": "Migration is disabled: the server has no MIGRATION_KEY.",
+                "message": f"Error migrating object `{object_id}`",
+                "traceback": "None",
+            }, 500
+        if __MIGRATION_PEERS__ is None or server_uri not in __MIGRATION_PEERS__:
+            return {
+                "error": f"`{server_uri}` is not one of the MIGRATION_PEERS.",
+                "message": f"Error migrating object `{object_id}`",
+                "traceback": "None",
+            }, 500
+        rejection = _acquire_object(object_id, holder=_request_holder())
+        if rejection is not None:
+            return rejection
+        try:
+            exported = __REMOTE_OBJECT_REGISTRY__.export_object(object_id)
+            response = RestClient(server_uri)._put(
+                "remoteobjects/migrate",
+                data={
+                    "object_id": object_id,
+                    "state": base64.b64encode(exported["state"]).decode(),
+                    "pinned": exported["pinned"],
+                    "signature": _migration_signature(object_id, exported["state"]),
+                },
+            )
+            if response.status_code != 200:
+                raise RuntimeError(response.json())
+            acknowledgement = response.json().get("acknowledgement", None)
+            if not isinstance(acknowledgement, str) or not hmac.compare_digest(
+                _migration_signature(object_id, exported["state"], b"imported"),
+                acknowledgement,
+            ):
+                raise RuntimeError(
+                    f"`{server_uri}` did not acknowledge the import with the"
+                    " MIGRATION_KEY."
+                )
+            __REMOTE_OBJECT_REGISTRY__.forward_object(object_id, server_uri)
+            return_pair = ({"id": object_id, "server_uri": server_uri}, 200)
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = f"Error migrating object `{object_id}` to `{server_uri}`"
+            logger.error(message)
+            return_pair = (
+                {
+                    "error": str(err),
+                    "message": message,
+                    "traceback": traceback.format_exc(),
+                },
+                500,
+            )
+        _release_object(object_id)
+        return return_pair[0], return_pair[1]
+
+    def put(self):
+        # import an object migrated from another server
+        request_json = request.get_json(silent=True) or {}
+        object_id = request_json.get("object_id", None)
+        try:
+            if __MIGRATION_KEY__ is None:
+                raise RuntimeError(
+                    "Migration is disabled: the server has no MIGRATION_KEY."
+                )
+            state = base64.b64decode(request_json["state"])
+            if not hmac.compare_digest(
+                _migration_signature(object_id, state), request_json["signature"]
+            ):
+                raise RuntimeError("The migrated state's signature is invalid.")
+            __REMOTE_OBJECT_REGISTRY__.import_object(
+                object_id, state, pinned=request_json.get("pinned", False)
+            )
+            return {
+                "id": object_id,
+                "acknowledgement": _migration_signature(object_id, state, b"imported"),
+            }, 200
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = f"Error importing migrated object `{object_id}`"
+            logger.error(message)
+            return {
+                "error": str(err),
+                "message": message,
+                "traceback": traceback.format_exc(),
+            }, 500
+
+
+class RemoteObjectEndpoint_Stats(Resource):
+    def get(self):
+        # the server's load, cheap enough for clients to poll when choosing
+        # where to register objects (see remoteobjects.client.ServerPool)
+        return {
+            "objects": len(__REMOTE_OBJECT_REGISTRY__._registered_obj_dict),
+            "busy_objects": __REMOTE_OBJECT_REGISTRY__.busy_objects(),
+            "waiting": __ADMISSION_CONTROL__.stats()["waiting"],
+            "calls": __CALL_TRACKER__.in_progress(),
+            "memoization": __REMOTE_OBJECT_REGISTRY__.memoization_stats(),
+        }, 200
+
+
+class RemoteObjectEndpoint_Cancel(Resource):
+    def post(self):
+        # cancel the calls, whether they wait on their object or are running
+        call_ids = (request.get_json(silent=True) or {}).get("call_ids", [])
+        return {
+            "cancelled": [
+                call_id for call_id in call_ids if __CALL_TRACKER__.cancel(call_id)
+            ]
+        }, 200
+
 
 class RemoteObjectEndpoint_Version(Resource):
     def get(self):
-        return {"response": __VERSION__}, 200
+        # with the digest of the signatures of any `class_key` classes, for
+        # clients to check that their proxies are current
+        class_keys = request.args.getlist("class_key")
+        if len(class_keys) == 0:
+            return {"response": __VERSION__}, 200
+        try:
+            return {
+                "response": __VERSION__,
+                "signature_hash": __REMOTE_OBJECT_REGISTRY__.class_signature_hash(
+                    class_keys
+                ),
+            }, 200
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            message = f"Error hashing the signatures of `{class_keys}`"
+            logger.error(message)
+            return {
+                "error": str(err),
+                "message": message,
+                "traceback": traceback.format_exc(),
+            }, 500
 
 
 def addRemoteObjectResources(flask_app, class_list):
     global __REMOTE_OBJECT_REGISTRY__
+    global __REGISTRY_SNAPSHOT__
     global __UPLOAD_DIRECTORY__
     global __ALLOWED_EXTENSION_REGEX__
+    global __UPLOAD_STORE__
+    global __DOWNLOAD_STORE__
+    global __BROADCAST_MAX_WORKERS__
+    global __BROADCAST_EXECUTOR__
+    global __ADMISSION_CONTROL__
+    global __MIGRATION_KEY__
+    global __MIGRATION_PEERS__
+    global __READ_FLIGHTS__
 
     if "UPLOAD_DIRECTORY" in flask_app.config:
         __UPLOAD_DIRECTORY__ = flask_app.config["UPLOAD_DIRECTORY"]
     if "ALLOWED_EXTENSION_REGEX" in flask_app.config:
         __ALLOWED_EXTENSION_REGEX__ = flask_app.config["ALLOWED_EXTENSION_REGEX"]
+    __UPLOAD_STORE__ = UploadStore(
+        __UPLOAD_DIRECTORY__,
+        max_namespace_files=flask_app.config.get("UPLOAD_MAX_NAMESPACE_FILES", None),
+        max_namespace_bytes=flask_app.config.get("UPLOAD_MAX_NAMESPACE_BYTES", None),
+        max_total_files=flask_app.config.get("UPLOAD_MAX_TOTAL_FILES", None),
+        max_total_bytes=flask_app.config.get("UPLOAD_MAX_TOTAL_BYTES", None),
+        max_age=flask_app.config.get("UPLOAD_MAX_AGE", None),
+    )
+    if __UPLOAD_STORE__.max_age is not None:
+        __UPLOAD_STORE__.start_sweeper(
+            flask_app.config.get("UPLOAD_SWEEP_INTERVAL", __UPLOAD_STORE__.max_age / 4)
+        )
+
+    __DOWNLOAD_STORE__ = DownloadStore(
+        max_age=flask_app.config.get("DOWNLOAD_MAX_AGE", None)
+    )
+    if __DOWNLOAD_STORE__.max_age is not None:
+        __DOWNLOAD_STORE__.start_sweeper(
+            flask_app.config.get(
+                "DOWNLOAD_SWEEP_INTERVAL", __DOWNLOAD_STORE__.max_age / 4
+            )
+        )
+
+    if "BROADCAST_MAX_WORKERS" in flask_app.config:
+        __BROADCAST_MAX_WORKERS__ = flask_app.config["BROADCAST_MAX_WORKERS"]
+
+    __BROADCAST_EXECUTOR__ = ThreadPoolExecutor(
+        max_workers=__BROADCAST_MAX_WORKERS__,
+        thread_name_prefix="remoteobjects_broadcast",
+    )
+
+    if flask_app.config.get("COALESCE_READS", False):
+        __READ_FLIGHTS__ = SingleFlight()
+
+    if flask_app.config.get("MIGRATION_KEY", None) is not None:
+        __MIGRATION_KEY__ = flask_app.config["MIGRATION_KEY"]
+        if isinstance(__MIGRATION_KEY__, str):
+            __MIGRATION_KEY__ = __MIGRATION_KEY__.encode()
+    if flask_app.config.get("MIGRATION_PEERS", None) is not None:
+        __MIGRATION_PEERS__ = list(flask_app.config["MIGRATION_PEERS"])
+
+    __ADMISSION_CONTROL__ = AdmissionControl(
+        max_object_waiters=flask_app.config.get("OBJECT_MAX_WAITERS", None),
+        max_total_waiters=flask_app.config.get("MAX_WAITERS", None),
+        max_wait=flask_app.config.get("OBJECT_MAX_WAIT", None),
+        retry_after=flask_app.config.get("RETRY_AFTER", 1.0),
+    )
 
     __REMOTE_OBJECT_REGISTRY__ = ObjectRegistry(
-        class_list, __REMOTE_OBJECT_SEMAPHORES__
+        class_list,
+        __REMOTE_OBJECT_SEMAPHORES__,
+        lease_ttl=flask_app.config.get("OBJECT_LEASE_TTL", None),
+        max_registered_objects=flask_app.config.get("MAX_REGISTERED_OBJECTS", None),
+        memoized_returns=flask_app.config.get("MEMOIZED_RETURNS", 128),
+        pure_methods=flask_app.config.get("PURE_METHODS", None),
+    )
+    __REMOTE_OBJECT_REGISTRY__.deregistration_callbacks.append(
+        __UPLOAD_STORE__.remove_object
+    )
+    __REMOTE_OBJECT_REGISTRY__.deregistration_callbacks.append(
+        __DOWNLOAD_STORE__.release_object
     )
 
+    if "SNAPSHOT_DIRECTORY" in flask_app.config:
+        __REGISTRY_SNAPSHOT__ = RegistrySnapshot(
+            __REMOTE_OBJECT_REGISTRY__, flask_app.config["SNAPSHOT_DIRECTORY"]
+        )
+        if flask_app.config.get("SNAPSHOT_RESTORE", True):
+            restored = __REGISTRY_SNAPSHOT__.restore()
+            logger = logging.getLogger("remoteobjects_endpoints")
+            logger.info(f"Restored objects from snapshot: {restored}")
+        if flask_app.config.get("SNAPSHOT_INTERVAL", None) is not None:
+            __REGISTRY_SNAPSHOT__.start(flask_app.config["SNAPSHOT_INTERVAL"])
+
+    if __REMOTE_OBJECT_REGISTRY__.lease_ttl is not None:
+        threading.Thread(
+            target=_reap_expired_leases,
+            args=(
+                __REMOTE_OBJECT_REGISTRY__,
+                flask_app.config.get(
+                    "LEASE_REAP_INTERVAL", __REMOTE_OBJECT_REGISTRY__.lease_ttl / 4
+                ),
+            ),
+            name="remoteobjects_lease_reaper",
+            daemon=True,
+        ).start()
+
+    flask_app.teardown_request(_release_leaked_locks)
+    # the values of the codec registry's types, in request and response bodies
+    flask_app.json = _CodecJSONProvider(flask_app)
+    flask_app.config.setdefault("RESTFUL_JSON", {}).setdefault("cls", CodecJSONEncoder)
+
     flask_api = Api(flask_app)
     flask_api.add_resource(
         RemoteObjectEndpoint_Signature, "/remoteobjects/registry/signature"
     )
     flask_api.add_resource(RemoteObjectEndpoint_Registry, "/remoteobjects/registry")
+    flask_api.add_resource(RemoteObjectEndpoint_Pipeline, "/remoteobjects/pipeline")
+    flask_api.add_resource(
+        RemoteObjectEndpoint_Broadcast, "/remoteobjects/broadcast"
+    )
+    flask_api.add_resource(RemoteObjectEndpoint_Lease, "/remoteobjects/lease")
+    flask_api.add_resource(RemoteObjectEndpoint_Snapshot, "/remoteobjects/snapshot")
     flask_api.add_resource(RemoteObjectEndpoint_Upload, "/remoteobjects/upload")
+    flask_api.add_resource(RemoteObjectEndpoint_Download, "/remoteobjects/download")
+    flask_api.add_resource(RemoteObjectEndpoint_Locks, "/remoteobjects/locks")
+    flask_api.add_resource(RemoteObjectEndpoint_Stats, "/remoteobjects/stats")
+    flask_api.add_resource(RemoteObjectEndpoint_Migrate, "/remoteobjects/migrate")
+    flask_api.add_resource(RemoteObjectEndpoint_Cancel, "/remoteobjects/cancel")
     flask_api.add_resource(RemoteObjectEndpoint_Version, "/remoteobjects/version")
     return flask_api, __REMOTE_OBJECT_REGISTRY__
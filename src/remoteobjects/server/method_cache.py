@@ -0,0 +1,75 @@
+import collections
+import threading
+
+
+def pure_method(func):
+    """
+    Mark a method as pure: its return is a function of its arguments and of
+    the state of its object, which it does not mutate. The ObjectRegistry
+    memoizes the returns of pure methods (see `ObjectRegistry.memoized_returns`).
+
+        class Catalogue:
+            @pure_method
+            def lookup(self, name):
+                ...
+    """
+    func.__remoteobjects_pure__ = True
+    return func
+
+
+class MethodCache(object):
+    """
+    A bounded LRU of the returns of an object's pure methods, keyed by the
+    attribute path, name and canonicalised arguments of each call.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._returns = collections.OrderedDict()
+        self._dropped = False
+
+    def get(self, key):
+        """
+        Return
+        ------
+        (tuple): (whether the key is cached, the cached return)
+        """
+        with self._lock:
+            if key not in self._returns:
+                return False, None
+            self._returns.move_to_end(key)
+            return True, self._returns[key]
+
+    def put(self, key, value):
+        """
+        Return
+        ------
+        (int): the change in the number of cached returns
+        """
+        with self._lock:
+            if self._dropped:
+                return 0  # by a call that raced the drop of the cache
+            count = len(self._returns)
+            self._returns[key] = value
+            self._returns.move_to_end(key)
+            while len(self._returns) > self.maxsize:
+                self._returns.popitem(last=False)
+            return len(self._returns) - count
+
+    def drop(self):
+        """
+        Empty the cache for good.
+
+        Return
+        ------
+        (int): the number of returns that were cached
+        """
+        with self._lock:
+            self._dropped = True
+            count = len(self._returns)
+            self._returns.clear()
+            return count
+
+    def __len__(self):
+        return len(self._returns)
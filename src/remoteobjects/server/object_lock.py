@@ -0,0 +1,220 @@
+import asyncio
+import collections
+import threading
+import time
+
+
+class _ThreadWaiter(object):
+    def __init__(self, holder=None):
+        self.granted = False
+        self.event = threading.Event()
+        self.holder = holder
+        self.since = time.monotonic()
+
+    def grant(self):
+        self.granted = True
+        self.event.set()
+        return True
+
+
+class _AsyncWaiter(object):
+    def __init__(self, loop, holder=None):
+        self.granted = False
+        self.loop = loop
+        self.future = loop.create_future()
+        self.holder = holder
+        self.since = time.monotonic()
+
+    def _set_result(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+    def grant(self):
+        if self.future.cancelled():
+            return False
+        self.granted = True
+        self.loop.call_soon_threadsafe(self._set_result)
+        return True
+
+
+class BusyCounter(object):
+    """
+    The number of the ObjectLocks sharing the counter that are held, kept as
+    they are acquired and released, rather than counted by polling them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, delta):
+        with self._lock:
+            self.count += delta
+
+
+class ObjectLock(object):
+    """
+    The lock of a registered object, which serialises the requests on it.
+    Threads acquire it like a `threading.Lock`, and coroutines await
+    `acquire_async`, so that a request waiting on a busy object does not
+    occupy a thread. Waiters are granted the lock in FIFO order, whichever
+    kind they are, and it may be released by a thread other than the one
+    that acquired it.
+
+    The lock profiles its contention: the time requests wait for it and hold
+    it, the length of its queue, and who (a `holder` dict describing the
+    request, e.g. {"verb": , "func_name": , "attribute_path": }) holds it and
+    waits on it. See `profile`.
+    """
+
+    def __init__(self, busy_counter=None):
+        """
+        :busy_counter BusyCounter|None: counts the lock while it is held
+        """
+        self._busy_counter = busy_counter
+        self._lock = threading.Lock()  # guards the state below
+        self._locked = False
+        self._waiters = collections.deque()
+        self._holder = None
+        self._held_since = None
+        self.acquisitions = 0
+        self.contended_acquisitions = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.hold_time = 0.0
+        self.max_hold_time = 0.0
+        self.max_queue_length = 0
+        self.leaks = 0
+
+    def locked(self):
+        return self._locked
+
+    def waiting(self):
+        """
+        The number of threads and coroutines waiting on the lock.
+        """
+        return len(self._waiters)
+
+    def holder(self):
+        return self._holder
+
+    def _take(self, holder, since=None):
+        # must hold self._lock: account for the acquisition of the lock
+        now = time.monotonic()
+        if not self._locked and self._busy_counter is not None:
+            self._busy_counter.add(1)
+        self._locked = True
+        self._holder = holder
+        self._held_since = now
+        self.acquisitions += 1
+        if since is not None:
+            wait_time = now - since
+            self.contended_acquisitions += 1
+            self.wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def _enqueue(self, waiter):
+        # must hold self._lock
+        self._waiters.append(waiter)
+        self.max_queue_length = max(self.max_queue_length, len(self._waiters))
+
+    def profile(self):
+        """
+        Return
+        ------
+        (dict): the lock's contention statistics, current holder and waiters
+        """
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "acquisitions": self.acquisitions,
+                "contended_acquisitions": self.contended_acquisitions,
+                "wait_time": self.wait_time,
+                "max_wait_time": self.max_wait_time,
+                "hold_time": self.hold_time,
+                "max_hold_time": self.max_hold_time,
+                "queue_length": len(self._waiters),
+                "max_queue_length": self.max_queue_length,
+                "leaks": self.leaks,
+                "holder": self._holder if self._locked else None,
+                "held_for": now - self._held_since if self._locked else None,
+                "waiters": [
+                    {"holder": waiter.holder, "waited": now - waiter.since}
+                    for waiter in self._waiters
+                ],
+            }
+
+    def acquire(self, blocking=True, timeout=-1, cancellation_token=None, holder=None):
+        """
+        :cancellation_token CancellationToken: stops the wait once cancelled
+        :holder dict: describes the acquiring request
+        """
+        with self._lock:
+            if not self._locked:
+                self._take(holder)
+                return True
+            if not blocking:
+                return False
+            waiter = _ThreadWaiter(holder)
+            self._enqueue(waiter)
+
+        if cancellation_token is not None:
+            cancellation_token.add_callback(waiter.event.set)
+        try:
+            waiter.event.wait(None if timeout < 0 else timeout)
+        finally:
+            if cancellation_token is not None:
+                cancellation_token.remove_callback(waiter.event.set)
+        with self._lock:
+            if waiter.granted:  # possibly between the timeout and now
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    async def acquire_async(self, holder=None):
+        with self._lock:
+            if not self._locked:
+                self._take(holder)
+                return True
+            waiter = _AsyncWaiter(asyncio.get_running_loop(), holder)
+            self._enqueue(waiter)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    # pass on the lock this waiter no longer wants
+                    self._release()
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            raise
+        return True
+
+    def release(self):
+        with self._lock:
+            if not self._locked:
+                raise RuntimeError("Release of an unlocked ObjectLock.")
+            self._release()
+
+    def _release(self):
+        # must hold self._lock: hand the lock over to the next waiter, if any
+        hold_time = time.monotonic() - self._held_since
+        self.hold_time += hold_time
+        self.max_hold_time = max(self.max_hold_time, hold_time)
+        while len(self._waiters) > 0:
+            waiter = self._waiters.popleft()
+            if waiter.grant():
+                self._take(waiter.holder, waiter.since)
+                return
+        self._locked = False
+        self._holder = None
+        if self._busy_counter is not None:
+            self._busy_counter.add(-1)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
@@ -1,7 +1,18 @@
 import types
+import collections.abc
+import copy
+import hashlib
 import inspect
+import json
+import pickle
 import re
 import threading
+import time
+import uuid
+
+from .method_cache import MethodCache
+from .object_lock import BusyCounter, ObjectLock
+from ..codecs import CODECS
 
 __PRIMITIVE_CLASSES__ = [
     str,
@@ -13,28 +24,102 @@ __PRIMITIVE_CLASSES__ = [
 ]
 
 
+class StaleHandleError(LookupError):
+    pass
+
+
 class ObjectRegistry(object):
-    def __init__(self, registration_class_objects, registration_semaphore_dict=None):
+    def __init__(
+        self,
+        registration_class_objects,
+        registration_semaphore_dict=None,
+        lease_ttl=None,
+        max_registered_objects=None,
+        memoized_returns=128,
+        pure_methods=None,
+    ):
         """
         :registration_class_objects list: {object_type} i.e.
             [cosmic_fengine.CosmicFengine,...]
 
         :registration_semaphore_dict dict|None:
-            Registrations, and ID changes, of objects are
-            reflected in the provided dictionary. However, the ObjectRegistry will
-            not acquire/release the semapohores. The internal dict should be used
-            by upstream code as it sees fit.
+            Registrations, and ID changes, of objects are reflected in the
+            provided dictionary, as ObjectLocks. However, the ObjectRegistry
+            will not acquire/release the semapohores, except to check that an
+            object is idle before it is expired or evicted. The internal dict
+            should be used by upstream code as it sees fit.
+
+        :lease_ttl float|None:
+            Seconds that a registration (or renewal) leases an object for,
+            after which `expire_leases` deregisters it. None disables leases.
+
+        :max_registered_objects int|None:
+            Registering beyond this count first evicts the least recently
+            accessed object that is idle and not pinned.
+
+        :memoized_returns int:
+            The returns of pure methods (see `method_is_pure`) memoized per
+            object, least recently used first out. 0 disables memoization.
+
+        :pure_methods dict|None: {class_name: [method_name,...]}
+            Methods that are pure, besides those marked by `pure_method`.
         """
         self._abstract_class_key_dict = {
             abs_obj.__name__: abs_obj for abs_obj in registration_class_objects
         }
         self._class_dict = {key: 0 for key in self._abstract_class_key_dict.keys()}
         self._registered_obj_dict = {}
+        # {id(obj): objid} of registered objects, to deduplicate by identity
+        self._registered_objid_dict = {}
         self._registered_sem_dict = registration_semaphore_dict
+        self._registration_lock = threading.RLock()
+        self.lease_ttl = lease_ttl
+        self.max_registered_objects = max_registered_objects
+        self._lease_expiry_dict = {}  # {objid: time.monotonic() of expiry}
+        self._last_access_dict = {}  # {objid: time.monotonic() of last access}
+        self._pinned_objids = set()
+        # objids possibly mutated since they were last snapshot
+        self._dirty_objids = set()
+        # called with the objid of each object deregistered
+        self.deregistration_callbacks = []
+        # {handle_id: {"object_id", "attribute_path", "func_name", "method"}}
+        self._method_handles = {}
+        # {(objid, attribute_path, func_name): handle_id}
+        self._method_handle_ids = {}
+        # {objid: server_uri} of the objects migrated to another server
+        self._forwarded_dict = {}
+        # the ownership groups of objects registered as the returns of the
+        # methods of others (see `register_object`), by their root object:
+        # {objid: root objid} and {root objid: frozenset of objids}
+        self._owner_objids = {}
+        self._owned_objids = {}
+        # the count of the objects' ObjectLocks that are held
+        self._busy_counter = BusyCounter()
+        self.memoized_returns = memoized_returns
+        self._pure_method_dict = {
+            class_name: frozenset(method_names)
+            for (class_name, method_names) in (pure_methods or {}).items()
+        }
+        self._method_caches = {}  # {objid: MethodCache}
+        self._memoization_lock = threading.Lock()
+        self._memoized = 0  # the returns in the method caches
+        self.memoization_hits = 0
+        self.memoization_misses = 0
 
     @staticmethod
     def class_is_primitive(class_obj):
-        return class_obj in __PRIMITIVE_CLASSES__
+        # including the types of the codec registry, which are passed by value
+        return class_obj in __PRIMITIVE_CLASSES__ or CODECS.encodes(class_obj)
+
+    @staticmethod
+    def class_is_snapshotable(class_obj):
+        """
+        Classes opt in to registry snapshots with a truthy
+        `__remoteobjects_snapshot__` class attribute. Their objects are
+        pickled, so the pickling protocol (e.g. `__getstate__` and
+        `__setstate__`) controls the state that is snapshot.
+        """
+        return getattr(class_obj, "__remoteobjects_snapshot__", False)
 
     @staticmethod
     def _object_str(obj):
@@ -124,6 +209,7 @@ class ObjectRegistry(object):
     def get_registered_object(self, objid):
         if objid not in self._registered_obj_dict:
             raise NotImplementedError("No registered object for `{}`.".format(objid))
+        self._last_access_dict[objid] = time.monotonic()
         return self._registered_obj_dict[objid]
 
     @staticmethod
@@ -167,7 +253,34 @@ class ObjectRegistry(object):
 
     def obj_attribute_set(self, objid, attribute_path, value):
         obj = self.get_registered_object(objid)
-        return self._obj_attribute_set(obj, attribute_path, value)
+        self._invalidate_method_handles(objid, attribute_path)
+        try:
+            return self._obj_attribute_set(obj, attribute_path, value)
+        finally:
+            self._mutated(objid)
+
+    def _group_objids(self, objid):
+        # the objids of the object's ownership group (see `register_object`)
+        root = self._owner_objids.get(objid, objid)
+        return [root, *self._owned_objids.get(root, ())]
+
+    def _mutated(self, objid):
+        # the object may have been mutated, and with it (as they may share
+        # state) the objects of its ownership group, which are to be snapshot
+        # again and whose memoized returns are stale
+        for group_objid in self._group_objids(objid):
+            self._dirty_objids.add(group_objid)
+            self._drop_method_cache(group_objid)
+
+    def _drop_method_cache(self, objid):
+        method_cache = self._method_caches.pop(objid, None)
+        if method_cache is not None:
+            self._count_memoized(-method_cache.drop())
+
+    def _count_memoized(self, delta):
+        if delta != 0:
+            with self._memoization_lock:
+                self._memoized += delta
 
     def obj_signature(self, objid, attribute_path=None):
         obj = self.get_registered_object(objid)
@@ -184,6 +297,74 @@ class ObjectRegistry(object):
             for method_name in ["__init__"]
         }
 
+    def _class_methods(self, class_key):
+        # the (name, function) of the class's instance methods, but for its
+        # special (dunder) methods, which proxies do not define: on a proxy's
+        # class, `__eq__` and `__repr__` say, would apply to the proxy itself
+        if class_key not in self._abstract_class_key_dict:
+            raise RuntimeError("No such class: `{}`".format(class_key))
+        class_obj = self._abstract_class_key_dict[class_key]
+        return [
+            (method_name, func)
+            for (method_name, func) in inspect.getmembers(class_obj, inspect.isfunction)
+            if not (method_name.startswith("__") and method_name.endswith("__"))
+            and not isinstance(
+                inspect.getattr_static(class_obj, method_name), staticmethod
+            )
+        ]
+
+    def class_signature(self, class_key):
+        """
+        Return
+        ------
+        (dict): {method_name: method_signature...} of the class's methods,
+            as bound to its instances (i.e. without `self`), besides that of
+            `__init__`, and but for its other special methods
+        """
+        signature = self.class_init_signature(class_key)
+        for (method_name, func) in self._class_methods(class_key):
+            parameters = self._get_function_args(func)
+            parameters.pop(next(iter(parameters)), None)  # self
+            signature[method_name] = parameters
+        return signature
+
+    def class_return_annotations(self, class_key):
+        """
+        Return
+        ------
+        (dict): {method_name: return annotation code-string} of the class's
+            methods (as in `class_signature`) that annotate their return
+        """
+        return_annotations = {}
+        for (method_name, func) in self._class_methods(class_key):
+            return_annotation = inspect.signature(func).return_annotation
+            if return_annotation is not inspect.Signature.empty:
+                return_annotations[method_name] = inspect.formatannotation(
+                    return_annotation
+                )
+        return return_annotations
+
+    def class_signature_hash(self, class_keys):
+        """
+        Return
+        ------
+        (str): a digest of the signatures of the classes, which changes with
+            any of them
+        """
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    class_key: [
+                        self.class_signature(class_key),
+                        self.class_return_annotations(class_key),
+                    ]
+                    for class_key in class_keys
+                },
+                sort_keys=True,
+                default=repr,
+            ).encode()
+        ).hexdigest()
+
     def obj_call_method(
         self, objid, method_name, method_args_dict=None, attribute_path=None
     ):
@@ -192,7 +373,491 @@ class ObjectRegistry(object):
         obj = self.get_registered_object(objid)
         if attribute_path is not None:
             obj = self._obj_attribute(obj, attribute_path)
-        return self._obj_call_method(obj, method_name, method_args_dict)
+        return self._memoized_call(
+            objid,
+            attribute_path,
+            obj,
+            method_name,
+            method_args_dict,
+            lambda: self._obj_call_method(obj, method_name, method_args_dict),
+        )
+
+    def method_is_pure(self, obj, method_name):
+        """
+        Methods are pure if marked by the `pure_method` decorator, or listed
+        for the object's class in the registry's `pure_methods`.
+        """
+        return method_name in self._pure_method_dict.get(
+            obj.__class__.__name__, ()
+        ) or getattr(getattr(obj, method_name, None), "__remoteobjects_pure__", False)
+
+    @staticmethod
+    def _memoization_key(attribute_path, method_name, func, method_args_dict):
+        # the arguments, with their defaults, in a canonical encoding
+        try:
+            arguments = inspect.signature(func).bind(**method_args_dict)
+            arguments.apply_defaults()
+            return (
+                attribute_path,
+                method_name,
+                json.dumps(arguments.arguments, sort_keys=True, cls=CODECS.JSONEncoder),
+            )
+        except (TypeError, ValueError):
+            # arguments that do not bind (so the call raises), or that are
+            # not encoded
+            return None
+
+    def _memoized_call(
+        self, objid, attribute_path, obj, method_name, method_args_dict, call
+    ):
+        """
+        Return the memoized return of a pure method, or else `call()`. The
+        call of a method that is not pure may mutate the object, so drops
+        the object's memoized returns.
+
+        Returns are memoized as deep copies, and a copy is returned on each
+        hit, so that a caller's mutation of a return (e.g. of a list, or of
+        an object registered for a `remobj_return_handle` call) does not
+        reach the memoized one. Iterators, which are consumed, and returns
+        that cannot be copied are not memoized.
+        """
+        if not self.method_is_pure(obj, method_name):
+            try:
+                return call()
+            finally:
+                self._mutated(objid)
+
+        if self.memoized_returns <= 0:
+            return call()
+        key = self._memoization_key(
+            attribute_path,
+            method_name,
+            getattr(obj, method_name),
+            method_args_dict,
+        )
+        if key is None:
+            return call()
+        method_cache = self._method_caches.get(objid, None)
+        if method_cache is None:
+            method_cache = self._method_caches.setdefault(
+                objid, MethodCache(self.memoized_returns)
+            )
+        (cached, value) = method_cache.get(key)
+        if cached:
+            self.memoization_hits += 1
+            return copy.deepcopy(value)
+        self.memoization_misses += 1
+        value = call()
+        if isinstance(value, collections.abc.Iterator):
+            return value
+        try:
+            self._count_memoized(method_cache.put(key, copy.deepcopy(value)))
+        except Exception:
+            pass  # not copied, so not memoized
+        return value
+
+    def memoization_stats(self):
+        """
+        Return
+        ------
+        (dict): {"hits", "misses", "memoized": the returns memoized now}
+        """
+        return {
+            "hits": self.memoization_hits,
+            "misses": self.memoization_misses,
+            "memoized": self._memoized,
+        }
+
+    def busy_objects(self):
+        """
+        Return
+        ------
+        (int): the number of objects whose ObjectLock is held
+        """
+        return self._busy_counter.count
+
+    def resolve_method_handle(self, objid, method_name, attribute_path=None):
+        """
+        Resolve the method of the object's attribute once, so that calls by
+        the returned handle skip the method lookup. Handles are invalidated
+        when an attribute set replaces any part of their path, and when their
+        object is deregistered or re-identified. As a method may also replace
+        part of the path, each use of a handle checks that its path still
+        reaches the same object (see `method_handle`).
+
+        Return
+        ------
+        (str): the handle_id
+        """
+        with self._registration_lock:
+            key = (objid, attribute_path, method_name)
+            if key in self._method_handle_ids:
+                try:
+                    self.method_handle(self._method_handle_ids[key])
+                    return self._method_handle_ids[key]
+                except StaleHandleError:
+                    pass  # resolved anew
+            obj = self.obj_attribute(objid, attribute_path)
+            if not hasattr(obj, method_name):
+                raise NotImplementedError(
+                    "Class `{}` does not implement `{}`".format(obj, method_name)
+                )
+            handle_id = uuid.uuid4().hex
+            self._method_handles[handle_id] = {
+                "object_id": objid,
+                "attribute_path": attribute_path,
+                "func_name": method_name,
+                "object": obj,
+                "method": getattr(obj, method_name),
+            }
+            self._method_handle_ids[key] = handle_id
+            return handle_id
+
+    def method_handle(self, handle_id):
+        """
+        Return
+        ------
+        (dict): {"object_id", "attribute_path", "func_name", "object", "method"}
+        """
+        method_handle = self._method_handles.get(handle_id)
+        if method_handle is None or not self._method_handle_current(method_handle):
+            raise StaleHandleError(
+                "Method handle `{}` is not (or no longer) valid.".format(handle_id)
+            )
+        return method_handle
+
+    def _method_handle_current(self, method_handle):
+        """
+        Check that the handle's attribute path still reaches its object,
+        invalidating the handle otherwise.
+        """
+        try:
+            obj = self._registered_obj_dict[method_handle["object_id"]]
+            if method_handle["attribute_path"] is not None:
+                obj = self._obj_attribute(obj, method_handle["attribute_path"])
+            if obj is method_handle["object"]:
+                return True
+        except (KeyError, AttributeError):
+            pass
+        with self._registration_lock:
+            key = (
+                method_handle["object_id"],
+                method_handle["attribute_path"],
+                method_handle["func_name"],
+            )
+            handle_id = self._method_handle_ids.get(key, None)
+            if (
+                handle_id is not None
+                and self._method_handles.get(handle_id) is method_handle
+            ):
+                self._method_handle_ids.pop(key)
+                self._method_handles.pop(handle_id)
+        return False
+
+    def call_method_handle(self, handle_id, method_args_dict=None):
+        if method_args_dict is None:
+            method_args_dict = {}
+        assert isinstance(method_args_dict, dict)
+        method_handle = self.method_handle(handle_id)
+        self._last_access_dict[method_handle["object_id"]] = time.monotonic()
+        return self._memoized_call(
+            method_handle["object_id"],
+            method_handle["attribute_path"],
+            method_handle["object"],
+            method_handle["func_name"],
+            method_args_dict,
+            lambda: method_handle["method"](**method_args_dict),
+        )
+
+    def _invalidate_method_handles(self, objid, attribute_path=None):
+        """
+        Invalidate the object's handles whose path passes through
+        `attribute_path`, or all of them if it is None.
+        """
+        with self._registration_lock:
+            for (key, handle_id) in list(self._method_handle_ids.items()):
+                if key[0] != objid:
+                    continue
+                handle_path = (
+                    key[2] if key[1] is None else "{}.{}".format(key[1], key[2])
+                )
+                if (
+                    attribute_path is None
+                    or handle_path == attribute_path
+                    or handle_path.startswith(attribute_path + ".")
+                ):
+                    self._method_handle_ids.pop(key)
+                    self._method_handles.pop(handle_id)
+
+    def _next_object_id(self, class_key):
+        with self._registration_lock:
+            objid = "{}#{}".format(
+                class_key, self._class_dict.setdefault(class_key, 0)
+            )
+            while objid in self._registered_obj_dict or objid in self._forwarded_dict:
+                self._class_dict[class_key] += 1
+                objid = "{}#{}".format(class_key, self._class_dict[class_key])
+            self._class_dict[class_key] += 1
+            return objid
+
+    def _register(self, objid, obj):
+        with self._registration_lock:
+            if (
+                self.max_registered_objects is not None
+                and len(self._registered_obj_dict) >= self.max_registered_objects
+            ):
+                self._evict_idle_object()
+            self._invalidate_method_handles(objid)
+            self._drop_method_cache(objid)
+            self._registered_obj_dict[objid] = obj
+            self._registered_objid_dict[id(obj)] = objid
+            self._last_access_dict[objid] = time.monotonic()
+            self._dirty_objids.add(objid)
+            if self.lease_ttl is not None:
+                self._lease_expiry_dict[objid] = time.monotonic() + self.lease_ttl
+            if self._registered_sem_dict is not None:
+                self._registered_sem_dict[objid] = ObjectLock(self._busy_counter)
+
+    def _deregister_if_idle(self, objid):
+        """
+        Deregister the object unless a request holds its semaphore.
+
+        Return
+        ------
+        (bool): whether the object was deregistered
+        """
+        if self._registered_sem_dict is None:
+            self.deregister_object(objid)
+            return True
+        semaphore = self._registered_sem_dict.get(objid)
+        if semaphore is None or not semaphore.acquire(blocking=False):
+            return False
+        try:
+            self.deregister_object(objid)
+        finally:
+            semaphore.release()
+        return True
+
+    def _evict_idle_object(self):
+        for objid in sorted(
+            self._registered_obj_dict.keys(),
+            key=lambda objid: self._last_access_dict.get(objid, 0),
+        ):
+            if objid not in self._pinned_objids and self._deregister_if_idle(objid):
+                return objid
+        raise RuntimeError(
+            "Registry is full ({} objects), with none idle and unpinned.".format(
+                self.max_registered_objects
+            )
+        )
+
+    def renew_leases(self, objids, now=None):
+        """
+        :now float|None: the time.monotonic() of the renewal (default: now)
+
+        Return
+        ------
+        (list): the objids that are not registered
+        """
+        if now is None:
+            now = time.monotonic()
+        unknown = []
+        expiry = now + (self.lease_ttl or 0)
+        with self._registration_lock:
+            for objid in objids:
+                if objid not in self._registered_obj_dict:
+                    unknown.append(objid)
+                elif self.lease_ttl is not None:
+                    self._lease_expiry_dict[objid] = expiry
+        return unknown
+
+    def expire_leases(self, now=None):
+        """
+        Deregister the idle objects whose leases have expired.
+
+        :now float|None: the time.monotonic() to expire the leases by
+            (default: now)
+
+        Return
+        ------
+        (list): the objids deregistered
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._registration_lock:
+            return [
+                objid
+                for (objid, expiry) in list(self._lease_expiry_dict.items())
+                if expiry < now
+                and objid not in self._pinned_objids
+                and self._deregister_if_idle(objid)
+            ]
+
+    def obj_pin(self, objid, pinned=True):
+        """
+        Pinned objects are neither expired nor evicted.
+        """
+        self.get_registered_object(objid)
+        if pinned:
+            self._pinned_objids.add(objid)
+        else:
+            self._pinned_objids.discard(objid)
+
+    @staticmethod
+    def _resolve_pipeline_references(value, step_returns):
+        if isinstance(value, dict):
+            if len(value) == 1 and "__remobj_step__" in value:
+                step_id = value["__remobj_step__"]
+                if step_id not in step_returns:
+                    raise RuntimeError(
+                        "Reference to step `{}` that is not an earlier step.".format(
+                            step_id
+                        )
+                    )
+                return step_returns[step_id]
+            return {
+                key: ObjectRegistry._resolve_pipeline_references(val, step_returns)
+                for (key, val) in value.items()
+            }
+        if isinstance(value, list):
+            return [
+                ObjectRegistry._resolve_pipeline_references(val, step_returns)
+                for val in value
+            ]
+        return value
+
+    @staticmethod
+    def pipeline_object_ids(steps):
+        return sorted(set(step["object_id"] for step in steps))
+
+    def _validate_pipeline_step(self, step):
+        obj = self.get_registered_object(step["object_id"])
+        attribute_path = step.get("attribute_path")
+        if "value" in step:
+            if attribute_path is None:
+                raise RuntimeError("An attribute set needs an `attribute_path`.")
+            self._traverse_attribute_path(obj, attribute_path)
+        elif attribute_path is not None:
+            obj = self._obj_attribute(obj, attribute_path)
+        if step.get("func_name") is not None:
+            func = getattr(obj, step["func_name"], None)
+            if not callable(func):
+                raise NotImplementedError(
+                    "Class `{}` does not implement `{}`".format(obj, step["func_name"])
+                )
+            inspect.signature(func).bind(**step.get("args", {}))
+
+    def _attribute_undo(self, objid, attribute_path):
+        # restores the attribute's current value (or absence from the object)
+        obj_leaf, attribute = self._traverse_attribute_path(
+            self.get_registered_object(objid), attribute_path
+        )
+        # through getattr and setattr, so also of `__slots__` and properties
+        had_value = hasattr(obj_leaf, attribute)
+        value = getattr(obj_leaf, attribute) if had_value else None
+
+        def undo():
+            if had_value:
+                setattr(obj_leaf, attribute, value)
+            else:
+                delattr(obj_leaf, attribute)
+            # the returns memoized since the set are of the undone state
+            self._mutated(objid)
+
+        return undo
+
+    def execute_pipeline(self, steps, outputs=None, atomic=False):
+        """
+        Execute a sequence of steps, each a method call (with a `func_name`),
+        an attribute set (with a `value`) or an attribute read, against
+        registered objects. Arguments may reference the return of an earlier
+        step with `{"__remobj_step__": step_id}`, so intermediate values
+        remain on the server.
+
+        :steps list: [{
+                ?'id': step_id (default: the step's index as a str),
+                'object_id': objid,
+                ?'attribute_path': attribute_path,
+                ?'func_name': method_name,
+                ?'args': method_args_dict,
+                ?'value': attribute_value
+            },...]
+        :outputs list|None: the step_ids whose returns are required
+            (default: the last step's)
+        :atomic bool: validate every step (its object, attribute path, method
+            and arguments) before executing any, and, should a step fail,
+            undo the attribute sets of the steps before it. Method calls are
+            not undone.
+
+        Return
+        ------
+        (dict): {step_id: return}
+        """
+        if atomic:
+            for (index, step) in enumerate(steps):
+                try:
+                    self._validate_pipeline_step(step)
+                except BaseException as err:
+                    raise RuntimeError(
+                        "Pipeline step `{}` is invalid: {}".format(
+                            step.get("id", str(index)), repr(err)
+                        )
+                    ) from err
+
+        step_returns = {}
+        step_id = None
+        undos = []
+        for (index, step) in enumerate(steps):
+            step_id = step.get("id", str(index))
+            try:
+                if "value" in step:
+                    undo = (
+                        self._attribute_undo(step["object_id"], step["attribute_path"])
+                        if atomic
+                        else None
+                    )
+                    step_returns[step_id] = self.obj_attribute_set(
+                        step["object_id"],
+                        step["attribute_path"],
+                        self._resolve_pipeline_references(step["value"], step_returns),
+                    )
+                    if undo is not None:
+                        undos.append(undo)
+                elif step.get("func_name") is None:
+                    step_returns[step_id] = self.obj_attribute(
+                        step["object_id"], step.get("attribute_path")
+                    )
+                else:
+                    step_returns[step_id] = self.obj_call_method(
+                        step["object_id"],
+                        step["func_name"],
+                        self._resolve_pipeline_references(
+                            step.get("args", {}), step_returns
+                        ),
+                        attribute_path=step.get("attribute_path"),
+                    )
+            except BaseException as err:
+                # every undo is attempted, whichever fail
+                undo_errors = []
+                for undo in reversed(undos):
+                    try:
+                        undo()
+                    except BaseException as undo_err:
+                        undo_errors.append(repr(undo_err))
+                if len(undo_errors) > 0:
+                    undone = " (undoing the attribute sets before it failed: {})"
+                    undone = undone.format(", ".join(undo_errors))
+                elif len(undos) > 0:
+                    undone = " (the attribute sets before it were undone)"
+                else:
+                    undone = ""
+                raise RuntimeError(
+                    "Pipeline step `{}` failed: {}{}".format(step_id, repr(err), undone)
+                ) from err
+
+        if outputs is None:
+            outputs = [] if step_id is None else [step_id]
+        return {output: step_returns[output] for output in outputs}
 
     def register_new_object(self, class_key, args_dict=None):
         if args_dict is None:
@@ -200,14 +865,11 @@ class ObjectRegistry(object):
         if class_key not in self._abstract_class_key_dict:
             raise RuntimeError("No such class: `{}`".format(class_key))
         class_obj = self._abstract_class_key_dict[class_key]
-        objid = "{}#{}".format(class_key, self._class_dict[class_key])
+        objid = self._next_object_id(class_key)
         try:
-            self._registered_obj_dict[objid] = self._obj_call_method(
-                class_obj, "__init__", args_dict
+            self._register(
+                objid, self._obj_call_method(class_obj, "__init__", args_dict)
             )
-            self._class_dict[class_key] += 1
-            if self._registered_sem_dict is not None:
-                self._registered_sem_dict[objid] = threading.Semaphore()
         except NotImplementedError as err:
             raise err
         except RuntimeError as err:
@@ -215,6 +877,45 @@ class ObjectRegistry(object):
 
         return objid
 
+    def register_object(self, obj, owner_objid=None):
+        """
+        Register an existing object (e.g. the return of a method), returning
+        its ID. An object that is already registered is identified by its
+        identity and its existing ID is returned.
+
+        :owner_objid str|None: the object whose method returned it (e.g. an
+            attribute of it), which joins the owner's ownership group: the
+            mutation of any object of a group marks all of them as such, as
+            they may share state
+        """
+        with self._registration_lock:
+            if id(obj) in self._registered_objid_dict:
+                return self._registered_objid_dict[id(obj)]
+            objid = self._next_object_id(obj.__class__.__name__)
+            self._register(objid, obj)
+            self._join_group(objid, owner_objid)
+        return objid
+
+    def _join_group(self, objid, owner_objid):
+        # add the object to the ownership group of its owner, if registered
+        with self._registration_lock:
+            if owner_objid not in self._registered_obj_dict or owner_objid == objid:
+                return
+            root = self._owner_objids.get(owner_objid, owner_objid)
+            self._owner_objids[objid] = root
+            owned = self._owned_objids.get(root, frozenset())
+            self._owned_objids[root] = owned | {objid}
+
+    def class_object_ids(self, class_key):
+        if class_key not in self._abstract_class_key_dict:
+            raise RuntimeError("No such class: `{}`".format(class_key))
+        class_obj = self._abstract_class_key_dict[class_key]
+        return [
+            objid
+            for (objid, obj) in list(self._registered_obj_dict.items())
+            if isinstance(obj, class_obj)
+        ]
+
     def obj_set_id(self, objid, newid):
         if objid not in self._registered_obj_dict:
             raise NotImplementedError("No registered object for `{}`.".format(objid))
@@ -224,14 +925,119 @@ class ObjectRegistry(object):
                     newid, self._registered_obj_dict[newid]
                 )
             )
+        self._invalidate_method_handles(objid)
+        self._drop_method_cache(objid)
+        with self._registration_lock:
+            root = self._owner_objids.pop(objid, None)
+            if root is not None:
+                self._owner_objids[newid] = root
+                self._owned_objids[root] = self._owned_objids[root] - {objid} | {newid}
+            owned = self._owned_objids.pop(objid, None)
+            if owned is not None:
+                self._owned_objids[newid] = owned
+                for owned_objid in owned:
+                    self._owner_objids[owned_objid] = newid
         self._registered_obj_dict[newid] = self._registered_obj_dict.pop(objid)
+        self._registered_objid_dict[id(self._registered_obj_dict[newid])] = newid
+        for objid_dict in [self._lease_expiry_dict, self._last_access_dict]:
+            if objid in objid_dict:
+                objid_dict[newid] = objid_dict.pop(objid)
+        if objid in self._pinned_objids:
+            self._pinned_objids.remove(objid)
+            self._pinned_objids.add(newid)
+        self._dirty_objids.discard(objid)
+        self._dirty_objids.add(newid)
         if self._registered_sem_dict is not None:
             self._registered_sem_dict[newid] = self._registered_sem_dict.pop(objid)
         return newid
 
+    def export_object(self, objid):
+        """
+        Serialise the object for `import_object` on another server, like a
+        registry snapshot (see `class_is_snapshotable`). The caller holds the
+        object's semaphore, so that it is not mid-request.
+
+        Return
+        ------
+        (dict): {"state": the pickled object, "pinned": }
+        """
+        obj = self.get_registered_object(objid)
+        if not self.class_is_snapshotable(obj.__class__):
+            raise RuntimeError(
+                f"Objects of class `{obj.__class__.__name__}` cannot be migrated:"
+                " they are not snapshotable."
+            )
+        return {"state": pickle.dumps(obj), "pinned": objid in self._pinned_objids}
+
+    def import_object(self, objid, state, pinned=False):
+        """
+        Register the object exported by `export_object`, under its ID there.
+        The state must come from a trusted server, as it is unpickled.
+        """
+        with self._registration_lock:
+            if objid in self._registered_obj_dict:
+                raise RuntimeError(f"ID `{objid}` is already used.")
+            obj = pickle.loads(state)
+            if not self.class_is_snapshotable(obj.__class__):
+                raise RuntimeError(
+                    f"Objects of class `{obj.__class__.__name__}` cannot be migrated:"
+                    " they are not snapshotable."
+                )
+            # the object may be migrating back
+            self._forwarded_dict.pop(objid, None)
+            self._register(objid, obj)
+            if pinned:
+                self._pinned_objids.add(objid)
+        return objid
+
+    def forward_object(self, objid, server_uri):
+        """
+        Deregister the object, once it has been imported by the server at
+        `server_uri`, leaving a forward to it there.
+        """
+        with self._registration_lock:
+            if objid not in self._registered_obj_dict:
+                raise NotImplementedError(
+                    "No registered object for `{}`.".format(objid)
+                )
+            # forwarded first, so that no request finds the object missing
+            self._forwarded_dict[objid] = server_uri
+            self.deregister_object(objid)
+
+    def obj_forwarded(self, objid):
+        """
+        Return
+        ------
+        (str|None): the uri of the server the object was migrated to, if it
+            was
+        """
+        return self._forwarded_dict.get(objid, None)
+
+    def drop_forward(self, objid):
+        return self._forwarded_dict.pop(objid, None)
+
     def deregister_object(self, objid):
         if objid not in self._registered_obj_dict:
             raise NotImplementedError("No registered object for `{}`.".format(objid))
-        self._registered_obj_dict.pop(objid)
+        self._invalidate_method_handles(objid)
+        self._drop_method_cache(objid)
+        with self._registration_lock:
+            # the objects owned by the object each become their own root
+            root = self._owner_objids.pop(objid, None)
+            if root is not None:
+                owned = self._owned_objids[root] - {objid}
+                if len(owned) > 0:
+                    self._owned_objids[root] = owned
+                else:
+                    self._owned_objids.pop(root)
+            for owned_objid in self._owned_objids.pop(objid, ()):
+                self._owner_objids.pop(owned_objid, None)
+        self._registered_objid_dict.pop(id(self._registered_obj_dict.pop(objid)))
+        self._lease_expiry_dict.pop(objid, None)
+        self._last_access_dict.pop(objid, None)
+        self._pinned_objids.discard(objid)
+        self._dirty_objids.discard(objid)
         if self._registered_sem_dict is not None:
             self._registered_sem_dict.pop(objid)
+        for callback in self.deregistration_callbacks:
+            callback(objid)
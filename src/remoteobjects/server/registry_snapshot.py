@@ -0,0 +1,249 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+
+from .. import __VERSION__
+
+
+class RegistrySnapshot(object):
+    """
+    Checkpoint the snapshotable objects of an ObjectRegistry (see
+    `ObjectRegistry.class_is_snapshotable`) to a directory, along with their
+    IDs and the class counters, so that a restarted server can restore them
+    under the same IDs without re-running their constructors.
+
+    The objects are pickled by ownership group (see
+    `ObjectRegistry.register_object`), one file per group, so that an object
+    and the handles registered of its attributes still share them once
+    restored. Each group is pickled while the semaphores of its objects are
+    held, so never mid-request, and only the groups with an object
+    registered, deregistered or possibly mutated (by an attribute set or a
+    method call) since the previous snapshot are pickled again.
+    """
+
+    MANIFEST_FILENAME = "manifest.json"
+    GROUPS_DIRECTORY = "groups"
+
+    def __init__(self, registry, directory):
+        self.registry = registry
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._snapshot_groups = None  # {filename: [objid]} of the last snapshot
+
+    def _write_atomically(self, filepath, data):
+        with open(filepath + ".tmp", "wb") as fio:
+            fio.write(data)
+        os.replace(filepath + ".tmp", filepath)
+
+    @staticmethod
+    def _group_filename(root_objid):
+        return hashlib.sha256(root_objid.encode()).hexdigest() + ".pickle"
+
+    def _groups(self):
+        # {filename: [objid]} of the snapshotable objects, the group's root
+        # first
+        groups = {}
+        for (objid, obj) in list(self.registry._registered_obj_dict.items()):
+            if self.registry.class_is_snapshotable(obj.__class__):
+                root = self.registry._owner_objids.get(objid, objid)
+                groups.setdefault(root, []).append(objid)
+        return {
+            self._group_filename(root): sorted(
+                objids, key=lambda objid: (objid != root, objid)
+            )
+            for (root, objids) in groups.items()
+        }
+
+    def _pickle_group(self, objids):
+        """
+        Pickle the group's objects together, as one dict, while holding their
+        semaphores (acquired in the order of their IDs, as pipelines do).
+        Objects that cannot be pickled, or were deregistered meanwhile, are
+        left out.
+
+        Return
+        ------
+        (tuple): (the pickled {objid: obj}, [objid] pickled)
+        """
+        semaphores = []
+        if self.registry._registered_sem_dict is not None:
+            for objid in sorted(objids):
+                semaphore = self.registry._registered_sem_dict.get(objid)
+                if semaphore is not None:
+                    semaphore.acquire()
+                    semaphores.append(semaphore)
+        try:
+            objects = {
+                objid: self.registry._registered_obj_dict[objid]
+                for objid in objids
+                if objid in self.registry._registered_obj_dict
+            }
+            for objid in objects:
+                self.registry._dirty_objids.discard(objid)
+            try:
+                return pickle.dumps(objects), list(objects)
+            except BaseException:
+                pass
+            picklable = {}
+            for (objid, obj) in objects.items():
+                try:
+                    pickle.dumps(obj)
+                    picklable[objid] = obj
+                except BaseException as err:
+                    self.registry._dirty_objids.add(objid)
+                    logger = logging.getLogger("remoteobjects_endpoints")
+                    logger.error(f"Error snapshotting object `{objid}`: {repr(err)}")
+            return pickle.dumps(picklable), list(picklable)
+        except BaseException:
+            self.registry._dirty_objids.update(objids)
+            raise
+        finally:
+            for semaphore in semaphores:
+                semaphore.release()
+
+    def take(self):
+        """
+        Return
+        ------
+        (tuple): the count of objects (written, removed)
+        """
+        with self._lock:
+            groups = self._groups()
+            previous_groups = self._snapshot_groups or {}
+            changed = {
+                filename: objids
+                for (filename, objids) in groups.items()
+                if previous_groups.get(filename) != objids
+                or not self.registry._dirty_objids.isdisjoint(objids)
+            }
+            removed = set(previous_groups).difference(groups)
+            if self._snapshot_groups is not None and not (changed or removed):
+                return 0, 0
+
+            groups_directory = os.path.join(self.directory, self.GROUPS_DIRECTORY)
+            os.makedirs(groups_directory, exist_ok=True)
+            snapshot_groups = {
+                filename: objids
+                for (filename, objids) in previous_groups.items()
+                if filename in groups and filename not in changed
+            }
+            written = 0
+            for (filename, objids) in changed.items():
+                (data, snapshot_objids) = self._pickle_group(objids)
+                self._write_atomically(os.path.join(groups_directory, filename), data)
+                snapshot_groups[filename] = snapshot_objids
+                written += len(snapshot_objids)
+            snapshot_objids = [
+                objid for objids in snapshot_groups.values() for objid in objids
+            ]
+            self._write_atomically(
+                os.path.join(self.directory, self.MANIFEST_FILENAME),
+                json.dumps(
+                    {
+                        "version": __VERSION__,
+                        "class_counters": dict(self.registry._class_dict),
+                        "groups": snapshot_groups,
+                        "pinned": [
+                            objid
+                            for objid in self.registry._pinned_objids
+                            if objid in snapshot_objids
+                        ],
+                    }
+                ).encode(),
+            )
+            # the files of removed groups, once the manifest no longer lists
+            # them
+            for filename in removed:
+                try:
+                    os.remove(os.path.join(groups_directory, filename))
+                except FileNotFoundError:
+                    pass
+            self._snapshot_groups = snapshot_groups
+            previous_objids = {
+                objid for objids in previous_groups.values() for objid in objids
+            }
+            return written, len(previous_objids.difference(snapshot_objids))
+
+    def _load_group(self, filename):
+        # the {objid: obj} of the group's file, or {} if it is missing
+        filepath = os.path.join(self.directory, self.GROUPS_DIRECTORY, filename)
+        try:
+            with open(filepath, "rb") as fio:
+                return pickle.load(fio)
+        except FileNotFoundError:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            logger.error(
+                f"The snapshot file `{filepath}` is missing: its objects are not"
+                " restored."
+            )
+            return {}
+
+    def restore(self):
+        """
+        Register the objects of the directory's snapshot, if any, under their
+        snapshot IDs, in their ownership groups.
+
+        Return
+        ------
+        (list): the objids restored
+        """
+        manifest_filepath = os.path.join(self.directory, self.MANIFEST_FILENAME)
+        if not os.path.exists(manifest_filepath):
+            return []
+        with self._lock:
+            with open(manifest_filepath, "r") as fio:
+                manifest = json.load(fio)
+
+            restored = []
+            snapshot_groups = {}
+            for filename in manifest["groups"]:
+                objects = self._load_group(filename)
+                root = next(iter(objects), None)
+                snapshot_groups[filename] = []
+                for (objid, obj) in objects.items():
+                    try:
+                        self.registry._register(objid, obj)
+                        self.registry._join_group(objid, root)
+                        self.registry._dirty_objids.discard(objid)
+                        snapshot_groups[filename].append(objid)
+                        restored.append(objid)
+                    except BaseException as err:
+                        logger = logging.getLogger("remoteobjects_endpoints")
+                        logger.error(f"Error restoring object `{objid}`: {repr(err)}")
+            self._snapshot_groups = snapshot_groups
+
+            for (class_key, counter) in manifest["class_counters"].items():
+                self.registry._class_dict[class_key] = max(
+                    self.registry._class_dict.get(class_key, 0), counter
+                )
+            for objid in manifest["pinned"]:
+                if objid in self.registry._registered_obj_dict:
+                    self.registry._pinned_objids.add(objid)
+            return restored
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.take()
+            except BaseException as err:
+                logger = logging.getLogger("remoteobjects_endpoints")
+                logger.error(f"Error snapshotting registry: {repr(err)}")
+
+    def start(self, interval):
+        """
+        Take a snapshot every `interval` seconds from a background thread, and
+        at interpreter exit.
+        """
+        threading.Thread(
+            target=self._run,
+            args=(interval,),
+            name="remoteobjects_snapshot",
+            daemon=True,
+        ).start()
+        atexit.register(self.take)
@@ -0,0 +1,334 @@
+from werkzeug.wsgi import FileWrapper
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import unquote
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+from ..framing import (
+    FrameError,
+    SendWindow,
+    SharedMemoryChannel,
+    pack_frame,
+    recv_frame,
+)
+
+
+def _framed_environ(method, path, query_string, headers, body):
+    """
+    The environ of a framed request, as the Flask app's request context
+    reads it: the request's line, headers and body, without a WSGI server's.
+    """
+    environ = {
+        "REQUEST_METHOD": method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": unquote(path),
+        "QUERY_STRING": query_string,
+        "SERVER_NAME": "remoteobjects",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for (key, value) in dict(headers).items():
+        key = key.upper().replace("-", "_")
+        if key == "CONTENT_TYPE":
+            environ[key] = value
+        elif key != "CONTENT_LENGTH":
+            environ["HTTP_" + key] = value
+    return environ
+
+
+def _dispatch_framed_request(flask_app, environ):
+    """
+    Dispatch a framed request to the endpoint handler that its path routes
+    to, in a request context of the Flask app (so with the app's request
+    hooks, and its teardowns as the handler returns).
+
+    Return
+    ------
+    (tuple): the response's (status, [(header, value)...], iterable of
+        bytes), the iterable to be closed once sent
+    """
+    context = flask_app.request_context(environ)
+    error = None
+    try:
+        try:
+            context.push()
+            response = flask_app.full_dispatch_request()
+        except Exception as err:
+            error = err
+            response = flask_app.handle_exception(err)
+        return (
+            response.status_code,
+            response.get_wsgi_headers(environ).to_wsgi_list(),
+            response.get_app_iter(environ),
+        )
+    finally:
+        context.pop(error)
+
+
+class _Connection(object):
+    """
+    A client connection, over which frames of many requests are interleaved.
+    """
+
+    def __init__(self, sock, shm_kwargs=None):
+        self.sock = sock
+        self.shm_channel = None
+        if shm_kwargs is not None:
+            self.shm_channel = SharedMemoryChannel(self.send, **shm_kwargs)
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._windows = {}  # {request id being served: SendWindow}
+        self._cancelled = set()  # request ids whose responses are unwanted
+
+    def send(self, header, payload=b""):
+        with self._send_lock:
+            self.sock.sendall(pack_frame(header, payload, self.shm_channel))
+
+    def start(self, request_id, window=None):
+        with self._lock:
+            self._windows[request_id] = SendWindow(window)
+
+    def cancel(self, request_id):
+        with self._lock:
+            if request_id in self._windows:
+                self._cancelled.add(request_id)
+                self._windows[request_id].close()
+
+    def grant(self, request_id, credit):
+        with self._lock:
+            window = self._windows.get(request_id)
+        if window is not None:
+            window.grant(credit)
+
+    def take(self, request_id):
+        """
+        Wait for the client's credit of a body frame (see SendWindow).
+
+        Return
+        ------
+        (bool): False if the response was cancelled meanwhile
+        """
+        with self._lock:
+            window = self._windows.get(request_id)
+        return window is not None and window.take()
+
+    def is_cancelled(self, request_id):
+        with self._lock:
+            return request_id in self._cancelled
+
+    def done(self, request_id):
+        with self._lock:
+            self._windows.pop(request_id, None)
+            self._cancelled.discard(request_id)
+
+    def close(self):
+        # the client disconnected: its responses are no longer sent
+        with self._lock:
+            windows = list(self._windows.values())
+        for window in windows:
+            window.close()
+
+
+class _RemoteObjectSocketServerMixin(object):
+    """
+    Serve the remote-object resources of a Flask app over persistent socket
+    connections, as an alternative to HTTP. Each connection carries framed
+    requests and responses (see `remoteobjects.framing`) tagged with request
+    ids, so many calls can be in flight on one connection. Requests are
+    dispatched to the app's endpoint handlers from a thread pool, without a
+    WSGI round trip, so they are served by the same resources, and the same
+    ObjectRegistry, as HTTP requests.
+
+    A request frame's header is:
+        {"id": , "method": , "path": , "query": , "headers": {...},
+            ?"window": }
+    with the request body as its payload. A response is sent as one or more
+    frames with the header:
+        {"id": , ?"status": , ?"headers": {...}, "final": bool}
+    the first carrying the status and headers, and each carrying the next
+    chunk of the body. At most `window` frames but the final one are sent
+    ahead of the client, which grants more with `{"id": , "credit": n}` as
+    it consumes them (see SendWindow). A client may send
+    `{"id": , "cancel": true}` to stop a response mid-body.
+    """
+
+    daemon_threads = True
+    # the SharedMemoryChannel arguments of same-host servers
+    shm_kwargs = None
+    # files are sent in chunks of this many bytes
+    file_chunk_size = 1 << 20
+
+    def _init_executor(self, flask_app, max_workers):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="remoteobjects_socket"
+        )
+
+    def _file_wrapper(self, file, buffer_size=8192):
+        return FileWrapper(file, max(buffer_size, self.file_chunk_size))
+
+    def dispatch(self, connection, header, payload):
+        request_id = header["id"]
+        try:
+            environ = _framed_environ(
+                header["method"],
+                header["path"],
+                header.get("query", ""),
+                header.get("headers", {}),
+                payload,
+            )
+            environ["wsgi.file_wrapper"] = self._file_wrapper
+            status, headers, app_iter = _dispatch_framed_request(
+                self.flask_app, environ
+            )
+        except BaseException as err:
+            logger = logging.getLogger("remoteobjects_endpoints")
+            logger.error(f"Error dispatching socket request {header}: {repr(err)}")
+            connection.done(request_id)
+            connection.send(
+                {"id": request_id, "status": 500, "headers": {}, "final": True}
+            )
+            return
+
+        try:
+            response_header = {
+                "id": request_id,
+                "status": status,
+                "headers": dict(headers),
+            }
+            for chunk in app_iter:
+                if connection.is_cancelled(request_id):
+                    break
+                if len(chunk) == 0:
+                    continue
+                if not connection.take(request_id):
+                    break
+                connection.send(dict(response_header, final=False), chunk)
+                response_header = {"id": request_id}
+            connection.send(dict(response_header, final=True))
+        except OSError:
+            pass  # the client disconnected
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+            connection.done(request_id)
+
+
+class RemoteObjectSocketServer(
+    _RemoteObjectSocketServerMixin, socketserver.ThreadingTCPServer
+):
+    allow_reuse_address = True
+
+    def __init__(self, flask_app, host="0.0.0.0", port=6001, max_workers=None):
+        self._init_executor(flask_app, max_workers)
+        super().__init__((host, port), _RequestHandler)
+
+
+class RemoteObjectUnixSocketServer(
+    _RemoteObjectSocketServerMixin, socketserver.ThreadingUnixStreamServer
+):
+    """
+    Serve same-host clients (of a `unix://` server_uri) over a Unix domain
+    socket, passing payloads of at least `shm_threshold` bytes (and at most
+    `shm_segment_size`) through shared memory rather than through the socket.
+    """
+
+    def __init__(
+        self,
+        flask_app,
+        path,
+        max_workers=None,
+        shm_threshold=1 << 16,
+        shm_segment_size=1 << 22,
+    ):
+        self._init_executor(flask_app, max_workers)
+        self.shm_kwargs = {
+            "threshold": shm_threshold,
+            "segment_size": shm_segment_size,
+        }
+        # a file chunk fills a segment
+        self.file_chunk_size = shm_segment_size
+        if os.path.exists(path):
+            os.remove(path)  # a stale socket
+        super().__init__(path, _RequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        if self.request.family != socket.AF_UNIX:
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = _Connection(self.request, self.server.shm_kwargs)
+        try:
+            self._handle(connection)
+        finally:
+            connection.close()
+            if connection.shm_channel is not None:
+                connection.shm_channel.close()
+
+    def _handle(self, connection):
+        while True:
+            try:
+                frame = recv_frame(self.request, connection.shm_channel)
+            except FrameError as err:
+                logger = logging.getLogger("remoteobjects_endpoints")
+                logger.error(f"Closing socket connection: {repr(err)}")
+                return
+            if frame is None:
+                return
+            header, payload = frame
+            if header.get("cancel", False):
+                connection.cancel(header["id"])
+                continue
+            if "credit" in header:
+                connection.grant(header["id"], header["credit"])
+                continue
+            connection.start(header["id"], header.get("window", None))
+            try:
+                self.server.executor.submit(
+                    self.server.dispatch, connection, header, payload
+                )
+            except RuntimeError:
+                return  # the interpreter is shutting down
+
+
+def startRemoteObjectSocketServer(
+    flask_app, host="0.0.0.0", port=6001, unix_socket_path=None, **kwargs
+):
+    """
+    Serve the Flask app's remote-object resources over `tcp://host:port`,
+    or over `unix://{unix_socket_path}` if given, from a daemon thread. Call
+    after `addRemoteObjectResources`.
+
+    Return
+    ------
+    (RemoteObjectSocketServer|RemoteObjectUnixSocketServer): the server,
+        which `shutdown` stops
+    """
+    if unix_socket_path is not None:
+        server = RemoteObjectUnixSocketServer(flask_app, unix_socket_path, **kwargs)
+    else:
+        server = RemoteObjectSocketServer(flask_app, host=host, port=port, **kwargs)
+    threading.Thread(
+        target=server.serve_forever, name="remoteobjects_socket_server", daemon=True
+    ).start()
+    return server
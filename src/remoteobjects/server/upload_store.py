@@ -0,0 +1,261 @@
+from werkzeug.utils import secure_filename
+from datetime import datetime
+import logging
+import os
+import threading
+import time
+import uuid
+
+
+class UploadQuotaError(RuntimeError):
+    pass
+
+
+class UploadStore(object):
+    """
+    Files uploaded as method arguments, namespaced by the (client_id,
+    object_id) that uploaded them, with quotas on their count and size (per
+    namespace and in total) and expiry by age.
+    """
+
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(
+        self,
+        directory,
+        max_namespace_files=None,
+        max_namespace_bytes=None,
+        max_total_files=None,
+        max_total_bytes=None,
+        max_age=None,
+    ):
+        """
+        :directory str: where uploaded files are saved
+        :max_namespace_files int|None: files allowed per namespace
+        :max_namespace_bytes int|None: bytes allowed per namespace
+        :max_total_files int|None: files allowed in total
+        :max_total_bytes int|None: bytes allowed in total
+        :max_age float|None: seconds after which `expire` removes a file
+        """
+        self.directory = directory
+        self.max_namespace_files = max_namespace_files
+        self.max_namespace_bytes = max_namespace_bytes
+        self.max_total_files = max_total_files
+        self.max_total_bytes = max_total_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # {(client_id, object_id): {file_key: (filepath, size, time.monotonic())}}
+        self._files = {}
+        self._total_files = 0
+        self._total_bytes = 0
+
+    def _namespace_usage(self, namespace):
+        namespace_files = self._files.get(namespace, {})
+        return len(namespace_files), sum(
+            size for (_, size, _) in namespace_files.values()
+        )
+
+    def _quota_usages(self, namespace, file_key, size):
+        """
+        Return
+        ------
+        (list): [(usage, quota, description)] with an upload of `size` bytes
+            replacing the namespace's upload under file_key, if any
+        """
+        namespace_file_count, namespace_bytes = self._namespace_usage(namespace)
+        replaced = self._files.get(namespace, {}).get(file_key, None)
+        (added_files, added_bytes) = (
+            (1, size) if replaced is None else (0, size - replaced[1])
+        )
+        return [
+            (
+                namespace_file_count + added_files,
+                self.max_namespace_files,
+                "namespace files",
+            ),
+            (
+                namespace_bytes + added_bytes,
+                self.max_namespace_bytes,
+                "namespace bytes",
+            ),
+            (self._total_files + added_files, self.max_total_files, "total files"),
+            (self._total_bytes + added_bytes, self.max_total_bytes, "total bytes"),
+        ]
+
+    def _check_quota(self, namespace, file_key, size):
+        for (usage, quota, description) in self._quota_usages(
+            namespace, file_key, size
+        ):
+            if quota is not None and usage > quota:
+                raise UploadQuotaError(
+                    f"Upload quota of {quota} {description} exceeded "
+                    f"for `{namespace}`."
+                )
+
+    def _byte_allowance(self, namespace, file_key):
+        """
+        Return
+        ------
+        (int|None): the most bytes the quotas allow an upload under file_key
+        """
+        allowances = [
+            quota - usage
+            for (usage, quota, description) in self._quota_usages(
+                namespace, file_key, 0
+            )
+            if quota is not None and description.endswith("bytes")
+        ]
+        return min(allowances) if len(allowances) > 0 else None
+
+    def _write_capped(self, filepath, stream, allowance):
+        # write the stream to the filepath, stopping past the allowance
+        size = 0
+        try:
+            with open(filepath, "wb") as fio:
+                while True:
+                    chunk = stream.read(self.CHUNK_SIZE)
+                    if len(chunk) == 0:
+                        return size
+                    size += len(chunk)
+                    if allowance is not None and size > allowance:
+                        raise UploadQuotaError(
+                            f"Upload exceeds the {allowance} bytes the quotas allow."
+                        )
+                    fio.write(chunk)
+        except BaseException:
+            os.remove(filepath)
+            raise
+
+    def _pop(self, namespace, file_key):
+        # must hold the lock
+        filepath, size, _ = self._files[namespace].pop(file_key)
+        if len(self._files[namespace]) == 0:
+            self._files.pop(namespace)
+        self._total_files -= 1
+        self._total_bytes -= size
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
+        return filepath
+
+    def save(self, namespace, file_key, file_obj):
+        """
+        Save the uploaded werkzeug FileStorage, replacing the namespace's
+        previous upload under the same file_key once it is accepted. The
+        quotas are checked before the file is written (against its declared
+        `content_length`), and as it is written, so that an upload over quota
+        never takes more than its allowance of disk.
+
+        Return
+        ------
+        (str): the filepath saved to
+        """
+        filepath = os.path.join(
+            self.directory,
+            "{}{}_{}".format(
+                datetime.now().strftime("%Y-%m-%d_%Hh%Mm%S_"),
+                uuid.uuid4().hex[:8],
+                secure_filename(file_obj.filename),
+            ),
+        )
+        with self._lock:
+            self._check_quota(namespace, file_key, file_obj.content_length or 0)
+            allowance = self._byte_allowance(namespace, file_key)
+        size = self._write_capped(filepath, file_obj.stream, allowance)
+        with self._lock:
+            try:
+                # concurrent uploads may have used the allowance meanwhile
+                self._check_quota(namespace, file_key, size)
+            except UploadQuotaError:
+                os.remove(filepath)
+                raise
+            if file_key in self._files.get(namespace, {}):
+                self._pop(namespace, file_key)
+            self._files.setdefault(namespace, {})[file_key] = (
+                filepath,
+                size,
+                time.monotonic(),
+            )
+            self._total_files += 1
+            self._total_bytes += size
+        return filepath
+
+    def remove(self, namespace, file_keys):
+        """
+        Return
+        ------
+        (dict): {file_key: filepath} of the files removed
+        """
+        removed = {}
+        with self._lock:
+            for file_key in file_keys:
+                if file_key in self._files.get(namespace, {}):
+                    removed[file_key] = self._pop(namespace, file_key)
+        return removed
+
+    def remove_object(self, object_id):
+        """
+        Remove the files that any client uploaded for the object.
+        """
+        with self._lock:
+            for namespace in list(self._files.keys()):
+                if namespace[1] == object_id:
+                    for file_key in list(self._files[namespace].keys()):
+                        self._pop(namespace, file_key)
+
+    def expire(self):
+        """
+        Return
+        ------
+        (int): the count of files older than `max_age` that were removed
+        """
+        if self.max_age is None:
+            return 0
+        expired = 0
+        oldest = time.monotonic() - self.max_age
+        with self._lock:
+            for namespace in list(self._files.keys()):
+                for (file_key, (_, _, saved)) in list(self._files[namespace].items()):
+                    if saved < oldest:
+                        self._pop(namespace, file_key)
+                        expired += 1
+        return expired
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": self._total_files,
+                "bytes": self._total_bytes,
+                "namespaces": len(self._files),
+                "quotas": {
+                    "max_namespace_files": self.max_namespace_files,
+                    "max_namespace_bytes": self.max_namespace_bytes,
+                    "max_total_files": self.max_total_files,
+                    "max_total_bytes": self.max_total_bytes,
+                    "max_age": self.max_age,
+                },
+            }
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                expired = self.expire()
+                if expired > 0:
+                    logger = logging.getLogger("remoteobjects_endpoints")
+                    logger.info(f"Removed {expired} expired uploaded files.")
+            except BaseException as err:
+                logger = logging.getLogger("remoteobjects_endpoints")
+                logger.error(f"Error expiring uploaded files: {repr(err)}")
+
+    def start_sweeper(self, interval):
+        """
+        Expire files every `interval` seconds from a background thread.
+        """
+        threading.Thread(
+            target=self._run,
+            args=(interval,),
+            name="remoteobjects_upload_sweeper",
+            daemon=True,
+        ).start()
@@ -0,0 +1,86 @@
+import threading
+
+
+class _Flight(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesce identical concurrent operations: while an operation is in
+    flight, callers of the same key wait for it and share its result (or
+    error), rather than doing it again.
+
+    Keys are kept in groups (e.g. of an object), so that a write can
+    `forget` the group's flights: callers that arrive after it start anew,
+    rather than share a result that may predate the write.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # {group: {key: _Flight}}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, func, group=None):
+        """
+        Return
+        ------
+        (tuple): (the return of `func()`, or of the call in flight, whether
+            this caller executed it)
+        """
+        with self._lock:
+            group_flights = self._flights.setdefault(group, {})
+            flight = group_flights.get(key, None)
+            leader = flight is None
+            if leader:
+                flight = group_flights[key] = _Flight()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, False
+
+        try:
+            flight.result = func()
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                group_flights = self._flights.get(group, {})
+                if group_flights.get(key, None) is flight:
+                    group_flights.pop(key)
+                    if len(group_flights) == 0:
+                        self._flights.pop(group)
+            flight.event.set()
+        return flight.result, True
+
+    def count(self, executed):
+        """
+        Count a flight coalesced elsewhere (e.g. in an event loop), as
+        executed or shared.
+        """
+        with self._lock:
+            if executed:
+                self.executed += 1
+            else:
+                self.shared += 1
+
+    def forget(self, group):
+        """
+        Let the group's flights finish for their callers, but not be joined.
+        """
+        with self._lock:
+            self._flights.pop(group, None)
+
+    def in_flight(self):
+        with self._lock:
+            return sum(len(group_flights) for group_flights in self._flights.values())
@@ -2,16 +2,64 @@
 
 # Server imports
 from flask import Flask
-from remoteobjects.server import addRemoteObjectResources
+from remoteobjects.server import endpoints
+from remoteobjects.server import (
+    addRemoteObjectResources,
+    startRemoteObjectSocketServer,
+    startRemoteObjectAsyncServer,
+    RemoteObjectASGIApp,
+    ObjectRegistry,
+    StaleHandleError,
+    RegistrySnapshot,
+    UploadStore,
+    UploadQuotaError,
+    DownloadStore,
+    ServerFile,
+    ObjectLock,
+    AdmissionControl,
+    AdmissionError,
+    cancellation_token,
+    pure_method,
+)
 
 # Client imports
-from remoteobjects.client import defineRemoteClass, RestClient
+from remoteobjects.client import (
+    defineRemoteClass,
+    RestClient,
+    RemoteObjectError,
+    RemoteFile,
+    Pipeline,
+    RELEASE_QUEUE,
+    SocketTransport,
+    connect,
+    ServerPool,
+)
+from remoteobjects.client.stubs import generateStubModule, checkStubModule
+from remoteobjects.codecs import CODECS, CodecRegistry
+from remoteobjects.framing import FrameError, pack_frame, recv_frame
+from remoteobjects.single_flight import SingleFlight
 
 # Unit Testing imports
+from werkzeug.datastructures import FileStorage
+from werkzeug.test import EnvironBuilder
+import io
+import asyncio
+import dataclasses
+import datetime
+import decimal
+import enum
+import gc
+import json
+import requests
+import socket
 import time
 import threading
 import unittest
 import os
+import subprocess
+import sys
+import tempfile
+import types
 
 
 class TestRemoteObject(unittest.TestCase):
@@ -53,6 +101,197 @@ class TestRemoteObject(unittest.TestCase):
             remoteDummy.file_contains_affirmative(script_dir + "/affirmative.txt")
         )
 
+    def test_concurrent_proxy(self):
+        remoteDummy = DummyRemote(dumbness="Shared")
+        self.assertEqual(
+            remoteDummy.map(
+                "add", [{"a": i, "b": i} for i in range(16)], max_workers=8
+            ),
+            [2 * i for i in range(16)],
+        )
+        # calls with file arguments do not replace each other's uploads
+        with tempfile.TemporaryDirectory() as upload_directory:
+            filepaths = []
+            for i in range(8):
+                filepaths.append(os.path.join(upload_directory, f"{i}.txt"))
+                with open(filepaths[-1], "w") as fio:
+                    fio.write("SUCCESS" if i % 2 == 0 else "FAILURE")
+            self.assertEqual(
+                remoteDummy.map(
+                    "file_contains_affirmative",
+                    [{"filepath": filepath} for filepath in filepaths],
+                    max_workers=8,
+                ),
+                [i % 2 == 0 for i in range(8)],
+            )
+
+    def test_connect(self):
+        remote = connect(DummyRemote._default_server_uri)
+        self.assertEqual(remote._classes, {})
+        self.assertEqual(remote.Dummy(dumbness="Lazy").is_dumb(), "Lazy")
+        self.assertIs(remote.Dummy, remote.Dummy)
+        self.assertEqual(remote.Dummy.__name__, "DummyRemote")
+        self.assertIn("Dummy", dir(remote))
+        self.assertFalse(hasattr(remote, "Absent"))
+
+    def test_server_pool(self):
+        server_uri = DummyRemote._default_server_uri
+        # the first server is unreachable, so registrations fail over
+        for placement in ServerPool.PLACEMENTS:
+            pool = ServerPool(
+                ["http://localhost:6009", server_uri], placement=placement
+            )
+            remoteDummy = pool.Dummy(dumbness="Pooled")
+            self.assertEqual(remoteDummy._server_uri, server_uri)
+            self.assertEqual(remoteDummy.is_dumb(), "Pooled")
+            self.assertEqual(pool.locate(remoteDummy._remote_object_id), server_uri)
+            self.assertEqual(pool._available(), [server_uri])
+
+            sameDummy = pool.Dummy(remote_object_id=remoteDummy._remote_object_id)
+            self.assertEqual(sameDummy._server_uri, server_uri)
+            self.assertEqual(sameDummy.is_dumb(), "Pooled")
+            sameDummy._del_remote = False
+        self.assertGreaterEqual(pool.stats(server_uri)["objects"], 1)
+
+    def test_migration_disabled(self):
+        remoteDummy = DummyRemote(dumbness="Settled")
+        with self.assertRaises(RemoteObjectError):
+            # the server has no MIGRATION_KEY
+            remoteDummy._migrate("http://localhost:6009")
+        self.assertEqual(remoteDummy.is_dumb(), "Settled")
+
+    class Dumbness(enum.Enum):
+        ABSOLUTE = "absolute"
+
+    @dataclasses.dataclass
+    class Interval:
+        start: datetime.datetime
+        length: datetime.timedelta
+
+    def test_codecs(self):
+        CODECS.register_class(self.Dumbness)
+        CODECS.register_class(self.Interval)
+        remoteDummy = DummyRemote()
+        now = datetime.datetime.now()
+        for (a, b) in [
+            (now, datetime.timedelta(hours=1, microseconds=1)),
+            (1 + 2j, 0.5j),
+            (decimal.Decimal("0.10"), decimal.Decimal("0.20")),
+            (b"\x00", b"\xff"),
+        ]:
+            result = remoteDummy.add(a, b)
+            self.assertEqual(result, a + b)
+            self.assertIs(type(result), type(a))
+        for dumbness in [
+            self.Dumbness.ABSOLUTE,
+            self.Interval(now, datetime.timedelta(days=1)),
+        ]:
+            self.assertEqual(remoteDummy.is_dumb(dumbness=dumbness), dumbness)
+        remoteDummy.dumbness = now
+        self.assertEqual(remoteDummy.dumbness, now)
+
+    def test_coalesced_reads(self):
+        remoteDummy = DummyRemote(dumbness="Shared")
+        remoteDummy._remobj_coalesced_methods = {"read_slowly"}
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(remoteDummy.read_slowly(0.3))
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["Shared"] * 4)
+        self.assertEqual(remoteDummy.reads, 1)
+
+        # reads after a write do not share those before it
+        reader = threading.Thread(target=remoteDummy.read_slowly, args=(0.3,))
+        reader.start()
+        time.sleep(0.1)
+        remoteDummy.dumbness = "Changed"
+        self.assertEqual(remoteDummy.read_slowly(0), "Changed")
+        reader.join()
+        self.assertEqual(remoteDummy.reads, 3)
+
+        # nor do they share reads started while the write was in flight
+        writer = threading.Thread(target=remoteDummy.wait_for_cancellation, args=(0.4,))
+        writer.start()
+        time.sleep(0.1)
+        reader = threading.Thread(target=remoteDummy.read_slowly, args=(0.3,))
+        reader.start()
+        writer.join()
+        self.assertEqual(remoteDummy.read_slowly(0.3), "Changed")
+        reader.join()
+        self.assertEqual(remoteDummy.reads, 5)
+
+    def test_memoized_methods(self):
+        registry = endpoints.__REMOTE_OBJECT_REGISTRY__
+        remoteDummy = DummyRemote(dumbness="Memoized")
+        hits = registry.memoization_stats()["hits"]
+        self.assertEqual(remoteDummy.describe(prefix="> "), "> Memoized")
+        self.assertEqual(remoteDummy.describe(prefix="> "), "> Memoized")
+        self.assertEqual(registry.memoization_stats()["hits"], hits + 1)
+        remoteDummy.dumbness = "Changed"
+        self.assertEqual(remoteDummy.describe(prefix="> "), "> Changed")
+        remoteDummy.is_dumb(dumbness="Called")
+        self.assertEqual(remoteDummy.describe(prefix="> "), "> Called")
+        self.assertEqual(
+            ServerPool([remoteDummy._server_uri]).stats(remoteDummy._server_uri)[
+                "memoization"
+            ],
+            registry.memoization_stats(),
+        )
+
+    def test_transaction(self):
+        remoteDummy = DummyRemote(dumbness="Before")
+        with remoteDummy.transaction() as transaction:
+            remoteDummy.dumbness = "During"
+            remoteDummy.internal_object.str_attr = "Configured"
+            self.assertIsNone(remoteDummy.add(1, 2))
+            self.assertIsNone(remoteDummy.get_internal())
+            # reads are not buffered
+            self.assertEqual(remoteDummy.dumbness, "Before")
+        self.assertEqual(transaction.returns[0], 3)
+        self.assertEqual(transaction.returns[1].str_attr, "Configured")
+        self.assertEqual(remoteDummy.dumbness, "During")
+
+        # a failure undoes the sets before it
+        with self.assertRaises(RemoteObjectError):
+            with remoteDummy.transaction():
+                remoteDummy.dumbness = "Failed"
+                remoteDummy.internal_object.str_attr = "Failed"
+                remoteDummy.add(1, "two")
+        self.assertEqual(remoteDummy.dumbness, "During")
+        self.assertEqual(remoteDummy.internal_object.str_attr, "Configured")
+
+        # an exception in the context discards the transaction
+        with self.assertRaises(ValueError):
+            with remoteDummy.transaction():
+                remoteDummy.dumbness = "Discarded"
+                raise ValueError()
+        self.assertEqual(remoteDummy.dumbness, "During")
+
+    def test_stub_module(self):
+        source = generateStubModule(DummyRemote._default_server_uri, ["Dummy"])
+        stubs = types.ModuleType("dummy_stubs")
+        exec(compile(source, "dummy_stubs.py", "exec"), stubs.__dict__)
+        remoteDummy = stubs.DummyRemote(dumbness="Static")
+        self.assertEqual(remoteDummy.is_dumb(), "Static")
+        self.assertEqual(remoteDummy.add(1, b=2), 3)
+        self.assertNotIn("add", remoteDummy.__dict__)  # defined on the class
+        self.assertIn(") -> int:", source)
+        self.assertEqual(stubs.DummyRemote.add.__annotations__["return"], "int")
+        # special methods would apply to the proxy, so are not defined
+        self.assertNotIn("__repr__", source)
+        self.assertIs(stubs.DummyRemote.__repr__, object.__repr__)
+        with self.assertRaises(RuntimeError):
+            checkStubModule(
+                stubs.SERVER_URI, stubs.SERVER_VERSION, "stale", stubs.CLASS_KEYS
+            )
+
     def test_id_control(self):
         remoteDummy = DummyRemote(
             dumbness="Resilient",
@@ -129,6 +368,1220 @@ class TestRemoteObject(unittest.TestCase):
             remoteDummy.internal_object.nested_object.grandparent.add(1, 1), 2
         )
 
+    def test_method_handle(self):
+        remoteDummy = DummyRemote(dumbness="Handled")
+        internal = remoteDummy.internal_object
+        self.assertEqual(internal.decrement(dec=1), 419)
+        handle = internal._method_handles["decrement"]
+        self.assertEqual(internal.decrement(dec=1), 418)
+        self.assertEqual(internal._method_handles["decrement"], handle)
+        # a stale handle falls back to the attribute path, resolving anew
+        internal._method_handles["decrement"] = "stale"
+        self.assertEqual(internal.decrement(dec=1), 417)
+        self.assertNotEqual(internal._method_handles["decrement"], "stale")
+        # as is a handle whose path a method replaced
+        remoteDummy.reset_internal()
+        self.assertEqual(internal.decrement(dec=1), 419)
+
+    def test_method_stream(self):
+        remoteDummy = DummyRemote(dumbness="A tired subject")
+        streamed_return = remoteDummy.count(5, remobj_stream=True)
+        self.assertEqual(next(streamed_return), 0)
+        self.assertEqual(list(streamed_return), [1, 2, 3, 4])
+
+    def test_method_stream_closed_unread(self):
+        remoteDummy = DummyRemote(dumbness="A tired subject")
+        object_id = remoteDummy._remote_object_id
+        # a response closed before its stream starts, as by a client that
+        # disconnects, still releases the object
+        environ = EnvironBuilder(
+            path="/remoteobjects/registry",
+            method="POST",
+            query_string={
+                "object_id": object_id,
+                "func_name": "count",
+                "stream": "true",
+            },
+            json={"n": 5},
+        ).get_environ()
+        app_iter = app(environ, lambda status, headers, exc_info=None: None)
+        self.assertTrue(endpoints.__REMOTE_OBJECT_SEMAPHORES__[object_id].locked())
+        app_iter.close()
+        self.assertFalse(endpoints.__REMOTE_OBJECT_SEMAPHORES__[object_id].locked())
+        self.assertEqual(remoteDummy.add(1, 2), 3)
+
+    def test_method_stream_error(self):
+        remoteDummy = DummyRemote(dumbness="A tired subject")
+        streamed_return = remoteDummy.count(5, fail_at=2, remobj_stream=True)
+        with self.assertRaises(RemoteObjectError) as err:
+            list(streamed_return)
+
+    def test_method_return_handle(self):
+        remoteDummy = DummyRemote(dumbness="A tired subject")
+        internal_handle = remoteDummy.get_internal(remobj_return_handle=True)
+        self.assertEqual(internal_handle.str_attr, "Internal")
+        internal_handle.decrement(378)
+        self.assertEqual(remoteDummy.internal_object.int_attr, 42)
+        self.assertEqual(
+            internal_handle._remote_object_id,
+            remoteDummy.get_internal(remobj_return_handle=True)._remote_object_id,
+        )
+        self.assertEqual(remoteDummy.add(1, 2, remobj_return_handle=True), 3)
+
+    def test_pipeline(self):
+        remoteDummy = DummyRemote(dumbness="A tired subject")
+        pipeline = Pipeline(remoteDummy._server_uri)
+        total = pipeline.call(remoteDummy, "add", a=31, b=11)
+        pipeline.call(remoteDummy.internal_object, "decrement", dec=total)
+        int_attr = pipeline.get(remoteDummy.internal_object, "int_attr")
+        self.assertEqual(pipeline.execute(total, int_attr), [42, 420 - 42])
+
+    def test_pipeline_error(self):
+        remoteDummy = DummyRemote(dumbness="A tired subject")
+        pipeline = Pipeline(remoteDummy._server_uri)
+        total = pipeline.call(remoteDummy, "add", a=31, b="11")
+        pipeline.call(remoteDummy, "add", a=total, b=1)
+        with self.assertRaises(RemoteObjectError) as err:
+            pipeline.execute()
+
+    def test_broadcast(self):
+        remoteDummies = [DummyRemote(dumbness=f"Number {i}") for i in range(4)]
+        results = DummyRemote.broadcast(
+            "add",
+            remoteDummies,
+            args={"a": 1, "b": 1},
+            per_object_args={remoteDummies[1]: {"b": 2}, remoteDummies[2]: {"b": "2"}},
+        )
+        self.assertEqual(results[remoteDummies[0]._remote_object_id], 2)
+        self.assertEqual(results[remoteDummies[1]._remote_object_id], 3)
+        self.assertTrue(
+            isinstance(results[remoteDummies[2]._remote_object_id], RemoteObjectError)
+        )
+        results = DummyRemote.broadcast("is_dumb")
+        for remoteDummy in remoteDummies:
+            self.assertEqual(
+                results[remoteDummy._remote_object_id], remoteDummy.dumbness
+            )
+
+        # calls are dropped as they wait beyond the timeout, and cancelled as
+        # they run beyond it
+        busy = threading.Thread(target=remoteDummies[0].read_slowly, args=(0.6,))
+        busy.start()
+        time.sleep(0.1)
+        results = DummyRemote.broadcast(
+            "wait_for_cancellation", remoteDummies, args={"seconds": 2}, timeout=0.2
+        )
+        busy.join()
+        self.assertTrue(
+            isinstance(results[remoteDummies[0]._remote_object_id], RemoteObjectError)
+        )
+        self.assertEqual(
+            [remoteDummy.cancelled_calls for remoteDummy in remoteDummies],
+            [0, 1, 1, 1],
+        )
+
+    def test_method_file_download(self):
+        remoteDummy = DummyRemote(dumbness="Prolific")
+        content = "0123456789" * 1000
+        remote_file = remoteDummy.write_report(content)
+        self.assertEqual(remote_file.size, len(content))
+        with tempfile.TemporaryDirectory() as download_directory:
+            filepath = remote_file.download(download_directory)
+            self.assertEqual(os.path.basename(filepath), "report.txt")
+            # resume a partial download with a Range request
+            with open(filepath, "r+") as fio:
+                fio.truncate(4321)
+            remote_file.download(filepath, resume=True)
+            with open(filepath, "r") as fio:
+                self.assertEqual(fio.read(), content)
+            # an existing file is downloaded over, unless resumed
+            with open(filepath, "w") as fio:
+                fio.write("9" * len(content))
+            remote_file.download(filepath)
+            with open(filepath, "r") as fio:
+                self.assertEqual(fio.read(), content)
+            # a range of a file changed since its offer is not resumed
+            stale_file = RemoteFile(
+                remote_file._server_uri,
+                remote_file.file_id,
+                "../report.txt",
+                remote_file.size,
+                etag="stale",
+            )
+            self.assertEqual(stale_file.filename, "report.txt")
+            with open(filepath, "w") as fio:
+                fio.write("9" * 4321)
+            stale_file.download(filepath, resume=True)
+            with open(filepath, "r") as fio:
+                self.assertEqual(fio.read(), content)
+            stale_file._released = True
+            with remote_file.mmap(os.path.join(download_directory, "mapped")) as mm:
+                self.assertEqual(mm[-10:], b"0123456789")
+        remote_file.release()
+        RELEASE_QUEUE.flush()
+        self.assertEqual(
+            RestClient(remoteDummy._server_uri)
+            ._get("remoteobjects/download")
+            .json()["files"],
+            0,
+        )
+
+    def test_attached_proxy_lease(self):
+        registry = endpoints.__REMOTE_OBJECT_REGISTRY__
+        remoteDummy = DummyRemote(dumbness="Attached")
+        registry.lease_ttl = 60
+        try:
+            attachedDummy = DummyRemote(
+                remote_object_id=remoteDummy._remote_object_id,
+                delete_remote_on_del=False,
+            )
+            # attaching renewed the lease, which the proxy then holds
+            self.assertEqual(attachedDummy._lease_ttl, 60)
+            self.assertIn(remoteDummy._remote_object_id, registry._lease_expiry_dict)
+            del attachedDummy
+        finally:
+            registry.lease_ttl = None
+            registry._lease_expiry_dict.pop(remoteDummy._remote_object_id, None)
+
+    def test_upload_delete_without_body(self):
+        response = RestClient(DummyRemote._default_server_uri)._delete(
+            "remoteobjects/upload"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"files_removed": {}})
+
+    def test_endpoints_without_body(self):
+        client = RestClient(DummyRemote._default_server_uri)
+        response = client._post("remoteobjects/cancel")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"cancelled": []})
+        response = client._put("remoteobjects/lease")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["unknown"], [])
+
+    def test_release_queue(self):
+        remoteDummy = DummyRemote(dumbness="Fleeting")
+        object_id = remoteDummy._remote_object_id
+        del remoteDummy
+        gc.collect()
+        RELEASE_QUEUE.flush()
+        self.assertNotIn(
+            object_id, endpoints.__REMOTE_OBJECT_REGISTRY__._registered_obj_dict
+        )
+
+    def test_busy_object_retry(self):
+        remoteDummy = DummyRemote(dumbness="Busy")
+        object_lock = endpoints.__REMOTE_OBJECT_SEMAPHORES__[
+            remoteDummy._remote_object_id
+        ]
+        admission_control = endpoints.__ADMISSION_CONTROL__
+        endpoints.__ADMISSION_CONTROL__ = AdmissionControl(max_object_waiters=0)
+        object_lock.acquire()
+        try:
+            remoteDummy._remobj_max_retries = 0
+            with self.assertRaises(RemoteObjectError):
+                remoteDummy.is_dumb()
+            # retried after the Retry-After hint, once the object is free
+            remoteDummy._remobj_max_retries = 3
+            threading.Timer(0.2, object_lock.release).start()
+            self.assertEqual(remoteDummy.is_dumb(), "Busy")
+        finally:
+            endpoints.__ADMISSION_CONTROL__ = admission_control
+
+    def test_client_settings(self):
+        # remote attributes do not shadow the settings of the client
+        remoteDummy = DummyRemote(dumbness="Settled")
+        self.assertEqual(remoteDummy.is_dumb(), "Settled")
+        self.assertEqual(remoteDummy.timeout, 5.0)
+        self.assertEqual(remoteDummy.max_retries, 0)
+        self.assertIsNone(remoteDummy._remobj_timeout)
+        self.assertEqual(remoteDummy._remobj_max_retries, 3)
+
+    def test_call_timeout(self):
+        remoteDummy = DummyRemote(dumbness="Slow")
+        start = time.time()
+        with self.assertRaises(requests.exceptions.Timeout):
+            remoteDummy.wait_for_cancellation(5, remobj_timeout=0.2)
+        # the running call stopped at its cancellation, releasing the object
+        self.assertEqual(remoteDummy.cancelled_calls, 1)
+        self.assertLess(time.time() - start, 2)
+        # a call waiting on the busy object is dropped before it starts
+        object_lock = endpoints.__REMOTE_OBJECT_SEMAPHORES__[
+            remoteDummy._remote_object_id
+        ]
+        object_lock.acquire()
+        try:
+            with self.assertRaises((requests.exceptions.Timeout, RemoteObjectError)):
+                remoteDummy.is_dumb(dumbness="Changed", remobj_timeout=0.2)
+        finally:
+            object_lock.release()
+        self.assertEqual(remoteDummy.dumbness, "Slow")
+
+    def test_lock_profile(self):
+        remoteDummy = DummyRemote(dumbness="Contended")
+        object_lock = endpoints.__REMOTE_OBJECT_SEMAPHORES__[
+            remoteDummy._remote_object_id
+        ]
+        object_lock.acquire(holder={"func_name": "test_lock_profile"})
+        waiter = threading.Thread(target=remoteDummy.is_dumb)
+        waiter.start()
+        time.sleep(0.2)
+        profile = (
+            RestClient(remoteDummy._server_uri)
+            ._get("remoteobjects/locks", params={"threshold": 0.1})
+            .json()
+        )
+        object_lock.release()
+        waiter.join()
+        self.assertIn(
+            {
+                "object_id": remoteDummy._remote_object_id,
+                "holder": {"func_name": "test_lock_profile"},
+            },
+            [
+                {"object_id": hold["object_id"], "holder": hold["holder"]}
+                for hold in profile["long_holds"]
+            ],
+        )
+        self.assertIn(
+            (remoteDummy._remote_object_id, "is_dumb"),
+            [
+                (wait["object_id"], wait["holder"]["func_name"])
+                for wait in profile["long_waits"]
+            ],
+        )
+        self.assertEqual(object_lock.contended_acquisitions, 1)
+        self.assertGreater(object_lock.max_wait_time, 0.1)
+
+
+class TestRemoteObjectSocket(TestRemoteObject):
+    @classmethod
+    def setUpClass(self):
+        # the same tests, over the persistent socket transport
+        defineRemoteClass(
+            "Dummy", "tcp://localhost:6001", globals(), attribute_depth_allowance=-1
+        )
+
+    def test_concurrent_calls(self):
+        remoteDummies = [DummyRemote(dumbness=str(i)) for i in range(8)]
+        results = [None] * len(remoteDummies)
+
+        def call(index):
+            results[index] = remoteDummies[index].is_dumb()
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [str(i) for i in range(8)])
+
+    def test_shared_memory_frame_rejected(self):
+        # a TCP connection has no shared memory to pass payloads through
+        frame = pack_frame({"id": 0, "shm": {"name": "remoteobjects", "size": 1}})
+        (left, right) = socket.socketpair()
+        with left, right:
+            left.sendall(frame)
+            with self.assertRaises(FrameError):
+                recv_frame(right)
+        for port in [6001, 6002]:
+            with socket.create_connection(("localhost", port)) as sock:
+                sock.sendall(frame)
+                self.assertEqual(sock.recv(1), b"")
+        self.assertEqual(DummyRemote(dumbness="Unshaken").is_dumb(), "Unshaken")
+
+    def test_stream_backpressure(self):
+        remoteDummy = DummyRemote(dumbness="Prolific")
+        streamed_return = remoteDummy.count(1000, remobj_stream=True)
+        self.assertEqual(next(streamed_return), 0)
+        time.sleep(0.3)
+        # the server waits on the consumer, rather than filling its buffer
+        responses = SocketTransport.for_uri(remoteDummy._server_uri)._responses
+        self.assertLessEqual(
+            max(frames.qsize() for frames in responses.values()),
+            SocketTransport.window + 1,
+        )
+        self.assertEqual(list(streamed_return), list(range(1, 1000)))
+
+
+class TestRemoteObjectUnixSocket(TestRemoteObject):
+    @classmethod
+    def setUpClass(self):
+        # the same tests, over the same-host transport
+        defineRemoteClass(
+            "Dummy",
+            "unix:///tmp/remoteobjects_test.sock",
+            globals(),
+            attribute_depth_allowance=-1,
+        )
+
+    def test_shared_memory_payload(self):
+        remoteDummy = DummyRemote(dumbness="Voluminous")
+        content = "0123456789" * (1 << 16)
+        remote_file = remoteDummy.write_report(content)
+        with tempfile.TemporaryDirectory() as download_directory:
+            with open(remote_file.download(download_directory), "r") as fio:
+                self.assertEqual(fio.read(), content)
+        # the file was received through the server's shared memory
+        shm_channel = SocketTransport.for_uri(remoteDummy._server_uri)._shm_channel
+        self.assertGreater(len(shm_channel._attached), 0)
+
+
+class TestRemoteObjectAsync(TestRemoteObject):
+    @classmethod
+    def setUpClass(self):
+        # the same tests, served from an asyncio event loop
+        defineRemoteClass(
+            "Dummy", "tcp://localhost:6002", globals(), attribute_depth_allowance=-1
+        )
+
+    test_stream_backpressure = TestRemoteObjectSocket.test_stream_backpressure
+
+    def test_waiting_calls_do_not_pin_threads(self):
+        remoteDummy = DummyRemote(dumbness="Popular")
+        object_lock = endpoints.__REMOTE_OBJECT_SEMAPHORES__[
+            remoteDummy._remote_object_id
+        ]
+        results = []
+        object_lock.acquire()
+        threads = [
+            threading.Thread(target=lambda: results.append(remoteDummy.is_dumb()))
+            for i in range(32)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.assertEqual(len(results), 0)
+        self.assertLessEqual(len(ASYNC_SERVER.dispatcher.executor._threads), 4)
+        object_lock.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["Popular"] * 32)
+
+    def test_waiting_pipelines_do_not_pin_threads(self):
+        remoteDummy = DummyRemote(dumbness="Popular")
+        otherDummy = DummyRemote(dumbness="Available")
+        object_lock = endpoints.__REMOTE_OBJECT_SEMAPHORES__[
+            remoteDummy._remote_object_id
+        ]
+        results = []
+
+        def pipeline():
+            pipeline = Pipeline(remoteDummy._server_uri)
+            results.append(pipeline.execute(pipeline.call(remoteDummy, "is_dumb"))[0])
+
+        def broadcast():
+            results.append(
+                DummyRemote.broadcast("is_dumb", [remoteDummy])[
+                    remoteDummy._remote_object_id
+                ]
+            )
+
+        object_lock.acquire()
+        threads = [threading.Thread(target=pipeline) for i in range(8)] + [
+            threading.Thread(target=broadcast) for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.assertEqual(len(results), 0)
+        # the executor's threads still serve the calls of other objects
+        self.assertEqual(otherDummy.is_dumb(remobj_timeout=1), "Available")
+        object_lock.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["Popular"] * 16)
+
+    def test_reads_coalesce_before_the_lock(self):
+        remoteDummy = DummyRemote(dumbness="Shared")
+        object_lock = endpoints.__REMOTE_OBJECT_SEMAPHORES__[
+            remoteDummy._remote_object_id
+        ]
+        flights = endpoints.__READ_FLIGHTS__
+        client = RestClient(remoteDummy._server_uri)
+        params = {
+            "object_id": remoteDummy._remote_object_id,
+            "attribute_path": "dumbness",
+        }
+        responses = []
+
+        def read():
+            responses.append(client._get("remoteobjects/registry", params=params))
+
+        object_lock.acquire()
+        (executed, shared) = (flights.executed, flights.shared)
+        threads = [threading.Thread(target=read) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        object_lock.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            [response.json() for response in responses], [{"value": "Shared"}] * 4
+        )
+        self.assertEqual((flights.executed - executed, flights.shared - shared), (1, 3))
+
+    def test_asgi_app(self):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(
+            RemoteObjectASGIApp(app)(
+                {
+                    "type": "http",
+                    "method": "GET",
+                    "path": "/remoteobjects/version",
+                    "query_string": b"",
+                    "headers": [],
+                },
+                receive,
+                send,
+            )
+        )
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertIn(
+            b'"response"', b"".join(message.get("body", b"") for message in messages)
+        )
+
+
+MIGRATORY_SOURCE = """
+class Migratory(object):
+    __remoteobjects_snapshot__ = True
+
+    def __init__(self, value=0):
+        self.value = value
+
+    def get_value(self):
+        return self.value
+
+    def get_value_slowly(self, seconds: float):
+        time.sleep(seconds)
+        return self.value
+"""
+
+
+class TestMigration(unittest.TestCase):
+    # migrates objects of the test server to a second server process
+    TARGET_URI = "http://localhost:6003"
+    TARGET_SOURCE = (
+        "import time\n"
+        "from flask import Flask\n"
+        "from remoteobjects.server import addRemoteObjectResources\n"
+        + MIGRATORY_SOURCE
+        + "app = Flask(__name__)\n"
+        "app.config['MIGRATION_KEY'] = 'test'\n"
+        "addRemoteObjectResources(app, [Migratory])\n"
+        "app.run(port=6003)\n"
+    )
+
+    @classmethod
+    def setUpClass(self):
+        self.target = subprocess.Popen(
+            [sys.executable, "-c", self.TARGET_SOURCE],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        for _ in range(100):
+            try:
+                if RestClient(self.TARGET_URI)._get("remoteobjects/version").ok:
+                    break
+            except requests.exceptions.ConnectionError:
+                time.sleep(0.1)
+        endpoints.__MIGRATION_KEY__ = b"test"
+        endpoints.__MIGRATION_PEERS__ = [self.TARGET_URI]
+        defineRemoteClass(
+            "Migratory",
+            "http://localhost:6000",
+            globals(),
+            attribute_depth_allowance=1,
+        )
+
+    @classmethod
+    def tearDownClass(self):
+        endpoints.__MIGRATION_KEY__ = None
+        endpoints.__MIGRATION_PEERS__ = None
+        self.target.terminate()
+        self.target.wait()
+
+    def test_migration(self):
+        remoteMigratory = MigratoryRemote(value=7)
+        object_id = remoteMigratory._remote_object_id
+        # a proxy that does not take part in the migration
+        otherMigratory = MigratoryRemote(
+            remote_object_id=object_id, delete_remote_on_del=False
+        )
+        # a call in flight and one queued, as the object migrates
+        returns = []
+        threads = [
+            threading.Thread(
+                target=lambda: returns.append(remoteMigratory.get_value_slowly(0.5))
+            ),
+            threading.Thread(target=lambda: returns.append(otherMigratory.get_value())),
+        ]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.1)
+        remoteMigratory._migrate(self.TARGET_URI)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(returns, [7, 7])
+        self.assertEqual(remoteMigratory._server_uri, self.TARGET_URI)
+        self.assertNotIn(
+            object_id, endpoints.__REMOTE_OBJECT_REGISTRY__._registered_obj_dict
+        )
+
+        # the other proxy follows the object to its new server
+        otherMigratory.value = 8
+        self.assertEqual(otherMigratory._server_uri, self.TARGET_URI)
+        self.assertEqual(remoteMigratory.get_value(), 8)
+
+        # leases and deletes sent to the previous server are forwarded
+        source = RestClient("http://localhost:6000")
+        response = source._put("remoteobjects/lease", data={"object_ids": [object_id]})
+        self.assertEqual(response.json()["unknown"], [])
+        response = source._delete(
+            "remoteobjects/registry", params={"object_id": object_id}
+        )
+        self.assertEqual(response.status_code, 200)
+        response = RestClient(self.TARGET_URI)._get(
+            "remoteobjects/registry/signature", params={"object_id": object_id}
+        )
+        self.assertNotEqual(response.status_code, 200)
+        remoteMigratory._del_remote = False
+
+    def test_migration_broadcast(self):
+        remoteMigratories = [MigratoryRemote(value=i) for i in range(2)]
+        remoteMigratories[0]._migrate(self.TARGET_URI)
+        # the call of the migrated object is sent to its new server
+        results = MigratoryRemote.broadcast(
+            "get_value",
+            [
+                remoteMigratory._remote_object_id
+                for remoteMigratory in remoteMigratories
+            ],
+        )
+        self.assertEqual(
+            results,
+            {
+                remoteMigratory._remote_object_id: i
+                for (i, remoteMigratory) in enumerate(remoteMigratories)
+            },
+        )
+        response = RestClient("http://localhost:6000")._post(
+            "remoteobjects/broadcast",
+            data={
+                "func_name": "get_value",
+                "object_ids": [remoteMigratories[0]._remote_object_id],
+            },
+        )
+        result = response.json()["results"][remoteMigratories[0]._remote_object_id]
+        self.assertEqual(result["moved_to"], self.TARGET_URI)
+
+    def test_migration_peers(self):
+        remoteMigratory = MigratoryRemote(value=7)
+        # objects migrate to no server unless it is a peer
+        for peers in [None, ["http://localhost:6009"]]:
+            endpoints.__MIGRATION_PEERS__ = peers
+            try:
+                with self.assertRaises(RuntimeError):
+                    remoteMigratory._migrate(self.TARGET_URI)
+            finally:
+                endpoints.__MIGRATION_PEERS__ = [self.TARGET_URI]
+        self.assertEqual(remoteMigratory._server_uri, "http://localhost:6000")
+        self.assertEqual(remoteMigratory.get_value(), 7)
+
+    def test_migration_unacknowledged(self):
+        remoteMigratory = MigratoryRemote(value=7)
+        object_id = remoteMigratory._remote_object_id
+        # the target does not have the source's key, so cannot acknowledge
+        endpoints.__MIGRATION_KEY__ = b"other"
+        try:
+            with self.assertRaises(RuntimeError):
+                remoteMigratory._migrate(self.TARGET_URI)
+        finally:
+            endpoints.__MIGRATION_KEY__ = b"test"
+        self.assertIsNone(endpoints.__REMOTE_OBJECT_REGISTRY__.obj_forwarded(object_id))
+        self.assertEqual(remoteMigratory.get_value(), 7)
+
+
+class TestObjectRegistry(unittest.TestCase):
+    class Plain(object):
+        def __init__(self, value=0):
+            self.value = value
+
+        def get_value(self):
+            return self.value
+
+    class Slotted(object):
+        __slots__ = ["value", "level"]
+
+        def __init__(self, value=0):
+            self.value = value
+
+        def get_value(self):
+            return self.value
+
+    class Ratchet(object):
+        # a level that only rises, so that a set of it cannot be undone
+        def __init__(self, value=0):
+            self.value = value
+            self._level = 0
+
+        @property
+        def level(self):
+            return self._level
+
+        @level.setter
+        def level(self, level):
+            if level < self._level:
+                raise ValueError("The level only rises.")
+            self._level = level
+
+        def get_value(self):
+            return self.value
+
+    class Slotted(object):
+        __slots__ = ["value", "level", "_scale"]
+
+        def __init__(self, value=0):
+            self.value = value
+            self._scale = 1
+
+        @property
+        def scale(self):
+            return self._scale
+
+        @scale.setter
+        def scale(self, scale):
+            self._scale = scale
+
+    class Ratchet(object):
+        def __init__(self, value=0):
+            self.value = value
+            self._level = 0
+
+        @property
+        def level(self):
+            return self._level
+
+        @level.setter
+        def level(self, level):
+            if level < self._level:
+                raise ValueError("The level only rises.")
+            self._level = level
+
+    class Memoized(object):
+        def __init__(self, value=0):
+            self.value = value
+            self.computed = 0
+
+        @pure_method
+        def scaled(self, factor=1):
+            self.computed += 1
+            return self.value * factor
+
+        def listed(self):
+            self.computed += 1
+            return [self.value]
+
+        def increment(self):
+            self.value += 1
+
+        @pure_method
+        def counted(self):
+            yield from range(self.value)
+
+    def test_memoization(self):
+        registry = ObjectRegistry(
+            [self.Memoized],
+            {},
+            memoized_returns=2,
+            pure_methods={"Memoized": ["listed"]},
+        )
+        objid = registry.register_new_object("Memoized", {"value": 2})
+        obj = registry.get_registered_object(objid)
+        self.assertEqual(registry.obj_call_method(objid, "scaled", {"factor": 3}), 6)
+        self.assertEqual(registry.obj_call_method(objid, "scaled", {"factor": 3}), 6)
+        # the arguments are canonicalised, with their defaults
+        self.assertEqual(registry.obj_call_method(objid, "scaled"), 2)
+        self.assertEqual(registry.obj_call_method(objid, "scaled", {"factor": 1}), 2)
+        self.assertEqual(obj.computed, 2)
+        self.assertEqual(
+            registry.memoization_stats(), {"hits": 2, "misses": 2, "memoized": 2}
+        )
+        # through a method handle, and bounded (least recently used first out)
+        handle_id = registry.resolve_method_handle(objid, "listed")
+        self.assertEqual(registry.call_method_handle(handle_id), [2])
+        self.assertEqual(registry.call_method_handle(handle_id), [2])
+        self.assertEqual(registry.obj_call_method(objid, "scaled", {"factor": 1}), 2)
+        self.assertEqual(registry.obj_call_method(objid, "scaled", {"factor": 3}), 6)
+        self.assertEqual(obj.computed, 4)
+        self.assertEqual(registry.memoization_stats()["memoized"], 2)
+
+        # invalidated by attribute sets and calls of methods that are not pure
+        registry.obj_attribute_set(objid, "value", 3)
+        self.assertEqual(registry.obj_call_method(objid, "scaled"), 3)
+        registry.obj_call_method(objid, "increment")
+        self.assertEqual(registry.obj_call_method(objid, "scaled"), 4)
+        self.assertEqual(registry.call_method_handle(handle_id), [4])
+
+        # and by the undoing of a failed atomic pipeline
+        with self.assertRaises(RuntimeError):
+            registry.execute_pipeline(
+                [
+                    {"object_id": objid, "attribute_path": "value", "value": 5},
+                    {"object_id": objid, "func_name": "scaled"},
+                    {"object_id": objid, "attribute_path": "value.real", "value": 6},
+                ],
+                atomic=True,
+            )
+        self.assertEqual(registry.obj_call_method(objid, "scaled"), 4)
+
+        # mutable returns are not shared, and iterators are not memoized
+        registry.call_method_handle(handle_id).append(5)
+        listed = registry.call_method_handle(handle_id)
+        self.assertEqual(listed, [4])
+        listed.append(5)
+        self.assertEqual(registry.call_method_handle(handle_id), [4])
+        self.assertEqual(list(registry.obj_call_method(objid, "counted")), [0, 1, 2, 3])
+        self.assertEqual(list(registry.obj_call_method(objid, "counted")), [0, 1, 2, 3])
+
+        registry.deregister_object(objid)
+        self.assertEqual(registry.memoization_stats()["memoized"], 0)
+
+    class Owner(object):
+        def __init__(self):
+            self.part = TestObjectRegistry.Plain(1)
+
+        @pure_method
+        def total(self):
+            return self.part.value * 10
+
+        def get_part(self):
+            return self.part
+
+    def test_ownership_groups(self):
+        registry = ObjectRegistry([self.Owner], {})
+        objid = registry.register_new_object("Owner")
+        part_id = registry.register_object(
+            registry.obj_call_method(objid, "get_part"), objid
+        )
+        self.assertEqual(registry.obj_call_method(objid, "total"), 10)
+        self.assertEqual(registry.memoization_stats()["memoized"], 1)
+        registry._dirty_objids.clear()
+        # a set through the part's handle is a mutation of its owner
+        registry.obj_attribute_set(part_id, "value", 2)
+        self.assertEqual(registry._dirty_objids, {objid, part_id})
+        self.assertEqual(registry.memoization_stats()["memoized"], 0)
+        self.assertEqual(registry.obj_call_method(objid, "total"), 20)
+        # the busy objects are counted as their locks are held
+        self.assertEqual(registry.busy_objects(), 0)
+        with registry._registered_sem_dict[part_id]:
+            self.assertEqual(registry.busy_objects(), 1)
+        self.assertEqual(registry.busy_objects(), 0)
+        # the owned objects outlive their owner, in groups of their own
+        registry.deregister_object(objid)
+        self.assertEqual(registry._group_objids(part_id), [part_id])
+
+    def test_lease_expiry(self):
+        registry = ObjectRegistry([self.Plain], {}, lease_ttl=10)
+        start = time.monotonic()
+        expiring_id = registry.register_new_object("Plain")
+        renewed_id = registry.register_new_object("Plain")
+        pinned_id = registry.register_new_object("Plain")
+        registry.obj_pin(pinned_id)
+        self.assertEqual(registry.expire_leases(now=start + 5), [])
+        self.assertEqual(
+            registry.renew_leases([renewed_id, "Unknown"], now=start + 5), ["Unknown"]
+        )
+        self.assertEqual(registry.expire_leases(now=start + 11), [expiring_id])
+        self.assertEqual(
+            list(registry._registered_obj_dict.keys()), [renewed_id, pinned_id]
+        )
+
+    def test_idle_eviction(self):
+        semaphores = {}
+        registry = ObjectRegistry([self.Plain], semaphores, max_registered_objects=2)
+        busy_id = registry.register_new_object("Plain")
+        idle_id = registry.register_new_object("Plain")
+        semaphores[busy_id].acquire()
+        newest_id = registry.register_new_object("Plain")
+        self.assertEqual(
+            list(registry._registered_obj_dict.keys()), [busy_id, newest_id]
+        )
+        registry.obj_pin(newest_id)
+        with self.assertRaises(RuntimeError):
+            registry.register_new_object("Plain")
+
+    def test_method_handle(self):
+        registry = ObjectRegistry([self.Plain], {})
+        objid = registry.register_new_object("Plain")
+        registry.obj_attribute_set(objid, "value", self.Plain(1))
+        handle = registry.resolve_method_handle(objid, "get_value", "value")
+        self.assertEqual(
+            registry.resolve_method_handle(objid, "get_value", "value"), handle
+        )
+        self.assertEqual(registry.call_method_handle(handle), 1)
+        registry.obj_attribute_set(objid, "value.value", 2)
+        self.assertEqual(registry.call_method_handle(handle), 2)
+        registry.obj_attribute_set(objid, "value", self.Plain(3))
+        with self.assertRaises(StaleHandleError):
+            registry.call_method_handle(handle)
+        # as by a method that replaces part of the path
+        handle = registry.resolve_method_handle(objid, "get_value", "value")
+        registry.get_registered_object(objid).value = self.Plain(4)
+        with self.assertRaises(StaleHandleError):
+            registry.call_method_handle(handle)
+        handle = registry.resolve_method_handle(objid, "get_value", "value")
+        self.assertEqual(registry.call_method_handle(handle), 4)
+
+    def test_admission_control(self):
+        lock = ObjectLock()
+        lock.acquire()
+        with self.assertRaises(AdmissionError) as err:
+            AdmissionControl(max_object_waiters=0).acquire(lock)
+        self.assertEqual(err.exception.status, 429)
+        admission_control = AdmissionControl(max_wait=0.05, retry_after=2)
+        with self.assertRaises(AdmissionError) as err:
+            admission_control.acquire(lock)
+        self.assertEqual((err.exception.status, err.exception.retry_after), (503, 2))
+        self.assertEqual(admission_control.stats()["waiting"], 0)
+        self.assertEqual(lock.waiting(), 0)
+        lock.release()
+        admission_control.acquire(lock)
+        self.assertTrue(lock.locked())
+
+    def test_leaked_lock(self):
+        registry = ObjectRegistry([self.Plain], endpoints.__REMOTE_OBJECT_SEMAPHORES__)
+        objid = registry.register_new_object("Plain")
+        lock = endpoints.__REMOTE_OBJECT_SEMAPHORES__[objid]
+        with app.test_request_context("/remoteobjects/registry?func_name=get_value"):
+            self.assertIsNone(endpoints._acquire_object(objid))
+            # an error path returns without releasing the object
+        self.assertFalse(lock.locked())
+        self.assertEqual(lock.leaks, 1)
+        self.assertEqual(lock.profile()["acquisitions"], 1)
+        registry.deregister_object(objid)
+
+    class Snapshotable(Plain):
+        __remoteobjects_snapshot__ = True
+
+    def test_snapshot_restore(self):
+        registry = ObjectRegistry([self.Plain, self.Snapshotable], {})
+        kept_id = registry.register_new_object("Snapshotable", {"value": 1})
+        removed_id = registry.register_new_object("Snapshotable", {"value": 2})
+        registry.register_new_object("Plain")
+        with tempfile.TemporaryDirectory() as snapshot_directory:
+            snapshot = RegistrySnapshot(registry, snapshot_directory)
+            self.assertEqual(snapshot.take(), (2, 0))
+            self.assertEqual(snapshot.take(), (0, 0))
+            registry.obj_attribute_set(kept_id, "value", 42)
+            registry.deregister_object(removed_id)
+            self.assertEqual(snapshot.take(), (1, 1))
+
+            restored_registry = ObjectRegistry([self.Plain, self.Snapshotable], {})
+            self.assertEqual(
+                RegistrySnapshot(restored_registry, snapshot_directory).restore(),
+                [kept_id],
+            )
+        self.assertEqual(restored_registry.obj_attribute(kept_id, "value"), 42)
+        self.assertNotIn(
+            restored_registry.register_new_object("Snapshotable"),
+            [kept_id, removed_id],
+        )
+
+    def test_snapshot_shared_objects(self):
+        registry = ObjectRegistry([self.Snapshotable], {})
+        outer_id = registry.register_new_object(
+            "Snapshotable", {"value": self.Snapshotable(value=[1])}
+        )
+        # the handle of an attribute, in its owner's ownership group
+        inner_id = registry.register_object(
+            registry.obj_attribute(outer_id, "value"), outer_id
+        )
+        other_id = registry.register_new_object("Snapshotable")
+        with tempfile.TemporaryDirectory() as snapshot_directory:
+            snapshot = RegistrySnapshot(registry, snapshot_directory)
+            self.assertEqual(snapshot.take(), (3, 0))
+            # a set through the handle is snapshot with its owner, and without
+            # waiting on the other (busy) objects
+            registry.obj_attribute_set(inner_id, "value", [2])
+            with registry._registered_sem_dict[other_id]:
+                taker = threading.Thread(target=snapshot.take)
+                taker.start()
+                taker.join(5)
+                self.assertFalse(taker.is_alive())
+            self.assertEqual(snapshot.take(), (0, 0))
+
+            restored_registry = ObjectRegistry([self.Snapshotable], {})
+            RegistrySnapshot(restored_registry, snapshot_directory).restore()
+            # the object still shares the attribute with its handle
+            self.assertIs(
+                restored_registry.obj_attribute(outer_id, "value"),
+                restored_registry.get_registered_object(inner_id),
+            )
+            self.assertEqual(restored_registry.obj_attribute(inner_id, "value"), [2])
+            self.assertEqual(restored_registry._group_objids(inner_id)[0], outer_id)
+
+            # a snapshot missing its files restores none of their objects
+            groups_directory = os.path.join(
+                snapshot_directory, RegistrySnapshot.GROUPS_DIRECTORY
+            )
+            for filename in os.listdir(groups_directory):
+                os.remove(os.path.join(groups_directory, filename))
+            self.assertEqual(
+                RegistrySnapshot(
+                    ObjectRegistry([self.Snapshotable], {}), snapshot_directory
+                ).restore(),
+                [],
+            )
+
+    def test_migration(self):
+        source = ObjectRegistry([self.Plain, self.Snapshotable], {})
+        target = ObjectRegistry([self.Plain, self.Snapshotable], {})
+        objid = source.register_new_object("Snapshotable", {"value": 7})
+        source.obj_pin(objid)
+        with self.assertRaises(RuntimeError):
+            source.export_object(source.register_new_object("Plain"))
+
+        exported = source.export_object(objid)
+        self.assertEqual(target.import_object(objid, **exported), objid)
+        source.forward_object(objid, "http://target")
+        self.assertEqual(target.obj_call_method(objid, "get_value"), 7)
+        self.assertIn(objid, target._pinned_objids)
+        self.assertEqual(source.obj_forwarded(objid), "http://target")
+        self.assertNotIn(objid, source._registered_obj_dict)
+        self.assertNotEqual(source.register_new_object("Snapshotable"), objid)
+        with self.assertRaises(RuntimeError):
+            target.import_object(objid, **exported)
+
+        # and back again
+        source.import_object(objid, **target.export_object(objid))
+        target.forward_object(objid, "http://source")
+        self.assertIsNone(source.obj_forwarded(objid))
+
+    def test_codec_registry(self):
+        class Moment(datetime.datetime):
+            pass
+
+        codecs = CodecRegistry()
+        codecs.register(
+            datetime.datetime,
+            "datetime",
+            datetime.datetime.isoformat,
+            datetime.datetime.fromisoformat,
+        )
+        moment = datetime.datetime(2000, 1, 1)
+        encoded = json.dumps([moment], cls=codecs.JSONEncoder)
+        self.assertEqual(encoded, '[{"__remobj_datetime__": "2000-01-01T00:00:00"}]')
+        self.assertEqual(json.loads(encoded, cls=codecs.JSONDecoder), [moment])
+        # dispatched on the exact type
+        self.assertFalse(codecs.encodes(Moment))
+        with self.assertRaises(TypeError):
+            json.dumps(Moment(2000, 1, 1), cls=codecs.JSONEncoder)
+        with self.assertRaises(TypeError):
+            codecs.register_class(Moment)
+        self.assertTrue(ObjectRegistry.class_is_primitive(decimal.Decimal))
+
+        # the types without a codec are remembered, but boundedly
+        codecs = CodecRegistry(misses_maxsize=2)
+        unencoded = [type(f"Unencoded{index}", (object,), {}) for index in range(4)]
+        for class_obj in unencoded:
+            self.assertFalse(codecs.encodes(class_obj))
+        self.assertEqual(list(codecs._misses), unencoded[2:])
+        codecs.register(unencoded[3], "unencoded", repr, str)
+        self.assertTrue(codecs.encodes(unencoded[3]))
+
+    def test_class_signature(self):
+        class Equatable(object):
+            def __init__(self, value=0):
+                self.value = value
+
+            def __eq__(self, other):
+                return self.value == other.value
+
+            def __repr__(self):
+                return f"Equatable({self.value})"
+
+            def get_value(self) -> int:
+                return self.value
+
+            def _scaled(self, factor):
+                return self.value * factor
+
+        registry = ObjectRegistry([Equatable], {})
+        self.assertEqual(
+            list(registry.class_signature("Equatable")),
+            ["__init__", "_scaled", "get_value"],
+        )
+        self.assertEqual(
+            registry.class_return_annotations("Equatable"), {"get_value": "int"}
+        )
+
+    def test_atomic_pipeline(self):
+        registry = ObjectRegistry([self.Plain], {})
+        objid = registry.register_new_object("Plain", {"value": 1})
+        # invalid steps fail the pipeline before any step is executed
+        for invalid_step in [
+            {"object_id": objid, "func_name": "get_value", "args": {"extra": 1}},
+            {"object_id": objid, "func_name": "absent"},
+            {"object_id": objid, "attribute_path": "absent.value", "value": 3},
+        ]:
+            with self.assertRaises(RuntimeError):
+                registry.execute_pipeline(
+                    [{"object_id": objid, "attribute_path": "value", "value": 2}]
+                    + [invalid_step],
+                    atomic=True,
+                )
+            self.assertEqual(registry.obj_attribute(objid, "value"), 1)
+
+        with self.assertRaises(RuntimeError):
+            registry.execute_pipeline(
+                [
+                    {"object_id": objid, "attribute_path": "value", "value": 2},
+                    {"object_id": objid, "attribute_path": "added", "value": 3},
+                    {"object_id": objid, "attribute_path": "value.real", "value": 4},
+                ],
+                atomic=True,
+            )
+        self.assertEqual(registry.obj_attribute(objid, "value"), 1)
+        self.assertFalse(hasattr(registry.obj_attribute(objid, None), "added"))
+
+        # the attributes of `__slots__` and properties are undone too
+        registry = ObjectRegistry([self.Slotted, self.Ratchet], {})
+        objid = registry.register_new_object("Slotted", {"value": 1})
+        with self.assertRaises(RuntimeError):
+            registry.execute_pipeline(
+                [
+                    {"object_id": objid, "attribute_path": "value", "value": 2},
+                    {"object_id": objid, "attribute_path": "level", "value": 3},
+                    {"object_id": objid, "attribute_path": "scale", "value": 4},
+                    {"object_id": objid, "attribute_path": "value.real", "value": 5},
+                ],
+                atomic=True,
+            )
+        self.assertEqual(registry.obj_attribute(objid, "value"), 1)
+        self.assertFalse(hasattr(registry.obj_attribute(objid, None), "level"))
+        self.assertEqual(registry.obj_attribute(objid, "scale"), 1)
+
+        # an undo that fails neither stops the others nor hides the error
+        objid = registry.register_new_object("Ratchet", {"value": 1})
+        with self.assertRaises(RuntimeError) as context:
+            registry.execute_pipeline(
+                [
+                    {"object_id": objid, "attribute_path": "value", "value": 2},
+                    {"object_id": objid, "attribute_path": "level", "value": 3},
+                    {"object_id": objid, "attribute_path": "value.real", "value": 5},
+                ],
+                atomic=True,
+            )
+        self.assertIsInstance(context.exception.__cause__, AttributeError)
+        self.assertIn("The level only rises.", str(context.exception))
+        self.assertEqual(registry.obj_attribute(objid, "value"), 1)
+
+    def test_single_flight(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return len(calls)
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(flights.do("key", slow, "group"))
+        )
+        leader.start()
+        started.wait()
+        joiner = threading.Thread(
+            target=lambda: results.append(flights.do("key", slow, "group"))
+        )
+        joiner.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        joiner.join()
+        self.assertEqual(sorted(results), [(1, False), (1, True)])
+        self.assertEqual((flights.executed, flights.shared), (1, 1))
+        self.assertEqual(flights.in_flight(), 0)
+
+        def fail():
+            raise ValueError("Shared")
+
+        with self.assertRaises(ValueError):
+            flights.do("key", fail, "group")
+
+        # a forgotten flight is finished for its callers, but not joined
+        release.clear()
+        leader = threading.Thread(target=flights.do, args=("key", slow, "group"))
+        started.clear()
+        leader.start()
+        started.wait()
+        flights.forget("group")
+        self.assertEqual(flights.in_flight(), 0)
+        release.set()
+        leader.join()
+
+    def test_upload_store(self):
+        def Upload(content):
+            return FileStorage(io.BytesIO(content.encode()), filename="upload.txt")
+
+        with tempfile.TemporaryDirectory() as upload_directory:
+            store = UploadStore(upload_directory, max_namespace_bytes=8)
+            first = store.save(("client", "A:0"), "filepath", Upload("12345"))
+            second = store.save(("client", "A:0"), "filepath", Upload("1234"))
+            self.assertFalse(os.path.exists(first))
+            with self.assertRaises(UploadQuotaError):
+                store.save(("client", "A:0"), "other", Upload("12345"))
+            # a rejected re-upload keeps the previous upload, and no file
+            # over quota is left on disk
+            with self.assertRaises(UploadQuotaError):
+                store.save(("client", "A:0"), "filepath", Upload("123456789"))
+            self.assertTrue(os.path.exists(second))
+            self.assertEqual(len(os.listdir(upload_directory)), 1)
+            store.save(("client", "A:1"), "filepath", Upload("12345"))
+            self.assertEqual(store.stats()["files"], 2)
+            store.remove_object("A:0")
+            self.assertFalse(os.path.exists(second))
+            self.assertEqual(store.stats()["bytes"], 5)
+
+    def test_download_store(self):
+        with tempfile.TemporaryDirectory() as download_directory:
+
+            def Offered(name):
+                filepath = os.path.join(download_directory, name)
+                with open(filepath, "w") as fio:
+                    fio.write(name)
+                return ServerFile(filepath, delete_after=True)
+
+            store = DownloadStore(max_age=10)
+            # a missing file is not offered
+            with self.assertRaises(FileNotFoundError):
+                store.offer(ServerFile(os.path.join(download_directory, "absent")))
+            self.assertEqual(store.stats()["files"], 0)
+            # released with the object that returned it
+            store.offer(Offered("first"), "A:0")
+            kept = store.offer(Offered("second"), "A:1")
+            store.release_object("A:0")
+            self.assertEqual(os.listdir(download_directory), ["second"])
+            # and when unused for max_age
+            self.assertEqual(store.expire(), 0)
+            store.max_age = 0
+            self.assertEqual(store.expire(), 1)
+            self.assertEqual(os.listdir(download_directory), [])
+            with self.assertRaises(KeyError):
+                store.get(kept["id"])
+
 
 ###############################################################################
 
@@ -168,6 +1621,11 @@ if __name__ == "__main__":
             self.int_attribute: int = 1
             self.internal_object: Internal = Internal(self, string="Internal")
             self.dumbness = "Not at all"
+            self.cancelled_calls = 0
+            self.reads = 0
+            # named as the settings of a client once were
+            self.timeout = 5.0
+            self.max_retries = 0
             if "dumbness" in kwargs:
                 self.dumbness = kwargs["dumbness"]
 
@@ -176,23 +1634,66 @@ if __name__ == "__main__":
                 self.dumbness = kwargs["dumbness"]
             return self.dumbness
 
-        def add(self, a: int, b: int):
+        def __repr__(self):
+            return f"Dummy({self.dumbness!r})"
+
+        def add(self, a: int, b: int) -> int:
             return a + b
 
+        def get_internal(self):
+            return self.internal_object
+
+        def reset_internal(self):
+            self.internal_object = Internal(self, string="Internal")
+
+        @pure_method
+        def describe(self, prefix: str = ""):
+            return f"{prefix}{self.dumbness}"
+
+        def count(self, n: int, fail_at: int = None):
+            for i in range(n):
+                if i == fail_at:
+                    raise ValueError(f"Failed at {i}")
+                yield i
+
+        def read_slowly(self, seconds: float):
+            self.reads += 1
+            time.sleep(seconds)
+            return self.dumbness
+
         def file_contains_affirmative(self, filepath):
             with open(filepath, "r") as fio:
                 content = fio.read()
                 return content.startswith("SUCCESS")
 
+        def wait_for_cancellation(self, seconds: float):
+            token = cancellation_token()
+            start = time.time()
+            while not token.cancelled and time.time() - start < seconds:
+                time.sleep(0.01)
+            self.cancelled_calls += int(token.cancelled)
+
+        def write_report(self, content: str):
+            fd, filepath = tempfile.mkstemp(suffix="_report.txt")
+            with os.fdopen(fd, "w") as fio:
+                fio.write(content)
+            return ServerFile(filepath, filename="report.txt", delete_after=True)
+
     # start a Flask server, adding remote-object resources to the RESTful API
     app = Flask(__name__)
-    addRemoteObjectResources(app, [Dummy])
+    app.config["COALESCE_READS"] = True
+    exec(MIGRATORY_SOURCE)
+
+    addRemoteObjectResources(app, [Dummy, Migratory])
     server_thread = threading.Thread(
         target=app.run,
         kwargs={"host": "0.0.0.0", "port": 6000, "debug": False},
         daemon=True,
     )
     server_thread.start()
+    startRemoteObjectSocketServer(app, port=6001)
+    startRemoteObjectSocketServer(app, unix_socket_path="/tmp/remoteobjects_test.sock")
+    ASYNC_SERVER = startRemoteObjectAsyncServer(app, port=6002, max_workers=4)
     time.sleep(0.5)
 
     # run remote-object access tests